@@ -3,8 +3,10 @@ from email.mime.text import MIMEText
 from os import getenv
 
 from app.constants import HOST
+from app.metrics import external
 
 
+@external("smtp", "sendmail")
 def send_email(subject: str, body: str) -> None:
     """
     Sends an email using the Gmail SMTP server.
@@ -13,11 +13,24 @@ import cloudinary
 import cloudinary.api
 import cloudinary.uploader
 
+from app.metrics import external
+
 # Set configuration parameter: return "https" URLs by setting secure=True
 # ==============================
 cloudinary.config(secure=True)
 
-uploader = cloudinary.uploader
+
+class _TimedUploader:
+    """
+    Times every call made through `uploader`, e.g. `uploader.upload`, as a Cloudinary call.
+    """
+
+    def __getattr__(self, name: str):
+        attr = getattr(cloudinary.uploader, name)
+        return external("cloudinary", name)(attr) if callable(attr) else attr
+
+
+uploader = _TimedUploader()
 
 
 class CloudinaryException(Exception):
@@ -28,6 +41,7 @@ class CloudinaryException(Exception):
     pass
 
 
+@external("cloudinary", "destroy")
 def delete_image(public_id: str) -> None:
     """
     Deletes an image from the Cloudinary cloud.
@@ -41,6 +55,7 @@ def delete_image(public_id: str) -> None:
         raise CloudinaryException("Failed to delete image")
 
 
+@external("cloudinary", "resource")
 def get_image_data(public_id: str) -> dict:
     """
     Retrieves the metadata for an image from the Cloudinary cloud.
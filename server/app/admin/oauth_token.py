@@ -4,6 +4,8 @@ from fastapi.security.http import HTTPAuthorizationCredentials
 from google.auth import jwt
 from icecream import ic
 
+from app.metrics import AUTH_SECONDS, timed
+
 
 def _token_claims(token: HTTPAuthorizationCredentials) -> dict:
     aud = getenv("AUDIENCE")
@@ -22,6 +24,7 @@ def _token_claims(token: HTTPAuthorizationCredentials) -> dict:
     return claims
 
 
+@timed(AUTH_SECONDS, phase="auth")
 def email_and_sub(token: HTTPAuthorizationCredentials) -> tuple[str, str]:
     claims = _token_claims(token)
     return claims["email"], claims["sub"]
@@ -0,0 +1,26 @@
+import gzip
+
+import brotli
+
+
+def gzip_bytes(body: bytes, level: int = 9) -> bytes:
+    """
+    Gzips a body deterministically (no timestamp in the header), so equal bodies
+    always compress to equal bytes.
+
+    :param bytes body: The uncompressed body
+    :param int level: The compression level, 1 (fastest) to 9 (smallest), defaults to 9
+    :return bytes: The gzipped body
+    """
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(body: bytes, quality: int = 11) -> bytes:
+    """
+    Brotli-compresses a body.
+
+    :param bytes body: The uncompressed body
+    :param int quality: The compression quality, 0 (fastest) to 11 (smallest), defaults to 11
+    :return bytes: The compressed body
+    """
+    return brotli.compress(body, quality=quality)
@@ -7,6 +7,21 @@ EVENT_TABLE = "events"
 GROUP_TABLE = "group_table"
 MUSICIAN_TABLE = "musicians"
 USER_TABLE = "users"
+MIGRATIONS_TABLE = "schema_migrations"
+SNAPSHOT_TABLE = "snapshots"
+CHANGE_LOG_TABLE = "change_log"
+
+# name of the materialized snapshot served by GET /
+ROOT_SNAPSHOT = "root"
+# name of the materialized iCalendar feed served by GET /events/calendar.ics
+CALENDAR_SNAPSHOT = "calendar"
+
+# pagination
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# operations accepted by one POST /batch request
+MAX_BATCH_OPERATIONS = 50
 
 # contact form email
 HOST = "grapefruitswebsite@gmail.com"
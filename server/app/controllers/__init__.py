@@ -1,9 +1,49 @@
+from app.controllers.broadcaster import Broadcaster
+from app.controllers.calendar import CalendarController
+from app.controllers.changes import ChangeController
 from app.controllers.events import EventController
+from app.controllers.export import StaticExporter
 from app.controllers.group import GroupController
 from app.controllers.musicians import MusicianController
+from app.controllers.singleflight import SingleFlight
+from app.controllers.snapshot import SnapshotController
 from app.controllers.users import UserController
+from app.metrics import registry
 
 user_controller = UserController()
 event_controller = EventController()
 group_controller = GroupController()
 musicians_controller = MusicianController()
+snapshot_controller = SnapshotController(
+    musicians_controller, event_controller, group_controller
+)
+calendar_controller = CalendarController(event_controller)
+exporter = StaticExporter(
+    musicians_controller, event_controller, group_controller, snapshot_controller
+)
+change_controller = ChangeController(
+    musicians_controller, event_controller, group_controller
+)
+# shared so reads coalesce across every MainController instance
+flights = SingleFlight()
+# in-process fan-out of change notifications to server-sent event streams
+broadcaster = Broadcaster()
+
+registry.collected(
+    "tgd_singleflight_calls_total",
+    "Coalesced reads, by read and whether the caller ran it, waited on it, or timed out",
+    "counter",
+    ("read", "outcome"),
+    lambda: [
+        ((read, outcome), count)
+        for read, counts in flights.stats().items()
+        for outcome, count in counts.items()
+    ],
+)
+registry.collected(
+    "tgd_live_subscribers",
+    "Open server-sent event streams",
+    "gauge",
+    (),
+    lambda: [((), len(broadcaster.subscribers))],
+)
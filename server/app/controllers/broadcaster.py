@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from threading import Lock
+from typing import AsyncIterator, NamedTuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+load_dotenv()
+
+# seconds between keep-alive comments on an idle stream, so proxies do not close it
+DEFAULT_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# milliseconds clients wait before reconnecting; jittered so a restart does not reconnect everyone at once
+DEFAULT_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+# undelivered messages buffered per connection before it is told to resync
+DEFAULT_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "32"))
+# recent messages kept for clients reconnecting with Last-Event-ID
+DEFAULT_REPLAY_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "256"))
+# open streams per worker
+DEFAULT_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "10000"))
+
+
+class ServerSentEvent(NamedTuple):
+    id: int
+    event: str
+    data: str
+
+    def encode(self) -> bytes:
+        return f"id: {self.id}\nevent: {self.event}\ndata: {self.data}\n\n".encode()
+
+
+class Subscription:
+    """
+    One open stream: a bounded queue filled by the broadcaster and drained by the connection's loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[ServerSentEvent] = asyncio.Queue(size)
+        self.backlog: list[ServerSentEvent] = []
+
+
+class Broadcaster:
+    """
+    Fans out change notifications from the controllers' write methods to every open
+    server-sent event stream of this worker.
+
+    An idle stream costs one queue and one timer, so a worker can hold thousands of them.
+    A client which cannot keep up, or which reconnects after more messages than are kept for replay,
+    receives a `resync` event and should reload (e.g. from GET /changes) instead of relying on the stream.
+    Each worker has its own broadcaster, so writes are only pushed to streams on the worker that handled them.
+    """
+
+    def __init__(
+        self,
+        heartbeat: float = DEFAULT_HEARTBEAT,
+        retry_ms: int = DEFAULT_RETRY_MS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        replay_size: int = DEFAULT_REPLAY_SIZE,
+        max_subscribers: int = DEFAULT_MAX_SUBSCRIBERS,
+    ) -> None:
+        """
+        :param float heartbeat: Seconds between keep-alive comments, defaults to SSE_HEARTBEAT or 15
+        :param int retry_ms: Base reconnection delay sent to clients, defaults to SSE_RETRY_MS or 3000
+        :param int queue_size: Messages buffered per stream, defaults to SSE_QUEUE_SIZE or 32
+        :param int replay_size: Messages kept for Last-Event-ID replay, defaults to SSE_REPLAY_SIZE or 256
+        :param int max_subscribers: Open streams allowed, defaults to SSE_MAX_SUBSCRIBERS or 10000
+        """
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: set[Subscription] = set()
+        self._recent: deque[ServerSentEvent] = deque(maxlen=replay_size)
+        # millisecond timestamps, so IDs keep increasing across restarts
+        self._last_id = time.time_ns() // 1_000_000
+        self._lock = Lock()
+
+    def publish(self, event: str, data: dict) -> ServerSentEvent:
+        """
+        Sends a message to every open stream. Never blocks, and may be called from any thread.
+
+        :param str event: The event name, e.g. `group`
+        :param dict data: The JSON payload
+        :return ServerSentEvent: The message sent
+        """
+        with self._lock:
+            self._last_id += 1
+            message = ServerSentEvent(self._last_id, event, json.dumps(data))
+            self._recent.append(message)
+            subscribers = list(self.subscribers)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for sub in subscribers:
+            if sub.loop is current:
+                self._deliver(sub, message)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(self._deliver, sub, message)
+        return message
+
+    def subscribe(self, last_event_id: int | None = None) -> Subscription:
+        """
+        Opens a stream. A reconnecting client is first sent what it missed.
+
+        :param int | None last_event_id: The ID of the last message the client received, if reconnecting
+        :raises HTTPException: If this worker already holds the maximum number of streams (status code 503)
+        :return Subscription: The new subscription; pass it to `stream`
+        """
+        sub = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many open streams",
+                    headers={"Retry-After": str(self._retry_ms() // 1000 + 1)},
+                )
+            if last_event_id is not None and last_event_id < self._last_id:
+                missed = [m for m in self._recent if m.id > last_event_id]
+                if not self._recent or self._recent[0].id > last_event_id + 1:
+                    # older messages were dropped from the replay buffer
+                    missed = [self._resync()]
+                sub.backlog = missed
+            self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self.subscribers.discard(sub)
+
+    async def stream(self, sub: Subscription) -> AsyncIterator[bytes]:
+        """
+        Yields the encoded stream of a subscription until the client disconnects.
+
+        :param Subscription sub: A subscription from `subscribe`
+        :yield bytes: Server-sent event frames and keep-alive comments
+        """
+        try:
+            yield f"retry: {self._retry_ms()}\n\n".encode()
+            for message in sub.backlog:
+                yield message.encode()
+            sub.backlog = []
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield message.encode()
+        finally:
+            self.unsubscribe(sub)
+
+    def _deliver(self, sub: Subscription, message: ServerSentEvent) -> None:
+        try:
+            sub.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a slow client loses its backlog and reloads instead of growing the queue without bound
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(self._resync())
+
+    def _resync(self) -> ServerSentEvent:
+        return ServerSentEvent(self._last_id, "resync", "{}")
+
+    def _retry_ms(self) -> int:
+        return self.retry_ms + random.randint(0, self.retry_ms)
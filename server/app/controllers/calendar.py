@@ -0,0 +1,218 @@
+import os
+from datetime import datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import sha256
+from typing import Iterable, Iterator
+
+from dotenv import load_dotenv
+
+from app.constants import CALENDAR_SNAPSHOT
+from app.controllers.base_controller import BaseController
+from app.controllers.events import EventController
+from app.db import snapshot_queries
+from app.db.snapshots import SnapshotQueries
+from app.models.event import EventSeries
+from app.models.snapshot import Snapshot
+from app.scripts.version import get_version
+
+load_dotenv()
+
+# iCalendar content lines are limited to 75 octets, excluding the line break
+MAX_LINE_OCTETS = 75
+UID_DOMAIN = "thegrapefruitsduo.com"
+# seconds clients and proxies may reuse the feed without revalidating
+DEFAULT_MAX_AGE = int(os.getenv("CALENDAR_MAX_AGE", "300"))
+
+
+class CalendarController(BaseController):
+    """
+    Renders upcoming events (from the start of today) as an iCalendar (RFC 5545) feed for calendar subscriptions.
+
+    Like GET /, the feed is rendered when event data is written and stored in the snapshots table,
+    so the frequent polling of subscribed calendar clients costs one primary key lookup
+    (or a 304 with no body at all). It is also rendered again on the first request of each day,
+    so past events drop out of it.
+    """
+
+    def __init__(
+        self,
+        event_controller: EventController,
+        snapshot_queries: SnapshotQueries = snapshot_queries,
+        max_age: int = DEFAULT_MAX_AGE,
+    ) -> None:
+        """
+        :param EventController event_controller: used to load event series
+        :param SnapshotQueries snapshot_queries: object for storing the rendered feed, defaults to snapshot_queries
+        :param int max_age: Cache-Control max-age of the feed in seconds, defaults to CALENDAR_MAX_AGE or 300
+        """
+        super().__init__()
+        self.event_controller = event_controller
+        self.db: SnapshotQueries = snapshot_queries
+        self.max_age = max_age
+
+    def build(self) -> Snapshot:
+        """
+        Renders the feed from the events starting today or later and stores it,
+        unless a concurrent rebuild has already stored a feed of newer data.
+
+        :return Snapshot: The rendered feed and the time it was rendered
+        """
+        try:
+            version = self.db.select_data_version()
+        except Exception as e:
+            self.log_error(e)
+            version = 0
+        now = datetime.now()
+        today = datetime.combine(now.date(), time())
+        body = self.render(self.event_controller.get_upcoming_series(today), now)
+        snapshot = Snapshot(
+            name=CALENDAR_SNAPSHOT, body=body, created_at=now, version=version
+        )
+        try:
+            self.db.replace(snapshot)
+        except Exception as e:
+            # still serve the fresh feed, e.g. if the snapshots migration has not been applied
+            self.log_error(e)
+        return snapshot
+
+    def get_calendar(self) -> Snapshot:
+        """
+        Returns the stored feed, rendering it only if none exists yet, it was rendered on an earlier day,
+        or by a different app version.
+
+        :return Snapshot: The rendered feed and the time it was rendered, for Last-Modified
+        """
+        try:
+            data = self.db.select_one_by_name(CALENDAR_SNAPSHOT)
+        except Exception as e:
+            self.log_error(e)
+            data = None
+        if data is not None:
+            snapshot = Snapshot.model_validate(data)
+            if (
+                snapshot.created_at.date() == datetime.now().date()
+                and self._prodid() in snapshot.body
+            ):
+                return snapshot
+        return self.build()
+
+    def headers(self, snapshot: Snapshot) -> dict[str, str]:
+        """
+        :param Snapshot snapshot: A rendered feed
+        :return dict[str, str]: The validator and caching headers for it
+        """
+        return {
+            # weak, since the body is sent compressed or not depending on the client
+            "ETag": f'W/"{sha256(snapshot.body.encode()).hexdigest()[:32]}"',
+            "Last-Modified": format_datetime(_utc(snapshot.created_at), usegmt=True),
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+
+    @staticmethod
+    def not_modified(
+        headers: dict[str, str],
+        if_none_match: str | None,
+        if_modified_since: str | None,
+    ) -> bool:
+        """
+        Evaluates a conditional GET. If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+
+        :param dict[str, str] headers: The headers from `headers`
+        :param str | None if_none_match: The request's If-None-Match header
+        :param str | None if_modified_since: The request's If-Modified-Since header
+        :return bool: True if the client's copy is current and a 304 should be sent
+        """
+        if if_none_match is not None:
+            # weak comparison (RFC 9110 8.8.3.2), as required for If-None-Match
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or headers["ETag"].removeprefix("W/") in tags
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return parsedate_to_datetime(headers["Last-Modified"]) <= since
+        return False
+
+    def render(self, series: Iterable[EventSeries], stamp: datetime) -> str:
+        """
+        Renders a VCALENDAR with one VEVENT per event. Event times are stored without a zone,
+        so they are rendered as floating local times.
+
+        :param Iterable[EventSeries] series: The series to include
+        :param datetime stamp: The time the feed is rendered
+        :return str: The feed, with CRLF line breaks
+        """
+        dtstamp = _utc(stamp).strftime("%Y%m%dT%H%M%SZ")
+        lines = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            self._prodid(),
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            "X-WR-CALNAME:The Grapefruits Duo",
+        ]
+        for s in series:
+            for event in s.events:
+                details = [s.description]
+                if event.ticket_url:
+                    details.append(f"Tickets: {event.ticket_url}")
+                if event.map_url:
+                    details.append(f"Map: {event.map_url}")
+                description = "\n".join(details)
+                lines += [
+                    "BEGIN:VEVENT",
+                    f"UID:event-{event.event_id}@{UID_DOMAIN}",
+                    f"DTSTAMP:{dtstamp}",
+                    f"DTSTART:{event.time.strftime('%Y%m%dT%H%M%S')}",
+                    f"SUMMARY:{escape(s.name)}",
+                    f"LOCATION:{escape(event.location)}",
+                    f"DESCRIPTION:{escape(description)}",
+                ]
+                if event.ticket_url:
+                    lines.append(f"URL:{event.ticket_url}")
+                lines.append("END:VEVENT")
+        lines.append("END:VCALENDAR")
+        return "".join(f"{folded}\r\n" for line in lines for folded in fold(line))
+
+    @staticmethod
+    def _prodid() -> str:
+        return f"PRODID:-//The Grapefruits Duo//API {get_version()}//EN"
+
+
+def _utc(time: datetime) -> datetime:
+    # times are stored naive, in the server's local time
+    return time.astimezone(timezone.utc)
+
+
+def escape(text: str) -> str:
+    """
+    :param str text: A TEXT property value
+    :return str: The value with backslashes, commas, semicolons and line breaks escaped
+    """
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> Iterator[str]:
+    """
+    Splits a content line into chunks of at most 75 octets, never inside a UTF-8 character.
+    Every chunk after the first is prefixed with the space which marks a continuation.
+
+    :param str line: An unfolded content line
+    :yield str: The physical lines
+    """
+    chunk, size = "", 0
+    for char in line:
+        octets = len(char.encode())
+        if size + octets > MAX_LINE_OCTETS:
+            yield chunk
+            chunk, size = " ", 1
+        chunk += char
+        size += octets
+    yield chunk
@@ -0,0 +1,98 @@
+from fastapi import HTTPException, status
+
+from app.controllers.base_controller import BaseController
+from app.controllers.events import EventController
+from app.controllers.group import GroupController
+from app.controllers.musicians import MusicianController
+from app.db import change_queries
+from app.db.changes import ChangeQueries
+from app.models.changes import ChangeEntry, Changes, Tombstone
+
+
+class ChangeController(BaseController):
+    """
+    Serves delta sync: clients send the version they last saw and receive only the entities
+    which changed since, rather than re-downloading all public data.
+    """
+
+    def __init__(
+        self,
+        musician_controller: MusicianController,
+        event_controller: EventController,
+        group_controller: GroupController,
+        change_queries: ChangeQueries = change_queries,
+    ) -> None:
+        """
+        :param MusicianController musician_controller: used to load changed musicians
+        :param EventController event_controller: used to load changed event series
+        :param GroupController group_controller: used to load the group
+        :param ChangeQueries change_queries: object for reading the change log, defaults to change_queries
+        """
+        super().__init__()
+        self.musician_controller = musician_controller
+        self.event_controller = event_controller
+        self.group_controller = group_controller
+        self.db: ChangeQueries = change_queries
+
+    def get_changes(self, since: int | None = None) -> Changes:
+        """
+        Retrieves every entity changed after a version. The current version is read before any entity,
+        so a change committed meanwhile is returned again by the client's next request rather than missed.
+
+        When there are changes, everything is read on one connection. Separate reads could be routed
+        to replicas lagging by different amounts, returning a version newer than the entities read
+        with it, and the client would never ask for the missing changes again.
+
+        :param int | None since: The version the client last received, or None if it has no data yet
+        :return Changes: The changed entities and tombstones, or all entities if `since` is unknown
+        """
+        # most polls find nothing new; a cached or lagging version is never ahead of the log,
+        # so it can only delay changes to the next poll, never skip them
+        if since and self.db.select_latest_version() == since:
+            return Changes(version=since)
+        with self.db.consistent_read():
+            return self._get_changes(since)
+
+    def _get_changes(self, since: int | None) -> Changes:
+        version = self.db.select_latest_version()
+        if not since or since > version:
+            # data seeded before the change log existed is never in it, and a version from
+            # the future means the log was reset, so either way the client starts over
+            return Changes(
+                version=version,
+                full=True,
+                group=self.group_controller.get_group(),
+                musicians=self.musician_controller.get_musicians(),
+                events=self.event_controller.get_all_series(),
+            )
+
+        changes = Changes(version=version)
+        for data in self.db.select_since(since, version):
+            entry = ChangeEntry.model_validate(data)
+            if entry.op == "delete":
+                changes.deleted.append(self._tombstone(entry))
+                continue
+            try:
+                self._add_upsert(changes, entry)
+            except HTTPException as e:
+                if e.status_code != status.HTTP_404_NOT_FOUND:
+                    raise
+                # deleted after `version`; the client would otherwise keep a stale copy until next sync
+                changes.deleted.append(self._tombstone(entry))
+        return changes
+
+    def _add_upsert(self, changes: Changes, entry: ChangeEntry) -> None:
+        if entry.entity == "group":
+            changes.group = self.group_controller.get_group()
+        elif entry.entity == "musicians":
+            changes.musicians.append(
+                self.musician_controller.get_musician(entry.entity_id)
+            )
+        else:
+            changes.events.append(
+                self.event_controller.get_one_series_by_id(entry.entity_id)
+            )
+
+    @staticmethod
+    def _tombstone(entry: ChangeEntry) -> Tombstone:
+        return Tombstone(entity=entry.entity, id=entry.entity_id, version=entry.version)
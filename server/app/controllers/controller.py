@@ -1,24 +1,57 @@
-from typing import Optional
+from asyncio import Task, create_task, gather
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
 
 from fastapi import HTTPException, UploadFile, status
 from fastapi.security import HTTPAuthorizationCredentials
 from icecream import ic
+from starlette.concurrency import run_in_threadpool
 
 from app.admin import oauth_token
 from app.controllers import (
+    broadcaster,
+    calendar_controller,
+    change_controller,
     event_controller,
+    exporter,
+    flights,
     group_controller,
     musicians_controller,
+    snapshot_controller,
     user_controller,
 )
+from app.controllers.broadcaster import Broadcaster
+from app.controllers.calendar import CalendarController
+from app.controllers.changes import ChangeController
 from app.controllers.events import EventController
+from app.controllers.export import StaticExporter
+from app.controllers.fieldsets import ROOT_SECTIONS, group_fields, series_fields
 from app.controllers.group import GroupController
+from app.controllers.imports import parse_import
 from app.controllers.musicians import MusicianController
+from app.controllers.singleflight import SingleFlight
+from app.controllers.snapshot import SnapshotController
 from app.controllers.users import UserController
-from app.models.event import EventSeries, NewEventSeries
+from app.db.routing import read_from_primary
+from app.metrics import CONTROLLER_SECONDS, timed_methods
+from app.models.batch import (
+    Batch,
+    DeleteSeries,
+    Operation,
+    OperationResult,
+    UpdateGroupBio,
+    UpdateLivestream,
+    UpdateMusicianBio,
+    UpdateSeries,
+)
+from app.models.changes import Changes
+from app.models.event import EventSeries, NewEventSeries, SeriesPatch
 from app.models.group import Group
+from app.models.imports import ImportResult, OnConflict
 from app.models.musician import Musician
+from app.models.snapshot import Snapshot
 from app.models.user import User
+from app.scripts.version import get_version
 
 
 class MainController:
@@ -33,20 +66,169 @@ class MainController:
         user_controller=user_controller,
         group_controller=group_controller,
         oauth_token=oauth_token,
+        flights: SingleFlight = flights,
+        snapshot_controller: SnapshotController = snapshot_controller,
+        exporter: StaticExporter = exporter,
+        change_controller: ChangeController = change_controller,
+        broadcaster: Broadcaster = broadcaster,
+        calendar_controller: CalendarController = calendar_controller,
     ) -> None:
         self.event_controller = event_controller
         self.musician_controller = musicians_controller
         self.user_controller = user_controller
         self.group_controller = group_controller
         self.oauth_token = oauth_token
+        self.flights = flights
+        self.snapshot_controller = snapshot_controller
+        self.exporter = exporter
+        self.change_controller = change_controller
+        self.broadcaster = broadcaster
+        self.calendar_controller = calendar_controller
+        # the running static export, and whether a write landed since it started
+        self._export: Task | None = None
+        self._export_stale = False
+
+    async def _read(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a read through the single-flight group, so concurrent identical reads share one
+        set of queries. Requests pinned to the primary never share a flight with replica reads.
+
+        :param Callable[..., Any] fn: The blocking controller method to run
+        :return Any: The result of the read
+        """
+        key = (getattr(fn, "__qualname__", repr(fn)), *args, read_from_primary())
+        return await self.flights.do(key, fn, *args)
+
+    async def _after_write(self, entity: str, *data: dict) -> None:
+        """
+        Rebuilds the materialized site snapshot (and the calendar feed if events changed),
+        then notifies open streams of the change and starts the static export if EXPORT_DIR is set.
+        Called at the end of every successful write.
+
+        :param str entity: The section which changed (group, musicians or events), sent as the event name
+        :param dict data: A notification payload per changed entity, at least its `id` and the `op`
+        """
+        await self._after_writes([(entity, payload) for payload in data])
+
+    async def _after_writes(self, changes: list[tuple[str, dict]]) -> None:
+        """
+        Like `_after_write`, for writes which changed several sections; everything is rebuilt once.
+        The rebuilds query the database, so they run in the threadpool rather than on the event loop.
+        The static export compresses every route, so the write does not wait for it.
+
+        :param list[tuple[str, dict]] changes: The section and notification payload of each changed entity
+        """
+        await run_in_threadpool(self._rebuild, changes)
+        # sent after the rebuild, so clients reloading on notification get the new data
+        try:
+            for entity, payload in changes:
+                self.broadcaster.publish(entity, payload)
+        except Exception as e:
+            self.snapshot_controller.log_error(e)
+        if self.exporter.path is not None:
+            self._start_export()
+
+    def _rebuild(self, changes: list[tuple[str, dict]]) -> None:
+        """
+        Rebuilds the snapshot, and the calendar feed if events changed.
+        The writes have already been committed, so a failed rebuild is logged rather than raised;
+        the next write, or a version change, rebuilds it.
+
+        :param list[tuple[str, dict]] changes: The section and notification payload of each changed entity
+        """
+        try:
+            self.snapshot_controller.build()
+            if any(entity == "events" for entity, _ in changes):
+                self.calendar_controller.build()
+        except Exception as e:
+            self.snapshot_controller.log_error(e)
+
+    def _start_export(self) -> Task:
+        """
+        Starts the static export in the background. Writes landing while one runs are
+        coalesced into one more export once it finishes, so exports never overlap.
+
+        :return Task: The running export
+        """
+        if self._export is not None and not self._export.done():
+            self._export_stale = True
+        else:
+            self._export = create_task(self._run_exports())
+        return self._export
+
+    async def _run_exports(self) -> None:
+        while True:
+            self._export_stale = False
+            try:
+                await run_in_threadpool(self.exporter.export)
+            except Exception as e:
+                self.snapshot_controller.log_error(e)
+            if not self._export_stale:
+                return
+
+    @staticmethod
+    def _group_change(group: Group) -> dict:
+        # the livestream is what viewers wait on during a show, so it is pushed rather than reloaded
+        return {"id": group.id, "op": "upsert", "livestream_id": group.livestream_id}
+
+    async def get_root_fields(
+        self, include: tuple[str, ...], fields: tuple[str, ...] | None = None
+    ) -> dict:
+        """
+        Assembles a pruned TheGrapefruitsDuo object. Sections which are not included are never queried,
+        and only the selected columns of the included ones are.
+
+        :param tuple[str, ...] include: The sections to include (group, musicians and/or events)
+        :param tuple[str, ...] | None fields: A sparse fieldset qualified by section, e.g. `musicians.name`
+            or `events.events.time`, defaults to all fields of each included section
+        :raises HTTPException: If a field is not qualified by a known section (status code 400)
+        :return dict: The included sections by name, and the API version
+        """
+        by_section = group_fields(fields) if fields is not None else {}
+        if set(by_section).difference(ROOT_SECTIONS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Fields must be qualified with one of {list(ROOT_SECTIONS)}, e.g. musicians.name",
+            )
+        reads = {}
+        if "group" in include:
+            reads["group"] = self.get_group(by_section.get("group"))
+        if "musicians" in include:
+            reads["musicians"] = self.get_musicians(by_section.get("musicians"))
+        if "events" in include:
+            reads["events"] = self.get_events(*series_fields(by_section.get("events")))
+        results = await gather(*reads.values())
+        return {"version": get_version(), **dict(zip(reads, results))}
+
+    async def get_root(self) -> bytes:
+        """
+        Retrieves the materialized snapshot of all public data.
+
+        :return bytes: The serialized TheGrapefruitsDuo object for a response body
+        """
+        return await self._read(self.snapshot_controller.get_root)
+
+    async def get_changes(self, since: int | None = None) -> Changes:
+        """
+        Retrieves the entities changed since a client's last version, for delta sync.
 
-    async def get_musicians(self) -> list[Musician]:
+        :param int | None since: The version the client last received, defaults to None (full resync)
+        :return Changes: The changed entities and tombstones
+        """
+        return await self._read(self.change_controller.get_changes, since)
+
+    async def get_musicians(
+        self, columns: tuple[str, ...] | None = None
+    ) -> list[Musician]:
         """
         Retrieves all musicians and returns them as a list.
 
-        :return list[Musician]: _description_
+        :param tuple[str, ...] | None columns: A sparse fieldset, defaults to all fields
+        :return list[Musician]: _description_ (partial dicts when `columns` is given)
         """
-        return self.musician_controller.get_musicians()
+        if columns is None:
+            return await self._read(self.musician_controller.get_musicians)
+        return await self._read(self.musician_controller.get_sparse_musicians, columns)
 
     async def get_musician(self, musician_id: int) -> Musician:
         """
@@ -55,7 +237,7 @@ class MainController:
         :param int musician_id: The ID of the musician to retrieve
         :return Musician: The musician object for a response body
         """
-        return self.musician_controller.get_musician(musician_id)
+        return await self._read(self.musician_controller.get_musician, musician_id)
 
     async def update_musician(
         self,
@@ -82,19 +264,106 @@ class MainController:
             )
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        return self.musician_controller.update_musician(
+        updated = self.musician_controller.update_musician(
             musician_id=musician.id,
             new_bio=musician.bio,
             file=file,
         )
+        await self._after_write("musicians", {"id": updated.id, "op": "upsert"})
+        return updated
 
-    async def get_events(self) -> list[EventSeries]:
+    async def get_events(
+        self,
+        columns: tuple[str, ...] | None = None,
+        event_columns: tuple[str, ...] | None = None,
+    ) -> list[EventSeries]:
         """
         Retrieves all event series and returns them as a list.
 
+        :param tuple[str, ...] | None columns: A sparse fieldset of series fields, defaults to all fields
+        :param tuple[str, ...] | None event_columns: A sparse fieldset of event fields, defaults to all fields; if empty, events are not loaded
+        :return list[EventSeries]: a list of EventSeries objects for a response body (partial dicts when a fieldset is given)
+        """
+        if columns is None and event_columns is None:
+            return await self._read(self.event_controller.get_all_series)
+        return await self._read(
+            self.event_controller.get_sparse_series, columns, event_columns
+        )
+
+    async def get_calendar(self) -> Snapshot:
+        """
+        Retrieves the materialized iCalendar feed of upcoming events.
+
+        :return Snapshot: The feed and the time it was rendered
+        """
+        return await self._read(self.calendar_controller.get_calendar)
+
+    def calendar_headers(self, calendar: Snapshot) -> dict[str, str]:
+        """
+        :param Snapshot calendar: The feed from `get_calendar`
+        :return dict[str, str]: Its ETag, Last-Modified and Cache-Control headers
+        """
+        return self.calendar_controller.headers(calendar)
+
+    def calendar_not_modified(
+        self,
+        headers: dict[str, str],
+        if_none_match: str | None,
+        if_modified_since: str | None,
+    ) -> bool:
+        """
+        :param dict[str, str] headers: The headers from `calendar_headers`
+        :param str | None if_none_match: The request's If-None-Match header
+        :param str | None if_modified_since: The request's If-Modified-Since header
+        :return bool: True if the client's copy of the feed is current and a 304 should be sent
+        """
+        return self.calendar_controller.not_modified(
+            headers, if_none_match, if_modified_since
+        )
+
+    def export_events(self) -> Iterator[bytes]:
+        """
+        Streams every event series as NDJSON. Not coalesced: each export gets its own cursor,
+        and the blocking iteration is left to the response, which runs it in a worker thread.
+
+        :return Iterator[bytes]: One serialized EventSeries per line
+        """
+        return self.event_controller.export_series()
+
+    async def get_events_page(
+        self,
+        after: int | None = None,
+        limit: int | None = None,
+        events_limit: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> tuple[list[EventSeries], int | None]:
+        """
+        Retrieves one page of event series, ordered by series ID.
+
+        :param int | None after: The series ID the page starts after, defaults to None
+        :param int | None limit: The maximum number of series on the page, defaults to no limit
+        :param int | None events_limit: The maximum number of events per series, defaults to no limit
+        :param datetime | None start: Only events at or after this time are returned, defaults to None
+        :param datetime | None end: Only events before this time are returned, defaults to None
+        :return tuple[list[EventSeries], int | None]: The page, and the series ID the next page starts after, if any
+        """
+        return await self._read(
+            self.event_controller.get_series_page,
+            after,
+            limit,
+            events_limit,
+            start,
+            end,
+        )
+
+    async def get_upcoming_events(self) -> list[EventSeries]:
+        """
+        Retrieves event series with future events, soonest first.
+
         :return list[EventSeries]: a list of EventSeries objects for a response body
         """
-        return self.event_controller.get_all_series()
+        return await self._read(self.event_controller.get_upcoming_series)
 
     async def get_event(self, series_id: int) -> EventSeries:
         """
@@ -103,7 +372,7 @@ class MainController:
         :param int series_id: The ID of the event series to retrieve
         :return EventSeries: The event series object for a response body
         """
-        return self.event_controller.get_one_series_by_id(series_id)
+        return await self._read(self.event_controller.get_one_series_by_id, series_id)
 
     async def create_event(
         self, series: NewEventSeries, token: HTTPAuthorizationCredentials
@@ -117,7 +386,36 @@ class MainController:
         """
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        return self.event_controller.create_series(series)
+        created = self.event_controller.create_series(series)
+        await self._after_write("events", {"id": created.series_id, "op": "upsert"})
+        return created
+
+    async def import_series(
+        self,
+        content_type: str,
+        body: bytes,
+        on_conflict: OnConflict,
+        token: HTTPAuthorizationCredentials,
+    ) -> ImportResult:
+        """
+        Imports many event series at once, from a JSON array or a CSV file.
+        Every row is validated before anything is written, and all rows are written in one transaction.
+
+        :param str content_type: The Content-Type of the body, `application/json` or `text/csv`
+        :param bytes body: The request body
+        :param OnConflict on_conflict: What to do with series whose name exists: "error", "skip" or "upsert"
+        :param HTTPAuthorizationCredentials token: The OAuth token
+        :return ImportResult: The created, updated and skipped series
+        """
+        _, sub = self.oauth_token.email_and_sub(token)
+        self.user_controller.get_user_by_sub(sub)
+        rows = parse_import(content_type, body)
+        result = self.event_controller.import_series(rows, on_conflict)
+        if changed := result.created + result.updated:
+            await self._after_write(
+                "events", *({"id": id, "op": "upsert"} for id in changed)
+            )
+        return result
 
     async def add_series_poster(
         self, series_id: int, poster: UploadFile, token: HTTPAuthorizationCredentials
@@ -132,7 +430,9 @@ class MainController:
         """
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        return self.event_controller.add_series_poster(series_id, poster)
+        updated = self.event_controller.add_series_poster(series_id, poster)
+        await self._after_write("events", {"id": updated.series_id, "op": "upsert"})
+        return updated
 
     async def delete_series(
         self, series_id: int, token: HTTPAuthorizationCredentials
@@ -146,6 +446,7 @@ class MainController:
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
         self.event_controller.delete_series(series_id)
+        await self._after_write("events", {"id": series_id, "op": "delete"})
 
     async def update_series(
         self, route_id: int, series: EventSeries, token: HTTPAuthorizationCredentials
@@ -160,7 +461,26 @@ class MainController:
         """
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        return self.event_controller.update_series(route_id, series)
+        updated = self.event_controller.update_series(route_id, series)
+        await self._after_write("events", {"id": updated.series_id, "op": "upsert"})
+        return updated
+
+    async def patch_series(
+        self, series_id: int, patch: SeriesPatch, token: HTTPAuthorizationCredentials
+    ) -> EventSeries:
+        """
+        Changes only the supplied fields of an event series and returns the updated object.
+
+        :param int series_id: The ID of the event series in the URL
+        :param SeriesPatch patch: The fields to change
+        :param HTTPAuthorizationCredentials token: The OAuth token
+        :return EventSeries: The updated event series object which is suitable for a response body
+        """
+        _, sub = self.oauth_token.email_and_sub(token)
+        self.user_controller.get_user_by_sub(sub)
+        updated = self.event_controller.patch_series(series_id, patch)
+        await self._after_write("events", {"id": series_id, "op": "upsert"})
+        return updated
 
     async def get_users(self) -> list[User]:
         """
@@ -168,7 +488,7 @@ class MainController:
 
         :return list[User]: a list of User objects for a response body
         """
-        return self.user_controller.get_users()
+        return await self._read(self.user_controller.get_users)
 
     async def get_user(self, user_id: int) -> User:
         """
@@ -177,7 +497,7 @@ class MainController:
         :param int user_id: The ID of the user to retrieve
         :return User: The user object for a response body
         """
-        return self.user_controller.get_user_by_id(user_id)
+        return await self._read(self.user_controller.get_user_by_id, user_id)
 
     async def create_user(self, token: HTTPAuthorizationCredentials) -> User:
         """
@@ -189,13 +509,16 @@ class MainController:
         """
         return self.user_controller.create_user(token)
 
-    async def get_group(self) -> Group:
+    async def get_group(self, columns: tuple[str, ...] | None = None) -> Group:
         """
         Retrieves the group object and returns it.
 
-        :return Group: The group object for a response body
+        :param tuple[str, ...] | None columns: A sparse fieldset, defaults to all fields
+        :return Group: The group object for a response body (a partial dict when `columns` is given)
         """
-        return self.group_controller.get_group()
+        if columns is None:
+            return await self._read(self.group_controller.get_group)
+        return await self._read(self.group_controller.get_sparse_group, columns)
 
     async def update_group(
         self, group: Group, token: HTTPAuthorizationCredentials
@@ -205,12 +528,80 @@ class MainController:
         """
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        self.group_controller.update_livestream(group.livestream_id)
-        return self.group_controller.update_group_bio(group.bio)
+        updated = self.group_controller.update_livestream(group.livestream_id)
+        updated = self.group_controller.update_group_bio(group.bio, updated)
+        await self._after_write("group", self._group_change(updated))
+        return updated
+
+    async def batch(
+        self, batch: Batch, token: HTTPAuthorizationCredentials
+    ) -> list[OperationResult]:
+        """
+        Applies several admin writes with one authentication, in order and in one transaction:
+        if any operation fails, none of them is applied. The snapshot and other derived data
+        are rebuilt once, after the transaction commits.
+
+        :param Batch batch: The operations
+        :param HTTPAuthorizationCredentials token: The OAuth token
+        :raises HTTPException: If an operation fails, with its index and error (status code of the error)
+        :return list[OperationResult]: The result of each operation, in order
+        """
+        _, sub = self.oauth_token.email_and_sub(token)
+        self.user_controller.get_user_by_sub(sub)
+        results: list[OperationResult] = []
+        changes: list[tuple[str, dict]] = []
+        with self.event_controller.db.transaction():
+            for i, operation in enumerate(batch.operations):
+                try:
+                    result, change = self._apply(operation)
+                except HTTPException as e:
+                    raise HTTPException(
+                        status_code=e.status_code,
+                        detail={"operation": i, "op": operation.op, "detail": e.detail},
+                    )
+                results.append(OperationResult(op=operation.op, result=result))
+                changes.append(change)
+        await self._after_writes(changes)
+        return results
+
+    def _apply(
+        self, operation: Operation
+    ) -> tuple[Musician | Group | EventSeries | None, tuple[str, dict]]:
+        """
+        Runs one batch operation.
+
+        :param Operation operation: The operation
+        :return tuple: What the operation wrote, and its section and notification payload
+        """
+        match operation:
+            case UpdateMusicianBio(musician_id=musician_id, bio=bio):
+                musician = self.musician_controller.update_musician(musician_id, bio)
+                return musician, ("musicians", {"id": musician_id, "op": "upsert"})
+            case UpdateGroupBio(bio=bio):
+                group = self.group_controller.update_group_bio(bio)
+                return group, ("group", self._group_change(group))
+            case UpdateLivestream(livestream_id=livestream_id):
+                group = self.group_controller.update_livestream(livestream_id)
+                return group, ("group", self._group_change(group))
+            case UpdateSeries(series=series):
+                updated = self.event_controller.update_series(series.series_id, series)
+                return updated, ("events", {"id": series.series_id, "op": "upsert"})
+            case DeleteSeries(series_id=series_id):
+                self.event_controller.delete_series(series_id)
+                return None, ("events", {"id": series_id, "op": "delete"})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown operation {operation.op}",
+        )
 
     async def update_livestream(
         self, livestream_id: str, token: HTTPAuthorizationCredentials
     ) -> Group:
         _, sub = self.oauth_token.email_and_sub(token)
         self.user_controller.get_user_by_sub(sub)
-        return self.group_controller.update_livestream(livestream_id)
+        updated = self.group_controller.update_livestream(livestream_id)
+        await self._after_write("group", self._group_change(updated))
+        return updated
+
+
+timed_methods(MainController, CONTROLLER_SECONDS, phase="build")
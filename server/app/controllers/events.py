@@ -1,12 +1,23 @@
+from datetime import datetime
+from itertools import chain, groupby
+from operator import attrgetter, itemgetter
+from typing import Iterable, Iterator, Sequence
+
 from fastapi import HTTPException, UploadFile, status
 from icecream import ic
-from mysql.connector.errors import IntegrityError
 
 from app.admin.images import uploader
 from app.controllers.base_controller import BaseController
+from app.controllers.fieldsets import columns_for
+from app.controllers.imports import ImportRows
 from app.db import event_queries
+from app.db.base_queries import Change
+from app.db.columns import project
+from app.db.conn import IntegrityError
 from app.db.events import EventQueries
-from app.models.event import Event, EventSeries, NewEventSeries
+from app.db.rows import Row
+from app.models.event import Event, EventSeries, NewEventSeries, SeriesPatch
+from app.models.imports import ImportResult, OnConflict, RowError
 
 
 class EventController(BaseController):
@@ -24,24 +35,96 @@ class EventController(BaseController):
         super().__init__()
         self.db: EventQueries = event_queries
 
-    def _all_series(self, data_rows: list[dict]) -> dict[str, EventSeries]:
+    def _all_series(self, data_rows: Iterable[Row]) -> Iterator[EventSeries]:
+        """
+        Assembles EventSeries objects from rows ordered by series ID, yielding each series
+        as soon as its rows have been consumed. Only one series is held in memory at a time.
+        Must only be used internally.
+
+        :param Iterable[Row] data_rows: The sql rows, grouped by series ID
+        :yield EventSeries: Each EventSeries object in row order
+        """
+        for _, series_rows in groupby(data_rows, key=itemgetter("series_id")):
+            first_row = next(series_rows)
+            series = EventSeries(**first_row, events=[])
+            for row in chain((first_row,), series_rows):
+                if row.get("event_id"):
+                    series.events.append(Event.model_validate(row))
+            yield series
+
+    def _sparse_series(
+        self,
+        data_rows: Iterable[Row],
+        columns: Sequence[str],
+        event_columns: Sequence[str] | None,
+    ) -> Iterator[dict]:
         """
-        Builds a dictionary of EventSeries objects from a list of dictionaries.
+        Like `_all_series`, but assembles plain dicts holding only the selected fields.
         Must only be used internally.
 
-        :param list[dict] data_rows: The list of sql rows as dictionaries
-        :return dict[str, EventSeries]: A dictionary of EventSeries objects keyed by series name
+        :param Iterable[Row] data_rows: The sql rows, grouped by series ID
+        :param Sequence[str] columns: The selected series columns
+        :param Sequence[str] | None event_columns: The selected event columns, or None if events were not queried
+        :yield dict: Each partial series in row order
+        """
+        for _, series_rows in groupby(data_rows, key=itemgetter("series_id")):
+            first_row = next(series_rows)
+            series = {c: first_row[c] for c in columns}
+            if event_columns is not None:
+                series["events"] = [
+                    {c: row[c] for c in event_columns}
+                    for row in chain((first_row,), series_rows)
+                    if row.get("event_id")
+                ]
+            yield series
+
+    def iter_all_series(self) -> Iterator[EventSeries]:
+        """
+        Streams all EventSeries objects one at a time, straight from the database cursor.
+
+        :yield EventSeries: Each EventSeries object, ordered by series ID
         """
-        all_series: dict[str, EventSeries] = {}
+        return self._all_series(self.db.select_all())
 
-        for event_series_row in data_rows:
-            series_name: str = event_series_row["name"]
-            if series_name not in all_series:
-                all_series[series_name] = EventSeries(**event_series_row, events=[])
-            if event_series_row.get("event_id"):
-                all_series[series_name].events.append(Event(**event_series_row))
+    def export_series(self) -> Iterator[bytes]:
+        """
+        Streams all EventSeries objects as NDJSON, one series per line, straight from an unbuffered cursor.
+        Rows bypass the query cache, so memory stays flat however much history there is.
+
+        :yield bytes: Each serialized EventSeries, newline-terminated, ordered by series ID
+        """
+        for series in self._all_series(self.db.select_all(cached=False)):
+            yield series.model_dump_json().encode() + b"\n"
+
+    def get_sparse_series(
+        self,
+        columns: Sequence[str] | None = None,
+        event_columns: Sequence[str] | None = None,
+    ) -> list[dict]:
+        """
+        Retrieves only the selected fields of all series, querying only their columns.
+        `series_id`, and `event_id` when events are selected, are always included.
 
-        return all_series
+        :param Sequence[str] | None columns: The series fields, defaults to all of them
+        :param Sequence[str] | None event_columns: The event fields, defaults to all of them; if empty, events are not queried at all
+        :raises HTTPException: If a requested field does not exist (status code 400)
+        :raises HTTPException: If any error occurs (status code 500)
+        :return list[dict]: The partial series, ordered by series ID
+        """
+        columns = columns_for(EventSeries, columns, "series_id") or project(EventSeries)
+        if event_columns != ():
+            event_columns = columns_for(Event, event_columns, "event_id") or project(
+                Event
+            )
+        try:
+            rows = self.db.select_all(columns, event_columns)
+            return list(self._sparse_series(rows, columns, event_columns or None))  # type: ignore
+        except Exception as e:
+            self.log_error(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving event objects: {e}",
+            )
 
     def get_all_series(self) -> list[EventSeries]:
         """
@@ -50,10 +133,69 @@ class EventController(BaseController):
         :raises HTTPException: If any error occurs (status code 500)
         :return list[EventSeries]: A list of EventSeries objects suitable for a response body
         """
-        series_data = self.db.select_all()
+        try:
+            return list(self.iter_all_series())
+        except Exception as e:
+            self.log_error(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving event objects: {e}",
+            )
+
+    def get_series_page(
+        self,
+        after: int | None = None,
+        limit: int | None = None,
+        events_limit: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> tuple[list[EventSeries], int | None]:
+        """
+        Retrieves one keyset-paginated page of EventSeries objects.
+        One extra series is requested to find out whether another page follows.
 
+        :param int | None after: Only series with an ID greater than this are returned, defaults to None
+        :param int | None limit: The maximum number of series on the page, defaults to no limit
+        :param int | None events_limit: The maximum number of events per series, defaults to no limit
+        :param datetime | None start: Only events at or after this time are returned, defaults to None
+        :param datetime | None end: Only events before this time are returned, defaults to None
+        :raises HTTPException: If the time window is empty (status code 400)
+        :raises HTTPException: If any error occurs (status code 500)
+        :return tuple[list[EventSeries], int | None]: The page, and the series ID the next page starts after (None on the last page)
+        """
+        if start is not None and end is not None and start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'from' must be earlier than 'to'",
+            )
+        fetch_limit = limit + 1 if limit is not None else None
         try:
-            return [series for series in self._all_series(series_data).values()]
+            rows = self.db.select_page(after, fetch_limit, events_limit, start, end)
+            page = list(self._all_series(rows))
+        except Exception as e:
+            self.log_error(e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error retrieving event objects: {e}",
+            )
+        if limit is None or len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        return page, page[-1].series_id
+
+    def get_upcoming_series(self, since: datetime | None = None) -> list[EventSeries]:
+        """
+        Retrieves EventSeries objects with future events, soonest first.
+        Past events are left out of each series.
+
+        :param datetime | None since: The time events must start at or after, defaults to now
+        :raises HTTPException: If any error occurs (status code 500)
+        :return list[EventSeries]: A list of EventSeries objects suitable for a response body
+        """
+        try:
+            return list(
+                self._all_series(self.db.select_upcoming(since or datetime.now()))
+            )
         except Exception as e:
             self.log_error(e)
             raise HTTPException(
@@ -76,7 +218,10 @@ class EventController(BaseController):
             )
         try:
             return EventSeries(
-                **rows[0], events=[Event(**row) for row in rows if row.get("event_id")]
+                **rows[0],
+                events=[
+                    Event.model_validate(row) for row in rows if row.get("event_id")
+                ],
             )
         except Exception as e:
             raise HTTPException(
@@ -93,16 +238,76 @@ class EventController(BaseController):
         :return EventSeries: The created EventSeries object which is suitable for a response body
         """
         try:
-            inserted_id = self.db.insert_one_series(series)
-            for new_event in series.events:
-                self.db.insert_one_event(new_event, inserted_id)
-            return self.get_one_series_by_id(inserted_id)
+            with self.db.transaction():
+                inserted_id = self.db.insert_one_series(series)
+                event_ids = [
+                    self.db.insert_one_event(new_event, inserted_id)
+                    for new_event in series.events
+                ]
+            return self._written_series(inserted_id, series, event_ids)
         except IntegrityError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Series name already exists. Each series must have a unique name.\n{e}",
             )
 
+    def import_series(
+        self, rows: ImportRows, on_conflict: OnConflict = "error"
+    ) -> ImportResult:
+        """
+        Creates many series and their events in one transaction, using multi-row INSERTs.
+        Either every series is imported or, if anything fails, none is.
+
+        :param ImportRows rows: The validated series, each with the row it was read from
+        :param OnConflict on_conflict: For series whose name exists: "error" rejects the import,
+            "skip" leaves the existing series alone, and "upsert" replaces its description and events
+        :raises HTTPException: If a name exists and on_conflict is "error", with an error per row (status code 409)
+        :return ImportResult: The IDs of the created and updated series, and the names of skipped ones
+        """
+        result = ImportResult()
+        try:
+            with self.db.transaction():
+                existing = self.db.select_ids_by_names([s.name for _, s in rows])
+                conflicts = [
+                    (row, s) for row, s in rows if s.name.casefold() in existing
+                ]
+                if conflicts and on_conflict == "error":
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=[
+                            RowError(
+                                row=row, detail=f"Series '{s.name}' already exists"
+                            ).model_dump()
+                            for row, s in conflicts
+                        ],
+                    )
+
+                new = [s for _, s in rows if s.name.casefold() not in existing]
+                self.db.insert_many_series(new)
+                ids = self.db.select_ids_by_names([s.name for s in new])
+                result.created = [ids[s.name.casefold()] for s in new]
+                events = [(ids[s.name.casefold()], e) for s in new for e in s.events]
+
+                if on_conflict == "upsert":
+                    updated = [(existing[s.name.casefold()], s) for _, s in conflicts]
+                    self.db.delete_events_by_series_ids([id for id, _ in updated])
+                    for series_id, series in updated:
+                        self.db.update_series_description(series_id, series.description)
+                        events += [(series_id, e) for e in series.events]
+                    result.updated = [id for id, _ in updated]
+                else:
+                    result.skipped = [s.name for _, s in conflicts]
+
+                self.db.insert_many_events(events)
+                self.db.record_changes([Change("events", id) for id in result.created])
+        except IntegrityError as e:
+            # e.g. a series with one of the names was created while the import ran
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Import conflicts with existing data; nothing was imported.\n{e}",
+            )
+        return result
+
     def add_series_poster(self, series_id: int, poster: UploadFile) -> EventSeries:
         """
         Updates the poster image for an EventSeries object and returns the updated object.
@@ -114,7 +319,7 @@ class EventController(BaseController):
         series = self.get_one_series_by_id(series_id)
         series.poster_id = self._upload_poster(poster)
         self.db.update_series_poster(series)
-        return self.get_one_series_by_id(series.series_id)
+        return series
 
     def _upload_poster(self, poster: UploadFile) -> str:
         """
@@ -143,6 +348,45 @@ class EventController(BaseController):
         series = self.get_one_series_by_id(id)
         self.db.delete_one_series(series)
 
+    def patch_series(self, series_id: int, patch: SeriesPatch) -> EventSeries:
+        """
+        Applies a merge patch to a series, with one UPDATE for the series fields and one for each patched event.
+        Everything is applied in one transaction, together with the read of the patched series.
+
+        :param int series_id: The numeric ID of the series
+        :param SeriesPatch patch: The fields to change
+        :raises HTTPException: If the series, or a patched event of it, is not found (status code 404)
+        :raises HTTPException: If the new name already exists (status code 400)
+        :return EventSeries: The patched EventSeries object which is suitable for a response body
+        """
+        fields = patch.model_dump(include=patch.model_fields_set - {"events"})
+        events = patch.events or []
+        try:
+            with self.db.transaction():
+                if fields:
+                    self.db.update_series_fields(series_id, fields)
+                for event in events:
+                    if event_fields := event.model_dump(
+                        include=event.model_fields_set - {"event_id"}
+                    ):
+                        self.db.update_event_fields(
+                            series_id, event.event_id, event_fields
+                        )
+                series = self.get_one_series_by_id(series_id)
+                if missing := {e.event_id for e in events}.difference(
+                    e.event_id for e in series.events
+                ):
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Events {sorted(missing)} not found in series {series_id}",
+                    )
+        except IntegrityError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Series name already exists. Each series must have a unique name.\n{e}",
+            )
+        return series
+
     def update_series(self, route_id: int, series: EventSeries) -> EventSeries:
         """
         Updates an EventSeries object in the database and returns the updated object.
@@ -164,8 +408,42 @@ class EventController(BaseController):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Poster ID cannot be updated directly. Use the /poster endpoint instead.",
             )
-        self.db.delete_events_by_series(series)
-        self.db.replace_series(series)
-        for event in series.events:
-            self.db.insert_one_event(event, series.series_id)
-        return self.get_one_series_by_id(series.series_id)
+        with self.db.transaction():
+            self.db.delete_events_by_series(series)
+            self.db.replace_series(series)
+            event_ids = [
+                self.db.insert_one_event(event, series.series_id)
+                for event in series.events
+            ]
+        return self._written_series(
+            series.series_id, series, event_ids, series.poster_id
+        )
+
+    @staticmethod
+    def _written_series(
+        series_id: int,
+        series: NewEventSeries,
+        event_ids: list[int],
+        poster_id: str | None = None,
+    ) -> EventSeries:
+        """
+        Builds the response for a series which was just written from what was written and the generated IDs,
+        instead of reading it back. Must only be used internally.
+
+        :param int series_id: The ID of the series
+        :param NewEventSeries series: The series as written
+        :param list[int] event_ids: The generated ID of each of its events, in order
+        :param str | None poster_id: The poster of the series, defaults to None
+        :return EventSeries: The series as `get_one_series_by_id` would return it, with events ordered by time
+        """
+        events = [
+            Event(**event.model_dump(exclude={"event_id"}), event_id=event_id)
+            for event, event_id in zip(series.events, event_ids)
+        ]
+        return EventSeries(
+            series_id=series_id,
+            name=series.name,
+            description=series.description,
+            poster_id=poster_id,
+            events=sorted(events, key=attrgetter("time")),
+        )
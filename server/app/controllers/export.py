@@ -0,0 +1,142 @@
+import json
+import os
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Iterator
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+
+from app.compression import brotli_bytes, gzip_bytes
+from app.controllers.base_controller import BaseController
+from app.controllers.events import EventController
+from app.controllers.group import GroupController
+from app.controllers.musicians import MusicianController
+from app.controllers.snapshot import SnapshotController
+from app.models.event import EventSeries
+from app.models.musician import Musician
+from app.scripts.version import get_version
+
+load_dotenv()
+
+MANIFEST = "manifest.json"
+
+
+class StaticExporter(BaseController):
+    """
+    Renders every public GET endpoint to JSON files, each alongside gzip and brotli
+    precompressed copies, so reads can be served entirely by a static host or CDN.
+
+    The route `/musicians/1` is written to `musicians/1/index.json` (plus `.gz` and `.br`),
+    and `manifest.json` maps every route to its file and the SHA-256 of its body.
+    """
+
+    def __init__(
+        self,
+        musician_controller: MusicianController,
+        event_controller: EventController,
+        group_controller: GroupController,
+        snapshot_controller: SnapshotController,
+        path: str | None = os.getenv("EXPORT_DIR"),
+    ) -> None:
+        """
+        :param MusicianController musician_controller: used to load musicians
+        :param EventController event_controller: used to load event series
+        :param GroupController group_controller: used to load the group
+        :param SnapshotController snapshot_controller: used to load the body of GET /
+        :param str | None path: directory to export to, defaults to EXPORT_DIR; when set, the API re-exports after every write
+        """
+        super().__init__()
+        self.musician_controller = musician_controller
+        self.event_controller = event_controller
+        self.group_controller = group_controller
+        self.snapshot_controller = snapshot_controller
+        self.path = Path(path) if path else None
+
+    def routes(self) -> Iterator[tuple[str, bytes]]:
+        """
+        Renders each public route.
+
+        :yield tuple[str, bytes]: The route and its JSON body
+        """
+        yield "/", self.snapshot_controller.get_root()
+        yield "/group/", self.group_controller.get_group().model_dump_json().encode()
+
+        musicians = self.musician_controller.get_musicians()
+        yield "/musicians/", TypeAdapter(list[Musician]).dump_json(musicians)
+        for musician in musicians:
+            yield f"/musicians/{musician.id}", musician.model_dump_json().encode()
+
+        series = self.event_controller.get_all_series()
+        yield "/events/", TypeAdapter(list[EventSeries]).dump_json(series)
+        for s in series:
+            yield f"/events/{s.series_id}", s.model_dump_json().encode()
+
+    def export(self, out_dir: str | Path | None = None) -> dict:
+        """
+        Writes all routes and the manifest. Files whose body hash is unchanged are left untouched,
+        and files of routes which no longer exist (e.g. deleted series) are removed.
+
+        :param str | Path | None out_dir: The directory to export to, defaults to the configured path
+        :raises ValueError: If no directory is given or configured
+        :return dict: The manifest
+        """
+        root = Path(out_dir) if out_dir is not None else self.path
+        if root is None:
+            raise ValueError("No export directory given and EXPORT_DIR is not set")
+        root.mkdir(parents=True, exist_ok=True)
+        previous = self._load_manifest(root)
+
+        files: dict[str, dict] = {}
+        for route, body in self.routes():
+            digest = sha256(body).hexdigest()
+            file = self.file_for(route)
+            old = previous.get(route)
+            if old is None or old["sha256"] != digest or not (root / file).exists():
+                self._write(root / file, body)
+                self._write(root / f"{file}.gz", gzip_bytes(body))
+                self._write(root / f"{file}.br", brotli_bytes(body))
+            files[route] = {"file": file, "sha256": digest, "bytes": len(body)}
+
+        for route in previous.keys() - files.keys():
+            for suffix in ("", ".gz", ".br"):
+                (root / f"{previous[route]['file']}{suffix}").unlink(missing_ok=True)
+
+        manifest = {
+            "version": get_version(),
+            "generated_at": datetime.now().isoformat(),
+            "routes": files,
+        }
+        # written last, so a reader of the manifest never sees routes which do not exist yet
+        self._write(root / MANIFEST, json.dumps(manifest, indent=2).encode())
+        return manifest
+
+    @staticmethod
+    def file_for(route: str) -> str:
+        """
+        :param str route: An API route, e.g. `/musicians/1`
+        :return str: The file the route is exported to, relative to the export directory
+        """
+        return "/".join(filter(None, [route.strip("/"), "index.json"]))
+
+    def _load_manifest(self, root: Path) -> dict[str, dict]:
+        try:
+            return json.loads((root / MANIFEST).read_bytes())["routes"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return {}
+
+    def _write(self, path: Path, data: bytes) -> None:
+        """
+        Replaces a file atomically, so the static host never serves a partial body.
+
+        :param Path path: The file to write
+        :param bytes data: Its contents
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            f.write(data)
+        # temporary files are private, but these are served publicly
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from typing import Sequence
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from app.db.columns import project
+
+# top-level sections of TheGrapefruitsDuo which GET / can include
+ROOT_SECTIONS = ("group", "musicians", "events")
+
+
+def split_csv(value: str | None) -> tuple[str, ...] | None:
+    """
+    :param str | None value: A comma-separated query parameter
+    :return tuple[str, ...] | None: The non-empty items, or None if the parameter was not given
+    """
+    if value is None:
+        return None
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def group_fields(fields: Sequence[str]) -> dict[str, tuple[str, ...]]:
+    """
+    Groups dotted field names by their first segment; undotted names are grouped under "".
+    e.g. ("name", "events.time") -> {"": ("name",), "events": ("time",)}
+
+    :param Sequence[str] fields: The requested field names
+    :return dict[str, tuple[str, ...]]: The remainder of each name, by first segment
+    """
+    grouped: dict[str, list[str]] = defaultdict(list)
+    for field in fields:
+        head, dot, rest = field.partition(".")
+        if dot:
+            grouped[head].append(rest)
+        else:
+            grouped[""].append(head)
+    return {k: tuple(v) for k, v in grouped.items()}
+
+
+def parse_include(include: str | None) -> tuple[str, ...]:
+    """
+    :param str | None include: The `include` query parameter of GET /
+    :raises HTTPException: If an unknown section is requested (status code 400)
+    :return tuple[str, ...]: The sections to include, defaults to all of them
+    """
+    sections = split_csv(include)
+    if sections is None:
+        return ROOT_SECTIONS
+    if unknown := set(sections).difference(ROOT_SECTIONS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sections {sorted(unknown)}; expected any of {list(ROOT_SECTIONS)}",
+        )
+    return tuple(s for s in ROOT_SECTIONS if s in sections)
+
+
+def columns_for(
+    model: type[BaseModel], fields: Sequence[str] | None, key: str
+) -> tuple[str, ...] | None:
+    """
+    Validates a sparse fieldset against a model's columns and adds the model's key column,
+    which is always returned.
+
+    :param type[BaseModel] model: The model the fields belong to
+    :param Sequence[str] | None fields: The requested fields, or None for all of them
+    :param str key: The key column of the model
+    :raises HTTPException: If a field is not a column of the model (status code 400)
+    :return tuple[str, ...] | None: The columns to select, or None for all of them
+    """
+    if fields is None:
+        return None
+    try:
+        return project(model, (key, *fields))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def series_fields(
+    fields: Sequence[str] | None,
+) -> tuple[tuple[str, ...] | None, tuple[str, ...] | None]:
+    """
+    Splits an EventSeries fieldset into series fields and event fields. `events` selects every
+    event field, `events.<field>` selects single ones, and with neither no events are loaded at all.
+
+    :param Sequence[str] | None fields: The requested fields, or None for all of them
+    :return tuple: The series fields and the event fields (None: all of them, (): none)
+    """
+    if fields is None:
+        return None, None
+    grouped = group_fields(fields)
+    top = grouped.get("", ())
+    series = tuple(f for f in top if f != "events")
+    if "events" in top:
+        return series, None
+    return series, grouped.get("events", ())
@@ -1,6 +1,9 @@
+from typing import Sequence
+
 from fastapi import HTTPException, status
 
 from app.controllers.base_controller import BaseController
+from app.controllers.fieldsets import columns_for
 from app.db import group_queries
 from app.db.group import GroupQueries
 from app.models.group import Group
@@ -34,21 +37,35 @@ class GroupController(BaseController):
                 status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
             )
         try:
-            return Group(**data)
+            return Group.model_validate(data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error creating group object: {e}",
             )
 
-    def update_group_bio(self, bio: str) -> Group:
+    def get_sparse_group(self, columns: Sequence[str]) -> dict:
+        """
+        Retrieves only the selected fields of the group, querying only their columns.
+        `id` is always included.
+
+        :param Sequence[str] columns: The fields to retrieve
+        :raises HTTPException: If a requested field does not exist (status code 400)
+        :return dict: The partial group
+        """
+        columns = columns_for(Group, columns, "id")
+        return dict(self.group_queries.select_one_by_id(columns))
+
+    def update_group_bio(self, bio: str, group: Group | None = None) -> Group:
         """
         Updates the group's bio in the database and returns the updated Group object.
 
         :param str bio: The new bio for the group
+        :param Group | None group: The group as stored, if the caller already has it, defaults to reading it
         :raises HTTPException: If any error occurs during the update process (status code 500)
         :return Group: The updated Group object which is suitable for a response body
         """
+        group = group or self.get_group()
         try:
             self.group_queries.update_group_bio(bio)
         except Exception as e:
@@ -56,9 +73,20 @@ class GroupController(BaseController):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error updating group bio: {e}",
             )
-        return self.get_group()
+        return group.model_copy(update={"bio": bio})
 
-    def update_livestream(self, livestream_id: str) -> Group:
+    def update_livestream(
+        self, livestream_id: str, group: Group | None = None
+    ) -> Group:
+        """
+        Updates the group's livestream in the database and returns the updated Group object.
+
+        :param str livestream_id: The new livestream ID, or "" for none
+        :param Group | None group: The group as stored, if the caller already has it, defaults to reading it
+        :raises HTTPException: If any error occurs during the update process (status code 500)
+        :return Group: The updated Group object which is suitable for a response body
+        """
+        group = group or self.get_group()
         try:
             self.group_queries.update_livestream(livestream_id)
         except Exception as e:
@@ -66,4 +94,4 @@ class GroupController(BaseController):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error updating livestram: {e}",
             )
-        return self.get_group()
+        return group.model_copy(update={"livestream_id": livestream_id})
@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from app.models.event import NewEvent, NewEventSeries
+from app.models.imports import RowError
+
+# columns of a CSV import; each line is one event, and lines with the same name form one series
+CSV_COLUMNS = ("name", "description", "location", "time", "map_url", "ticket_url")
+
+ImportRows = list[tuple[int, NewEventSeries]]
+
+
+def parse_import(content_type: str, body: bytes) -> ImportRows:
+    """
+    Parses and validates a whole bulk import before anything is written.
+
+    :param str content_type: The request's Content-Type; `text/csv` or `application/json`
+    :param bytes body: The request body
+    :raises HTTPException: If the body is not a JSON array or a CSV file with a header (status code 400)
+    :raises HTTPException: If the content type is not supported (status code 415)
+    :raises HTTPException: If any row is invalid, with every row error as the detail (status code 422)
+    :return ImportRows: Each series with the row it starts at
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/csv":
+        try:
+            rows, errors = parse_csv(body.decode("utf-8-sig"))
+        except UnicodeDecodeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"CSV must be UTF-8: {e}",
+            )
+    elif media_type == "application/json":
+        rows, errors = parse_json(body)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send a JSON array (application/json) or a CSV file (text/csv)",
+        )
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[e.model_dump() for e in errors],
+        )
+    return rows
+
+
+def parse_json(body: bytes) -> tuple[ImportRows, list[RowError]]:
+    """
+    :param bytes body: A JSON array of NewEventSeries objects
+    :raises HTTPException: If the body is not a JSON array (status code 400)
+    :return tuple[ImportRows, list[RowError]]: The valid series, and an error for each invalid one
+    """
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {e}"
+        )
+    if not isinstance(data, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of series",
+        )
+    rows: ImportRows = []
+    errors: list[RowError] = []
+    seen: set[str] = set()
+    for i, item in enumerate(data, start=1):
+        try:
+            series = NewEventSeries.model_validate(item)
+        except ValidationError as e:
+            errors.append(RowError(row=i, detail=_describe(e)))
+            continue
+        if series.name.casefold() in seen:
+            errors.append(RowError(row=i, detail=f"Duplicate series '{series.name}'"))
+            continue
+        seen.add(series.name.casefold())
+        rows.append((i, series))
+    return rows, errors
+
+
+def parse_csv(text: str) -> tuple[ImportRows, list[RowError]]:
+    """
+    Parses a CSV file with the columns in CSV_COLUMNS. A series' description is taken from its first line,
+    and a line with neither location nor time adds a series without adding an event.
+
+    :param str text: The CSV file
+    :raises HTTPException: If the header lacks the name or description column (status code 400)
+    :return tuple[ImportRows, list[RowError]]: The valid series, and an error for each invalid line
+    """
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    if missing := {"name", "description"}.difference(reader.fieldnames or ()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV is missing the columns {sorted(missing)}; expected {list(CSV_COLUMNS)}",
+        )
+    series: dict[str, tuple[int, NewEventSeries]] = {}
+    errors: list[RowError] = []
+    for record in reader:
+        line = reader.line_num
+        values = {k: (v or "").strip() for k, v in record.items() if k in CSV_COLUMNS}
+        if not values.get("name"):
+            errors.append(RowError(row=line, detail="Missing series name"))
+            continue
+        key = values["name"].casefold()
+        if key not in series:
+            try:
+                new = NewEventSeries(
+                    name=values["name"], description=values["description"], events=[]
+                )
+            except ValidationError as e:
+                errors.append(RowError(row=line, detail=_describe(e)))
+                continue
+            series[key] = (line, new)
+        if values.get("location") or values.get("time"):
+            if not values.get("location"):
+                errors.append(RowError(row=line, detail="Missing event location"))
+                continue
+            try:
+                event = NewEvent(
+                    location=values["location"],
+                    time=values.get("time", ""),  # type: ignore
+                    map_url=values.get("map_url") or None,  # type: ignore
+                    ticket_url=values.get("ticket_url") or None,  # type: ignore
+                )
+            except ValidationError as e:
+                errors.append(RowError(row=line, detail=_describe(e)))
+                continue
+            series[key][1].events.append(event)
+    return list(series.values()), errors
+
+
+def _describe(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}"
+        for err in e.errors()
+    )
@@ -1,10 +1,11 @@
-from typing import Optional
+from typing import Optional, Sequence
 
 from fastapi import HTTPException, UploadFile, status
 from icecream import ic
 
 from app.admin.images import uploader
 from app.controllers.base_controller import BaseController
+from app.controllers.fieldsets import columns_for
 from app.db import musician_queries
 from app.db.musicians import MusicianQueries
 from app.models.musician import Musician
@@ -34,13 +35,25 @@ class MusicianController(BaseController):
         """
         data = self.db.select_all()
         try:
-            return [Musician(**m) for m in data]
+            return [Musician.model_validate(m) for m in data]
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error creating musician objects: {e}",
             )
 
+    def get_sparse_musicians(self, columns: Sequence[str]) -> list[dict]:
+        """
+        Retrieves only the selected fields of all musicians, querying only their columns.
+        `id` is always included.
+
+        :param Sequence[str] columns: The fields to retrieve
+        :raises HTTPException: If a requested field does not exist (status code 400)
+        :return list[dict]: The partial musicians
+        """
+        columns = columns_for(Musician, columns, "id")
+        return [dict(m) for m in self.db.select_all(columns)]
+
     def get_musician(self, musician_id: int) -> Musician:
         """
         Retrieves a single musician by numeric ID.
@@ -55,7 +68,7 @@ class MusicianController(BaseController):
                 status_code=status.HTTP_404_NOT_FOUND, detail="Musician not found"
             )
         try:
-            return Musician(**data)
+            return Musician.model_validate(data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -106,7 +119,7 @@ class MusicianController(BaseController):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error updating musician headshot: {e}",
             )
-        return self.get_musician(musician.id)
+        return musician.model_copy(update={"headshot_id": headshot_id})
 
     def _update_musician_bio(self, musician: Musician, bio: str) -> Musician:
         """
@@ -124,7 +137,7 @@ class MusicianController(BaseController):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error updating musician bio: {e}",
             )
-        return self.get_musician(musician.id)
+        return musician.model_copy(update={"bio": bio})
 
     def _upload_headshot(self, musician: Musician, file: UploadFile) -> Musician:
         """
@@ -143,6 +156,4 @@ class MusicianController(BaseController):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to upload image",
             )
-        self._update_musician_headshot(musician, public_id)
-
-        return self.get_musician(musician.id)
+        return self._update_musician_headshot(musician, public_id)
@@ -0,0 +1,38 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from fastapi import HTTPException, status
+
+# bump when the cursor payload changes so old cursors are rejected instead of misread
+CURSOR_VERSION = "v1"
+
+
+def encode_cursor(series_id: int) -> str:
+    """
+    Encodes the last series ID of a page as an opaque cursor for the next page.
+
+    :param int series_id: The ID of the last series on the current page
+    :return str: A URL-safe cursor string
+    """
+    payload = f"{CURSOR_VERSION}:{series_id}".encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    :param str cursor: The cursor from the `after` query parameter
+    :raises HTTPException: If the cursor is malformed (status code 400)
+    :return int: The series ID the next page starts after
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, series_id = urlsafe_b64decode(padded).decode().split(":")
+        if version != CURSOR_VERSION:
+            raise ValueError(f"unsupported cursor version {version}")
+        return int(series_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid pagination cursor: {e}",
+        )
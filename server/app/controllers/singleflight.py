@@ -0,0 +1,94 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Any, Callable, Hashable
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+load_dotenv()
+
+# seconds callers wait on another caller's in-flight read before giving up on it, 0 to wait indefinitely
+DEFAULT_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "0"))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads: the first caller for a key (the leader) runs the
+    blocking function in a worker thread, and every caller arriving while it is in flight awaits
+    the same result (or exception) instead of issuing its own queries.
+
+    Nothing is kept once a flight lands, so this only dedupes work that is already happening;
+    it is not a cache.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_FLIGHT_TIMEOUT) -> None:
+        """
+        :param float timeout: Default seconds to wait on another caller's flight, 0 to wait indefinitely
+        """
+        self.timeout = timeout
+        self._flights: dict[Hashable, asyncio.Future] = {}
+        # keyed by the first element of the flight key, i.e. the name of the read
+        self.leaders: Counter[str] = Counter()
+        self.coalesced: Counter[str] = Counter()
+        self.timeouts: Counter[str] = Counter()
+
+    async def do(
+        self,
+        key: tuple,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Runs `fn(*args)` unless a call with the same key is already in flight, and returns its result.
+
+        :param tuple key: Identifies the read; its first element names it in the metrics
+        :param Callable[..., Any] fn: The blocking function to run
+        :param float | None timeout: Seconds to wait for another caller's flight, defaults to the instance
+            timeout; the leader always waits for its own
+        :raises HTTPException: If another caller's flight takes longer than the timeout (status code 504)
+        :return Any: The result of `fn`
+        """
+        name = str(key[0])
+        flight = self._flights.get(key)
+        if flight is None:
+            self.leaders[name] += 1
+            flight = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda f: self._land(key, f))
+            # shielded so the leader's request being cancelled does not cancel the flight for the others
+            return await asyncio.shield(flight)
+        self.coalesced[name] += 1
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # shielded so one caller timing out does not cancel the flight for the others
+            return await asyncio.wait_for(asyncio.shield(flight), timeout or None)
+        except asyncio.TimeoutError:
+            self.timeouts[name] += 1
+            # later callers start a fresh flight rather than queueing behind a stuck one
+            self._land(key, flight)
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"Timed out waiting for {name}",
+            )
+
+    def _land(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.done() and not flight.cancelled():
+            flight.exception()  # mark retrieved, since a flight may land with no one awaiting it
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        :return dict[str, dict[str, int]]: Leader, coalesced and timed out caller counts per read
+        """
+        return {
+            name: {
+                "leaders": self.leaders[name],
+                "coalesced": self.coalesced[name],
+                "timeouts": self.timeouts[name],
+            }
+            for name in self.leaders
+        }
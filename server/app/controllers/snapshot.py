@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from dotenv import load_dotenv
+
+from app.constants import ROOT_SNAPSHOT
+from app.controllers.base_controller import BaseController
+from app.controllers.events import EventController
+from app.controllers.group import GroupController
+from app.controllers.musicians import MusicianController
+from app.db import snapshot_queries
+from app.db.snapshots import SnapshotQueries
+from app.models.snapshot import Snapshot
+from app.models.tgd import TheGrapefruitsDuo
+from app.scripts.version import get_version
+
+load_dotenv()
+
+
+class SnapshotController(BaseController):
+    """
+    Materializes the public site data (group, musicians and every series with its events)
+    into one pre-serialized body whenever it changes, so GET / never reassembles it.
+    Snapshots are stored in the snapshots table, and also in a local file when SNAPSHOT_PATH is set,
+    so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        musician_controller: MusicianController,
+        event_controller: EventController,
+        group_controller: GroupController,
+        snapshot_queries: SnapshotQueries = snapshot_queries,
+        path: str | None = os.getenv("SNAPSHOT_PATH"),
+    ) -> None:
+        """
+        :param MusicianController musician_controller: used to load musicians
+        :param EventController event_controller: used to load event series
+        :param GroupController group_controller: used to load the group
+        :param SnapshotQueries snapshot_queries: object for storing snapshots, defaults to snapshot_queries
+        :param str | None path: file the snapshot is also written to, defaults to SNAPSHOT_PATH (unset: database only)
+        """
+        super().__init__()
+        self.musician_controller = musician_controller
+        self.event_controller = event_controller
+        self.group_controller = group_controller
+        self.db: SnapshotQueries = snapshot_queries
+        self.path = Path(path) if path else None
+
+    def build(self) -> bytes:
+        """
+        Queries all public data, serializes it once and stores the result,
+        unless a concurrent rebuild has already stored a snapshot of newer data.
+
+        :return bytes: The JSON body for GET /
+        """
+        try:
+            version = self.db.select_data_version()
+        except Exception as e:
+            # e.g. if the change tracking migration has not been applied
+            self.log_error(e)
+            version = 0
+        root = TheGrapefruitsDuo(
+            version=get_version(),
+            group=self.group_controller.get_group(),
+            musicians=self.musician_controller.get_musicians(),
+            events=self.event_controller.get_all_series(),
+        )
+        body = root.model_dump_json().encode()
+        snapshot = Snapshot(
+            name=ROOT_SNAPSHOT,
+            body=body.decode(),
+            created_at=datetime.now(),
+            version=version,
+        )
+        try:
+            stored = self.db.replace(snapshot)
+        except Exception as e:
+            # still serve the fresh body, e.g. if the snapshots migration has not been applied
+            self.log_error(e)
+            stored = True
+        if stored and self.path is not None:
+            self._write_file(body)
+        return body
+
+    def get_root(self) -> bytes:
+        """
+        Returns the latest snapshot with one file read or one primary key lookup.
+        The snapshot is rebuilt only if none exists yet or it was built by a different app version.
+
+        :return bytes: The JSON body for GET /
+        """
+        if self.path is not None and self.path.exists():
+            body = self.path.read_bytes()
+            if self._is_current(body):
+                return body
+        try:
+            data = self.db.select_one_by_name(ROOT_SNAPSHOT)
+        except Exception as e:
+            self.log_error(e)
+            data = None
+        if data is not None:
+            body = Snapshot.model_validate(data).body.encode()
+            if self._is_current(body):
+                return body
+        return self.build()
+
+    def _is_current(self, body: bytes) -> bool:
+        # `version` is the first field of TheGrapefruitsDuo, so it leads the serialized body
+        return body.startswith(f'{{"version":"{get_version()}"'.encode())
+
+    def _write_file(self, body: bytes) -> None:
+        """
+        Replaces the snapshot file atomically, so readers never see a partial body.
+
+        :param bytes body: The serialized snapshot
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)  # type: ignore
+        with NamedTemporaryFile(dir=self.path.parent, delete=False) as f:  # type: ignore
+            f.write(body)
+        os.replace(f.name, self.path)  # type: ignore
@@ -32,7 +32,7 @@ class UserController(BaseController):
         """
         data = self.db.select_all()
         try:
-            return [User(**e) for e in data]
+            return [User.model_validate(e) for e in data]
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -53,7 +53,7 @@ class UserController(BaseController):
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
         try:
-            return User(**data)
+            return User.model_validate(data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -74,7 +74,7 @@ class UserController(BaseController):
                 status_code=status.HTTP_404_NOT_FOUND, detail="User does not exist"
             )
         try:
-            return User(**data)
+            return User.model_validate(data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -95,7 +95,7 @@ class UserController(BaseController):
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
         try:
-            return User(**data)
+            return User.model_validate(data)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
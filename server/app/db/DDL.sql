@@ -9,6 +9,10 @@ CREATE TABLE `group_table` (
   `id` int(11) NOT NULL AUTO_INCREMENT,
   `name` varchar(255) NOT NULL,
   `bio` text NOT NULL,
+  `livestream_id` varchar(255) NOT NULL DEFAULT '',
+  `livestream_program_cld_id` varchar(255) DEFAULT NULL,
+  `row_version` int(11) NOT NULL DEFAULT 1,
+  `updated_at` datetime DEFAULT NULL,
   PRIMARY KEY (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
@@ -20,6 +24,8 @@ CREATE TABLE `musicians` (
   `name` varchar(255) NOT NULL,
   `bio` text NOT NULL,
   `headshot_id` varchar(255) NOT NULL,
+  `row_version` int(11) NOT NULL DEFAULT 1,
+  `updated_at` datetime DEFAULT NULL,
   PRIMARY KEY (`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
@@ -31,6 +37,8 @@ CREATE TABLE `series` (
   `name` varchar(255) NOT NULL,
   `description` text NOT NULL,
   `poster_id` varchar(255) DEFAULT NULL,
+  `row_version` int(11) NOT NULL DEFAULT 1,
+  `updated_at` datetime DEFAULT NULL,
   PRIMARY KEY (`series_id`),
   UNIQUE KEY `name` (`name`)
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
@@ -43,7 +51,9 @@ CREATE TABLE `users` (
   `name` varchar(255) NOT NULL,
   `email` varchar(255) NOT NULL,
   `sub` varchar(255) DEFAULT NULL,
-  PRIMARY KEY (`id`)
+  PRIMARY KEY (`id`),
+  KEY `users_sub` (`sub`),
+  KEY `users_email` (`email`)
 ) ENGINE=InnoDB AUTO_INCREMENT=6 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
 
@@ -56,7 +66,44 @@ CREATE TABLE `events` (
   `time` datetime NOT NULL,
   `ticket_url` varchar(255) DEFAULT NULL,
   `map_url` varchar(255) DEFAULT NULL,
+  `row_version` int(11) NOT NULL DEFAULT 1,
+  `updated_at` datetime DEFAULT NULL,
   PRIMARY KEY (`event_id`),
   KEY `series_id` (`series_id`),
+  KEY `events_time` (`time`),
+  KEY `events_series_time` (`series_id`,`time`),
   CONSTRAINT `events_ibfk_1` FOREIGN KEY (`series_id`) REFERENCES `series` (`series_id`) ON DELETE CASCADE
-) ENGINE=InnoDB AUTO_INCREMENT=4 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
\ No newline at end of file
+) ENGINE=InnoDB AUTO_INCREMENT=4 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+
+-- thegrapefruitsduo.schema_migrations definition
+
+CREATE TABLE `schema_migrations` (
+  `version` int(11) NOT NULL,
+  `name` varchar(255) NOT NULL,
+  `applied_at` datetime NOT NULL,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+
+-- thegrapefruitsduo.snapshots definition
+
+CREATE TABLE `snapshots` (
+  `name` varchar(64) NOT NULL,
+  `body` longtext NOT NULL,
+  `created_at` datetime NOT NULL,
+  `version` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+
+-- thegrapefruitsduo.change_log definition
+
+CREATE TABLE `change_log` (
+  `version` int(11) NOT NULL AUTO_INCREMENT,
+  `entity` varchar(32) NOT NULL,
+  `entity_id` int(11) NOT NULL,
+  `op` varchar(8) NOT NULL,
+  `changed_at` datetime NOT NULL,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
\ No newline at end of file
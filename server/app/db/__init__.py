@@ -1,9 +1,13 @@
+from .changes import ChangeQueries
 from .events import EventQueries
 from .group import GroupQueries
 from .musicians import MusicianQueries
+from .snapshots import SnapshotQueries
 from .users import UserQueries
 
 event_queries = EventQueries()
 user_queries = UserQueries()
 musician_queries = MusicianQueries()
 group_queries = GroupQueries()
+snapshot_queries = SnapshotQueries()
+change_queries = ChangeQueries()
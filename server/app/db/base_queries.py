@@ -1,10 +1,53 @@
-from typing import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Hashable, Iterator, NamedTuple, Sequence
 
 from icecream import ic
 from mysql.connector.connection import MySQLConnection
 from mysql.connector.cursor import MySQLCursor
+from pydantic import BaseModel
 
-from app.db.conn import connect_db
+from app.constants import CHANGE_LOG_TABLE
+from app.db.cache import QueryCache, cache_from_env
+from app.db.columns import project, select_list
+from app.db.conn import connect_db, routes_to_replica
+from app.db.routing import read_from_primary, record_write
+from app.db.rows import Row, RowMapper
+from app.metrics import (
+    DB_CONNECTIONS_OPEN,
+    DB_CONNECTIONS_OPENED,
+    DB_QUERY_SECONDS,
+    registry,
+    timed_methods,
+)
+
+
+class Change(NamedTuple):
+    """
+    A change log entry recorded alongside a write.
+    `entity_id` may be None for inserts, in which case the inserted row's ID is used.
+    """
+
+    entity: str
+    entity_id: int | None
+    op: str = "upsert"
+
+
+class Transaction:
+    """
+    An open transaction on the primary, shared by every query class while it is active.
+    """
+
+    def __init__(self, cursor: MySQLCursor, conn: MySQLConnection) -> None:
+        self.cursor = cursor
+        self.conn = conn
+        # bumped in the query cache once the transaction ends
+        self.tables: set[str] = set()
+
+
+# the transaction of the current request or thread, if any
+_transaction: ContextVar[Transaction | None] = ContextVar("transaction", default=None)
 
 
 class BaseQueries:
@@ -12,44 +55,405 @@ class BaseQueries:
     Base class for all query classes.
     This class provides a connection to the database.
 
-    Should not be used directly; instead, inherit from this class and provide the table name.
+    Should not be used directly; instead, inherit from this class and provide the table name
+    and the model its rows are loaded into. Selected columns are derived from that model.
     """
 
+    # column names of each query, compiled once per distinct query and shared by all query classes
+    _mappers: dict[str, RowMapper] = {}
+    # rows pulled from the server per round trip when streaming a result set
+    STREAM_BATCH_SIZE = 500
+    # opt-in result cache shared by all query classes, invalidated by table version
+    query_cache: QueryCache = cache_from_env()
+    # streamed results larger than this are never cached
+    MAX_CACHED_STREAM_ROWS = 10_000
+
     def __init__(self) -> None:
         self.table: str = None  # type: ignore
-        self.connect_db: Callable[[], MySQLConnection] = connect_db
+        self.model: type[BaseModel] = None  # type: ignore
+        self.connect_db: Callable[..., MySQLConnection] = connect_db
 
-    def select_all(self) -> list[dict]:
+    def __init_subclass__(cls, **kwargs) -> None:
+        """
+        Times every query method a subclass defines, labelled `Class.method`,
+        as the `db` phase of the request's Server-Timing header.
+        """
+        super().__init_subclass__(**kwargs)
+        timed_methods(
+            cls,
+            DB_QUERY_SECONDS,
+            [
+                name
+                for name, attr in vars(cls).items()
+                if callable(attr)
+                and not name.startswith("_")
+                and name != "select_columns"
+            ],
+            phase="db",
+        )
+
+    def select_all(self, columns: Sequence[str] | None = None) -> list[Row]:
         query = f"""-- sql
-            SELECT * FROM {self.table}
+            SELECT {self.select_columns(columns)} FROM {self.table}
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query)
-        data: list[dict] = cursor.fetchall()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
+        return self.select_rows(query)
+
+    def select_one_by_id(
+        self, id: int, columns: Sequence[str] | None = None
+    ) -> Row | None:
+        query = f"""-- sql
+            SELECT {self.select_columns(columns)} FROM {self.table} WHERE id = %s
+            """
+        return self.select_row(query, (id,))
 
-        fake_query = f"""-- sql
-            select * from dogs
+    def select_rows(
+        self,
+        query: str,
+        params: Sequence = (),
+        tables: Sequence[str] | None = None,
+    ) -> list[Row]:
         """
+        Runs a SELECT and returns all of its rows, from the query cache when possible.
 
+        :param str query: The SQL text to execute
+        :param Sequence params: The query parameters, defaults to ()
+        :param Sequence[str] | None tables: Every table the query reads, defaults to this class's table
+        :return list[Row]: The rows
+        """
+        if (tx := _transaction.get()) is not None:
+            # uncommitted writes are only visible on the transaction's connection, and must not be cached
+            tx.cursor.execute(query, params)
+            return self.fetch_all(tx.cursor, query)
+        key, found, rows = self._cache_lookup(query, params, tables)
+        if found:
+            return list(rows)
+        cursor, conn = self.get_cursor_and_conn(read_only=True)
+        try:
+            cursor.execute(query, params)
+            data = self.fetch_all(cursor, query)
+        finally:
+            self.close_cursor_and_conn(cursor, conn)
+        if key is not None:
+            self.query_cache.put(key, tuple(data))
         return data
 
-    def select_one_by_id(self, id: int) -> dict | None:
-        query = f"""-- sql
-            SELECT * FROM {self.table} WHERE id = %s
-            """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (id,))
-        data: dict | None = cursor.fetchone()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
+    def select_row(
+        self,
+        query: str,
+        params: Sequence = (),
+        tables: Sequence[str] | None = None,
+    ) -> Row | None:
+        """
+        Runs a SELECT and returns its first row, from the query cache when possible.
 
+        :param str query: The SQL text to execute
+        :param Sequence params: The query parameters, defaults to ()
+        :param Sequence[str] | None tables: Every table the query reads, defaults to this class's table
+        :return Row | None: The first row, or None if there are no rows
+        """
+        if _transaction.get() is not None:
+            return next(iter(self.select_rows(query, params, tables)), None)
+        key, found, row = self._cache_lookup(query, params, tables)
+        if found:
+            return row
+        cursor, conn = self.get_cursor_and_conn(read_only=True)
+        try:
+            cursor.execute(query, params)
+            data = self.fetch_one(cursor, query)
+        finally:
+            self.close_cursor_and_conn(cursor, conn)
+        if key is not None:
+            self.query_cache.put(key, data)
         return data
 
-    def get_cursor_and_conn(self) -> tuple[MySQLCursor, MySQLConnection]:
-        conn = self.connect_db()
-        cursor = conn.cursor(dictionary=True)
+    def _cache_lookup(
+        self, query: str, params: Sequence, tables: Sequence[str] | None
+    ) -> tuple[Hashable | None, bool, Any]:
+        """
+        Looks a read up in the query cache, taking into account where it will be routed.
+
+        Reads in a read-your-writes window skip the lookup, since the entry may predate
+        the client's write (e.g. one made through another worker).
+        Only results read from the primary are stored: a lagging replica can return rows
+        older than the table versions in the key, which would then be served until the next write.
+
+        :param str query: The SQL text to execute
+        :param Sequence params: The query parameters
+        :param Sequence[str] | None tables: Every table the query reads, defaults to this class's table
+        :return tuple[Hashable | None, bool, Any]: The key to store the result under (None if it must not be stored),
+            whether a cached result was found, and that result
+        """
+        cache = self.query_cache
+        if not cache.enabled:
+            return None, False, None
+        key = cache.key(query, params, tables or (self.table,))
+        if read_from_primary():
+            return key, False, None
+        found, value = cache.get(key)
+        return (None if routes_to_replica() else key), found, value
+
+    def execute(
+        self,
+        query: str,
+        params: Sequence = (),
+        tables: Sequence[str] | None = None,
+        changes: Sequence[Change] = (),
+    ) -> int | None:
+        """
+        Runs and commits a write on the primary, then bumps the version of every table it touched,
+        which invalidates all cached results that read those tables.
+        Change log entries are inserted in the same transaction as the write.
+        Inside `transaction()`, the write joins the open transaction and is committed with it.
+
+        :param str query: The SQL text to execute
+        :param Sequence params: The query parameters, defaults to ()
+        :param Sequence[str] | None tables: Every table the write changes (including cascades), defaults to this class's table
+        :param Sequence[Change] changes: The entities the write changes, for delta sync, defaults to ()
+        :return int | None: The ID of an inserted row, if any
+        """
+        tables = tables or (self.table,)
+        if (tx := _transaction.get()) is not None:
+            tx.cursor.execute(query, params)
+            inserted_id = tx.cursor.lastrowid
+            if changes:
+                self._log_changes(tx.cursor, changes, inserted_id)
+                tx.tables.add(CHANGE_LOG_TABLE)
+            tx.tables.update(tables)
+            return inserted_id
+        cursor, conn = self.get_cursor_and_conn()
+        try:
+            cursor.execute(query, params)
+            inserted_id = cursor.lastrowid
+            if changes:
+                self._log_changes(cursor, changes, inserted_id)
+                tables = (*tables, CHANGE_LOG_TABLE)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.close_cursor_and_conn(cursor, conn)
+            self.query_cache.bump(tables)
+        return inserted_id
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        Runs every query of every query class inside the block in one transaction on the primary,
+        which is committed when the block exits and rolled back if it raises.
+        Reads inside the block see its uncommitted writes and bypass the query cache.
+        A nested block joins the outer transaction.
+
+        :yield Transaction: The open transaction
+        """
+        if (current := _transaction.get()) is not None:
+            yield current
+            return
+        cursor, conn = self.get_cursor_and_conn()
+        tx = Transaction(cursor, conn)
+        token = _transaction.set(tx)
+        try:
+            yield tx
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _transaction.reset(token)
+            self.close_cursor_and_conn(cursor, conn)
+            self.query_cache.bump(tx.tables)
+
+    @contextmanager
+    def consistent_read(self) -> Iterator[Transaction]:
+        """
+        Runs every read of every query class inside the block on one read connection, so on InnoDB
+        they all see the same snapshot. The connection goes to a replica unless the client's reads
+        are pinned to the primary. Reads inside the block bypass the query cache, and it must not write.
+        Inside `transaction()`, the block joins the open transaction.
+
+        :yield Transaction: The open read
+        """
+        if (current := _transaction.get()) is not None:
+            yield current
+            return
+        cursor, conn = self.get_cursor_and_conn(read_only=True)
+        tx = Transaction(cursor, conn)
+        token = _transaction.set(tx)
+        try:
+            yield tx
+        finally:
+            _transaction.reset(token)
+            self.close_cursor_and_conn(cursor, conn)
+
+    def record_changes(self, changes: Sequence[Change]) -> None:
+        """
+        Appends change log entries on their own, for writes whose IDs are only known afterwards
+        (e.g. multi-row inserts). Joins the open transaction, if any.
+
+        :param Sequence[Change] changes: The changed entities; each must have an `entity_id`
+        """
+        if not changes:
+            return
+        with self.transaction() as tx:
+            self._log_changes(tx.cursor, changes, None)
+            tx.tables.add(CHANGE_LOG_TABLE)
+
+    def _log_changes(
+        self, cursor: MySQLCursor, changes: Sequence[Change], inserted_id: int | None
+    ) -> None:
+        now = datetime.now()
+        cursor.executemany(
+            f"""-- sql
+            INSERT INTO {CHANGE_LOG_TABLE} (entity, entity_id, op, changed_at)
+            VALUES (%s, %s, %s, %s)
+            """,
+            [
+                (
+                    c.entity,
+                    inserted_id if c.entity_id is None else c.entity_id,
+                    c.op,
+                    now,
+                )
+                for c in changes
+            ],
+        )
+
+    def select_columns(self, columns: Sequence[str] | None = None) -> str:
+        """
+        Renders the explicit column list for a SELECT on this table.
+
+        :param Sequence[str] | None columns: A projection of the model's columns, defaults to all of them
+        :return str: The column list
+        """
+        return select_list(project(self.model, columns))
+
+    def mapper_for(self, query: str, cursor: MySQLCursor) -> RowMapper:
+        """
+        Returns the row mapper for a query, compiling it from the cursor description
+        the first time the query is executed.
+
+        :param str query: The SQL text of the executed query
+        :param MySQLCursor cursor: A cursor which has executed the query
+        :return RowMapper: The mapper for rows returned by the query
+        """
+        if (mapper := self._mappers.get(query)) is None:
+            columns = [column[0] for column in cursor.description or ()]
+            mapper = self._mappers[query] = RowMapper(columns)
+        return mapper
+
+    def fetch_all(self, cursor: MySQLCursor, query: str) -> list[Row]:
+        """
+        Fetches all remaining tuple rows from an executed cursor as rows keyed by column.
+
+        :param MySQLCursor cursor: A cursor which has executed the query
+        :param str query: The SQL text of the executed query
+        :return list[Row]: The fetched rows
+        """
+        rows = cursor.fetchall()
+        return self.mapper_for(query, cursor).map_all(rows)  # type: ignore
+
+    def fetch_one(self, cursor: MySQLCursor, query: str) -> Row | None:
+        """
+        Fetches the next tuple row from an executed cursor as a row keyed by column.
+
+        :param MySQLCursor cursor: A cursor which has executed the query
+        :param str query: The SQL text of the executed query
+        :return Row | None: The fetched row, or None if no rows remain
+        """
+        if (row := cursor.fetchone()) is None:
+            return None
+        return self.mapper_for(query, cursor)(row)  # type: ignore
+
+    def stream(
+        self,
+        query: str,
+        params: Sequence = (),
+        tables: Sequence[str] | None = None,
+        cached: bool = True,
+    ) -> Iterator[Row]:
+        """
+        Executes a query on an unbuffered cursor and yields its rows one at a time,
+        fetching them from the server in batches. The connection stays open until
+        the generator is exhausted or closed, so memory stays flat regardless of result size.
+
+        With the query cache enabled, fully consumed results of up to MAX_CACHED_STREAM_ROWS rows are cached.
+
+        :param str query: The SQL text to execute
+        :param Sequence params: The query parameters, defaults to ()
+        :param Sequence[str] | None tables: Every table the query reads, defaults to this class's table
+        :param bool cached: Whether the result may be served from or stored in the query cache, defaults to True
+        :yield Row: Each row of the result set, in query order
+        """
+        if _transaction.get() is not None:
+            # a transaction has one cursor, which cannot be left mid-result
+            yield from self.select_rows(query, params, tables)
+            return
+        collected: list[Row] | None = None
+        key = None
+        if cached:
+            key, found, rows = self._cache_lookup(query, params, tables)
+            if found:
+                yield from rows
+                return
+            if key is not None:
+                collected = []
+        # the generator may be resumed on other threads, between other queries on this one
+        cursor, conn = self.get_cursor_and_conn(read_only=True, dedicated=True)
+        try:
+            cursor.execute(query, params)
+            mapper = self.mapper_for(query, cursor)
+            while batch := cursor.fetchmany(self.STREAM_BATCH_SIZE):
+                for values in batch:
+                    row = mapper(values)  # type: ignore
+                    if collected is not None:
+                        collected.append(row)
+                        if len(collected) > self.MAX_CACHED_STREAM_ROWS:
+                            collected = None
+                    yield row
+        finally:
+            self.close_cursor_and_conn(cursor, conn)
+        if collected is not None:
+            self.query_cache.put(key, tuple(collected))
+
+    def get_cursor_and_conn(
+        self, read_only: bool = False, sticky: bool = True, dedicated: bool = False
+    ) -> tuple[MySQLCursor, MySQLConnection]:
+        """
+        Opens a connection and cursor. Reads may be served by a replica; anything else goes
+        to the primary and counts as a write, so later reads in the same request see it.
+
+        :param bool read_only: Whether only SELECTs will be run, defaults to False
+        :param bool sticky: Whether a write keeps the client's later reads on the primary, defaults to True
+        :param bool dedicated: Whether the connection must not be shared with other queries, defaults to False
+        :return tuple[MySQLCursor, MySQLConnection]: The cursor and its connection
+        """
+        if not read_only and sticky:
+            record_write()
+        conn = self.connect_db(read_only=read_only, dedicated=dedicated)
+        DB_CONNECTIONS_OPENED.inc("read" if read_only else "write")
+        DB_CONNECTIONS_OPEN.inc()
+        cursor = conn.cursor()
         return cursor, conn
 
     def close_cursor_and_conn(self, cursor: MySQLCursor, conn: MySQLConnection) -> None:
-        cursor.close()
-        conn.close()
+        try:
+            cursor.close()
+            conn.close()
+        finally:
+            DB_CONNECTIONS_OPEN.dec()
+
+
+# query methods inherited from this class are labelled by the subclass they are called on
+timed_methods(
+    BaseQueries, DB_QUERY_SECONDS, ["select_all", "select_one_by_id"], phase="db"
+)
+registry.collected(
+    "tgd_query_cache_lookups_total",
+    "Query cache lookups, by result",
+    "counter",
+    ("result",),
+    lambda: [
+        (("hit",), BaseQueries.query_cache.hits),
+        (("miss",), BaseQueries.query_cache.misses),
+    ],
+)
@@ -0,0 +1,104 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Hashable, Iterable
+
+from dotenv import load_dotenv
+
+
+class QueryCache:
+    """
+    A bounded LRU cache of query results keyed by SQL text, parameters and the current
+    version of every table the query reads.
+
+    Each table carries a version counter which write methods bump after committing.
+    Bumping a version makes every cached result that read the table unreachable at once,
+    so there is no per-key invalidation; stale entries simply age out of the LRU.
+
+    Versions only track writes made by this process. When several workers share a database,
+    `ttl` bounds how long another worker's write can go unnoticed.
+    """
+
+    def __init__(self, max_entries: int = 0, ttl: float = 0.0) -> None:
+        """
+        :param int max_entries: The maximum number of cached results; 0 disables caching
+        :param float ttl: Seconds a result may be served for; 0 means until invalidated
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._versions: dict[str, int] = {}
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, query: str, params: Iterable, tables: Iterable[str]) -> Hashable:
+        """
+        Builds the cache key for a query. Must be taken *before* the query runs, so a write
+        which lands while the query is in flight invalidates its result rather than being masked by it.
+
+        :param str query: The SQL text
+        :param Iterable params: The query parameters
+        :param Iterable[str] tables: Every table the query reads
+        :return Hashable: The cache key
+        """
+        versions = self._versions
+        return (
+            query,
+            tuple(params),
+            tuple((t, versions.get(t, 0)) for t in tables),
+        )
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        :param Hashable key: A key from `key`
+        :return tuple[bool, Any]: Whether the key was found, and the cached value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                not self.ttl or monotonic() - entry[0] < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        """
+        Invalidates every cached result that read any of the given tables.
+
+        :param Iterable[str] tables: The tables that were written to
+        """
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def cache_from_env() -> QueryCache:
+    """
+    Builds the shared query cache from QUERY_CACHE_SIZE (0, the default, disables it)
+    and QUERY_CACHE_TTL (seconds, 0 for no expiry).
+    """
+    load_dotenv()
+    return QueryCache(
+        max_entries=int(os.getenv("QUERY_CACHE_SIZE", "0")),
+        ttl=float(os.getenv("QUERY_CACHE_TTL", "0")),
+    )
@@ -0,0 +1,48 @@
+from app.constants import CHANGE_LOG_TABLE
+from app.db.base_queries import BaseQueries
+from app.db.columns import project, select_list
+from app.db.rows import Row
+from app.models.changes import ChangeEntry
+
+
+class ChangeQueries(BaseQueries):
+    """
+    Reads the change log, which every write appends to in its own transaction.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.table = CHANGE_LOG_TABLE
+        self.model = ChangeEntry
+
+    def select_latest_version(self) -> int:
+        """
+        :return int: The version of the most recent change, or 0 if nothing has changed yet
+        """
+        query = f"""-- sql
+            SELECT MAX(version) AS version FROM {self.table}
+            """
+        row = self.select_row(query)
+        return (row["version"] if row is not None else None) or 0
+
+    def select_since(self, since: int, until: int) -> list[Row]:
+        """
+        Selects the latest change of every entity changed after a version, up to and including another.
+        Older changes to the same entity are superseded and not returned.
+
+        :param int since: The version the client already has
+        :param int until: The version the client is brought up to
+        :return list[Row]: One change per entity, ordered by version
+        """
+        query = f"""-- sql
+            SELECT {select_list(project(self.model), 'c')}
+            FROM {self.table} c
+            JOIN (
+                SELECT MAX(version) AS version
+                FROM {self.table}
+                WHERE version > %s AND version <= %s
+                GROUP BY entity, entity_id
+            ) latest ON c.version = latest.version
+            ORDER BY c.version
+            """
+        return self.select_rows(query, (since, until))
@@ -0,0 +1,62 @@
+from functools import cache
+from typing import Any, Iterable, Sequence, get_origin
+
+from pydantic import BaseModel
+
+
+def _is_column(annotation: Any) -> bool:
+    """
+    Model fields holding collections or nested models (e.g. `EventSeries.events`)
+    are assembled from other tables and have no column of their own.
+    """
+    if get_origin(annotation) in (list, set, tuple, dict):
+        return False
+    return not (isinstance(annotation, type) and issubclass(annotation, BaseModel))
+
+
+@cache
+def model_columns(model: type[BaseModel]) -> tuple[str, ...]:
+    """
+    Derives the table columns backing a Pydantic model from its fields, in field order.
+
+    :param type[BaseModel] model: The model a table's rows are loaded into
+    :return tuple[str, ...]: The column names
+    """
+    return tuple(
+        name
+        for name, field in model.model_fields.items()
+        if _is_column(field.annotation)
+    )
+
+
+def project(
+    model: type[BaseModel],
+    columns: Sequence[str] | None = None,
+) -> tuple[str, ...]:
+    """
+    Builds a column projection for a model. Only columns the model knows about are allowed,
+    which keeps caller-supplied projections safe to interpolate into SQL.
+
+    :param type[BaseModel] model: The model a table's rows are loaded into
+    :param Sequence[str] | None columns: The columns to select, defaults to every model column
+    :raises ValueError: If a requested column is not backed by the model
+    :return tuple[str, ...]: The projected column names, in model field order
+    """
+    allowed = model_columns(model)
+    if columns is None:
+        columns = allowed
+    elif unknown := set(columns).difference(allowed):
+        raise ValueError(f"Unknown columns for {model.__name__}: {sorted(unknown)}")
+    return tuple(c for c in allowed if c in columns)
+
+
+def select_list(columns: Iterable[str], alias: str | None = None) -> str:
+    """
+    Renders a projection as the column list of a SELECT statement.
+
+    :param Iterable[str] columns: The column names
+    :param str | None alias: An optional table alias to qualify each column with
+    :return str: e.g. "s.`name` , s.`description`"
+    """
+    prefix = f"{alias}." if alias else ""
+    return " , ".join(f"{prefix}`{column}`" for column in columns)
@@ -1,7 +1,13 @@
+from datetime import datetime
+from typing import Iterator, Sequence
+
 from icecream import ic
+from pydantic import BaseModel, HttpUrl
 
 from app.constants import EVENT_TABLE, SERIES_TABLE
-from app.db.base_queries import BaseQueries
+from app.db.base_queries import BaseQueries, Change
+from app.db.columns import project, select_list
+from app.db.rows import Row
 from app.models.event import Event, EventSeries, NewEvent, NewEventSeries
 
 
@@ -11,58 +17,203 @@ class EventQueries(BaseQueries):
     Inherits from BaseQueries, which provides a connection to the database.
     """
 
+    # rows per multi-row statement, which keeps statements well under max_allowed_packet
+    BATCH_SIZE = 500
+
     def __init__(self) -> None:
         super().__init__()
+        self.table = SERIES_TABLE
+        self.model = EventSeries
+        # every read joins both tables, so a write to either invalidates cached reads
+        self.tables = (SERIES_TABLE, EVENT_TABLE)
+
+    def select_columns(
+        self,
+        columns: Sequence[str] | None = None,
+        event_columns: Sequence[str] | None = None,
+    ) -> str:
+        """
+        Renders the column list for a Series LEFT JOIN Event query.
+        Series columns are qualified with `s` and Event columns with `e`.
+
+        :param Sequence[str] | None columns: A projection of EventSeries columns, defaults to all of them
+        :param Sequence[str] | None event_columns: A projection of Event columns, defaults to all of them
+        :return str: The column list
+        """
+        series = project(EventSeries, columns)
+        events = project(Event, event_columns)
+        return f"{select_list(series, 's')} , {select_list(events, 'e')}"
 
-    def select_one_by_id(self, series_id: int) -> list[dict] | None:
+    def select_one_by_id(self, series_id: int) -> list[Row] | None:
         query = f"""-- sql
-                SELECT s.series_id , s.name , s.description , s.poster_id , e.event_id , e.location , e.`time` , e.ticket_url , e.map_url
+                SELECT {self.select_columns()}
                 FROM {SERIES_TABLE} s
                 LEFT JOIN {EVENT_TABLE} e
                 ON s.series_id = e.series_id
                 WHERE s.series_id = %s
+                ORDER BY e.`time`
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (series_id,))
-        data: list[dict] = cursor.fetchall()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
-        return data
+        return self.select_rows(query, (series_id,), self.tables)
 
-    def select_all(self) -> list[dict]:
+    def select_all(
+        self,
+        columns: Sequence[str] | None = None,
+        event_columns: Sequence[str] | None = None,
+        cached: bool = True,
+    ) -> Iterator[Row]:
         """
-        Queries for all Series and Event info and returns a list of dictionaries.
+        Queries for all Series and Event info and yields the rows as they arrive.
         Data is gathered with a LEFT JOIN on the Event table to ensure all Series are returned.
         A Series with no Events is valid.
+
+        Rows are ordered by series and then by event time, so all rows of a series are contiguous
+        and each series can be assembled as soon as its last row has been read.
+
+        :param Sequence[str] | None columns: A projection of EventSeries columns, defaults to all of them
+        :param Sequence[str] | None event_columns: A projection of Event columns, defaults to all of them; if empty, the Event table is not queried at all
+        :param bool cached: Whether the rows may be served from or stored in the query cache, defaults to True
         """
+        if event_columns is not None and not event_columns:
+            query = f"""-- sql
+                SELECT {select_list(project(EventSeries, columns))}
+                FROM {SERIES_TABLE}
+                ORDER BY series_id
+            """
+            return self.stream(query, cached=cached)
         query = f"""-- sql
-                SELECT s.series_id , s.name , s.description , s.poster_id , e.event_id , e.location , e.`time` , e.ticket_url , e.map_url
+                SELECT {self.select_columns(columns, event_columns)}
                 FROM {SERIES_TABLE} s
                 LEFT JOIN {EVENT_TABLE} e
                 ON s.series_id = e.series_id
+                ORDER BY s.series_id , e.`time`
             """
+        return self.stream(query, tables=self.tables, cached=cached)
 
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query)
-        data: list[dict] = cursor.fetchall()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
-        return data
+    def select_page(
+        self,
+        after: int | None = None,
+        limit: int | None = None,
+        events_limit: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[Row]:
+        """
+        Queries one page of Series (keyset paginated on series ID) with their Events and yields the rows.
+        Rows are ordered by series and then by event time, like `select_all`.
+
+        When a time window is given, only Events inside it are returned, and only Series with
+        at least one such Event. The window is filtered in SQL using the index on events(series_id, time).
+
+        :param int | None after: Only Series with an ID greater than this are returned, defaults to None
+        :param int | None limit: The maximum number of Series to return, defaults to no limit
+        :param int | None events_limit: The maximum number of Events per Series (earliest first), defaults to no limit
+        :param datetime | None start: Only Events at or after this time are returned, defaults to None
+        :param datetime | None end: Only Events before this time are returned, defaults to None
+        :yield Row: Each row of the page
+        """
+        window, window_params = self._time_window("w.`time`", start, end)
+        series_query = f"""-- sql
+            SELECT {select_list(project(EventSeries))}
+            FROM {SERIES_TABLE}
+            WHERE series_id > %s
+            """
+        params: list = [after or 0]
+        if window:
+            series_query += f"""AND EXISTS (
+                SELECT 1 FROM {EVENT_TABLE} w
+                WHERE w.series_id = {SERIES_TABLE}.series_id {window}
+            )
+            """
+            params.extend(window_params)
+        series_query += "ORDER BY series_id "
+        if limit is not None:
+            series_query += "LIMIT %s"
+            params.append(limit)
+
+        events_query = EVENT_TABLE
+        if window or events_limit is not None:
+            rank = (
+                ", ROW_NUMBER() OVER (PARTITION BY series_id ORDER BY `time` , event_id) AS event_rank"
+                if events_limit is not None
+                else ""
+            )
+            events_query = f"""(
+                SELECT {select_list(project(Event))} , series_id {rank}
+                FROM {EVENT_TABLE} w
+                WHERE series_id > %s {window}
+            )"""
+            params.extend([after or 0, *window_params])
+
+        query = f"""-- sql
+                SELECT {self.select_columns()}
+                FROM ({series_query}) s
+                LEFT JOIN {events_query} e
+                ON s.series_id = e.series_id
+                {"AND e.event_rank <= %s" if events_limit is not None else ""}
+                ORDER BY s.series_id , e.`time`
+            """
+        if events_limit is not None:
+            params.append(events_limit)
+        return self.stream(query, params, self.tables)
+
+    def select_upcoming(self, now: datetime) -> Iterator[Row]:
+        """
+        Queries Series which have Events at or after `now`, with only those Events, and yields the rows.
+        Series are ordered chronologically by their next Event, and Events by time within each Series.
+
+        :param datetime now: The current time
+        :yield Row: Each row, grouped by series
+        """
+        query = f"""-- sql
+                SELECT {self.select_columns()}
+                FROM {SERIES_TABLE} s
+                JOIN (
+                    SELECT {select_list(project(Event))} , series_id ,
+                        MIN(`time`) OVER (PARTITION BY series_id) AS next_time
+                    FROM {EVENT_TABLE}
+                    WHERE `time` >= %s
+                ) e
+                ON s.series_id = e.series_id
+                ORDER BY e.next_time , s.series_id , e.`time`
+            """
+        # keyed on the current time, so caching would only churn the LRU
+        return self.stream(query, (now,), self.tables, cached=False)
+
+    def _time_window(
+        self, column: str, start: datetime | None, end: datetime | None
+    ) -> tuple[str, list[datetime]]:
+        """
+        Builds the SQL condition for a half-open [start, end) time window.
+
+        :param str column: The qualified time column to filter
+        :param datetime | None start: The inclusive lower bound, if any
+        :param datetime | None end: The exclusive upper bound, if any
+        :return tuple[str, list[datetime]]: An `AND ...` condition (empty if unbounded) and its parameters
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"AND {column} >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"AND {column} < %s")
+            params.append(end)
+        return " ".join(conditions), params
 
     def insert_one_series(self, series: NewEventSeries) -> int:
         query = f"""-- sql
-            INSERT INTO {SERIES_TABLE} (name, description)
-            VALUES (%s, %s)
+            INSERT INTO {SERIES_TABLE} (name, description, updated_at)
+            VALUES (%s, %s, %s)
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(
+        inserted_id = self.execute(
             query,
             (
                 series.name,
                 series.description,
+                datetime.now(),
             ),
+            self.tables,
+            [Change("events", None)],
         )
-        inserted_id = cursor.lastrowid
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
 
         if inserted_id is None:
             raise Exception("insertion error")
@@ -71,18 +222,24 @@ class EventQueries(BaseQueries):
 
     def insert_one_event(self, event: NewEvent, series_id: int) -> int:
         query = f"""-- sql
-            INSERT INTO {EVENT_TABLE} (series_id, location, time, ticket_url, map_url)
-            VALUES (%s, %s, %s, %s, %s)
+            INSERT INTO {EVENT_TABLE} (series_id, location, time, ticket_url, map_url, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
             """
-        cursor, conn = self.get_cursor_and_conn()
         ticket_url = str(event.ticket_url) if event.ticket_url else None
         map_url = str(event.map_url) if event.map_url else None
-        cursor.execute(
-            query, (series_id, event.location, event.time, ticket_url, map_url)
+        inserted_id = self.execute(
+            query,
+            (
+                series_id,
+                event.location,
+                event.time,
+                ticket_url,
+                map_url,
+                datetime.now(),
+            ),
+            self.tables,
+            [Change("events", series_id)],
         )
-        inserted_id = cursor.lastrowid
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
         if inserted_id is None:
             raise Exception("error inserting event")
         return inserted_id
@@ -92,56 +249,223 @@ class EventQueries(BaseQueries):
             DELETE FROM {EVENT_TABLE} 
             WHERE series_id = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (series.series_id,))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(
+            query,
+            (series.series_id,),
+            self.tables,
+            [Change("events", series.series_id)],
+        )
 
     def delete_one_series(self, series: EventSeries) -> None:
         query = f"""-- sql
             DELETE FROM {SERIES_TABLE}
             WHERE series_id = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (series.series_id,))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(
+            query,
+            (series.series_id,),
+            self.tables,
+            [Change("events", series.series_id, "delete")],
+        )
 
     def update_series_poster(self, series: EventSeries) -> None:
         query = f"""-- sql
             UPDATE {SERIES_TABLE}
-            SET poster_id = %s
+            SET poster_id = %s, row_version = row_version + 1, updated_at = %s
             WHERE series_id = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (series.poster_id, series.series_id))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(
+            query,
+            (series.poster_id, datetime.now(), series.series_id),
+            self.tables,
+            [Change("events", series.series_id)],
+        )
 
-    def replace_event(self, event: Event) -> None:
+    def replace_event(self, event: Event, series_id: int) -> None:
         query = f"""-- sql
             UPDATE {EVENT_TABLE}
-            SET location = %s, time = %s, ticket_url = %s, map_url = %s
+            SET location = %s, time = %s, ticket_url = %s, map_url = %s,
+                row_version = row_version + 1, updated_at = %s
             WHERE event_id = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
         ticket_url = str(event.ticket_url) if event.ticket_url else None
         map_url = str(event.map_url) if event.map_url else None
-        cursor.execute(
-            query, (event.location, event.time, ticket_url, map_url, event.event_id)
+        self.execute(
+            query,
+            (
+                event.location,
+                event.time,
+                ticket_url,
+                map_url,
+                datetime.now(),
+                event.event_id,
+            ),
+            self.tables,
+            [Change("events", series_id)],
         )
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
 
     def replace_series(self, series: EventSeries) -> None:
         query = f"""-- sql
             UPDATE {SERIES_TABLE}
-            SET name = %s, description = %s, poster_id = %s
+            SET name = %s, description = %s, poster_id = %s,
+                row_version = row_version + 1, updated_at = %s
             WHERE series_id = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(
-            query, (series.name, series.description, series.poster_id, series.series_id)
+        self.execute(
+            query,
+            (
+                series.name,
+                series.description,
+                series.poster_id,
+                datetime.now(),
+                series.series_id,
+            ),
+            self.tables,
+            [Change("events", series.series_id)],
+        )
+
+    def select_ids_by_names(self, names: Sequence[str]) -> dict[str, int]:
+        """
+        Looks up existing series by name. Names are compared case-insensitively,
+        like the unique key on series.name.
+
+        :param Sequence[str] names: The series names
+        :return dict[str, int]: The IDs of the series which exist, keyed by casefolded name
+        """
+        ids: dict[str, int] = {}
+        for batch in _batches(names, self.BATCH_SIZE):
+            query = f"""-- sql
+                SELECT series_id, name FROM {SERIES_TABLE}
+                WHERE name IN ({", ".join(["%s"] * len(batch))})
+                """
+            for row in self.select_rows(query, batch, (SERIES_TABLE,)):
+                ids[row["name"].casefold()] = row["series_id"]
+        return ids
+
+    def insert_many_series(self, series: Sequence[NewEventSeries]) -> None:
+        """
+        Inserts series (without their events) with multi-row INSERTs.
+        Their IDs are read back with `select_ids_by_names`, and their changes recorded by the caller.
+
+        :param Sequence[NewEventSeries] series: The series to insert
+        """
+        now = datetime.now()
+        for batch in _batches(series, self.BATCH_SIZE):
+            query = f"""-- sql
+                INSERT INTO {SERIES_TABLE} (name, description, updated_at)
+                VALUES {", ".join(["(%s, %s, %s)"] * len(batch))}
+                """
+            params = [v for s in batch for v in (s.name, s.description, now)]
+            self.execute(query, params, self.tables)
+
+    def insert_many_events(self, events: Sequence[tuple[int, NewEvent]]) -> None:
+        """
+        Inserts events with multi-row INSERTs.
+
+        :param Sequence[tuple[int, NewEvent]] events: Each event with the ID of its series
+        """
+        now = datetime.now()
+        for batch in _batches(events, self.BATCH_SIZE):
+            query = f"""-- sql
+                INSERT INTO {EVENT_TABLE} (series_id, location, time, ticket_url, map_url, updated_at)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch))}
+                """
+            params = [
+                v
+                for series_id, event in batch
+                for v in (
+                    series_id,
+                    event.location,
+                    event.time,
+                    str(event.ticket_url) if event.ticket_url else None,
+                    str(event.map_url) if event.map_url else None,
+                    now,
+                )
+            ]
+            self.execute(query, params, self.tables)
+
+    def delete_events_by_series_ids(self, series_ids: Sequence[int]) -> None:
+        """
+        Deletes every event of the given series.
+
+        :param Sequence[int] series_ids: The series IDs
+        """
+        for batch in _batches(series_ids, self.BATCH_SIZE):
+            query = f"""-- sql
+                DELETE FROM {EVENT_TABLE}
+                WHERE series_id IN ({", ".join(["%s"] * len(batch))})
+                """
+            self.execute(query, batch, self.tables)
+
+    def update_series_description(self, series_id: int, description: str) -> None:
+        query = f"""-- sql
+            UPDATE {SERIES_TABLE}
+            SET description = %s, row_version = row_version + 1, updated_at = %s
+            WHERE series_id = %s
+            """
+        self.execute(
+            query,
+            (description, datetime.now(), series_id),
+            self.tables,
+            [Change("events", series_id)],
+        )
+
+    def update_series_fields(self, series_id: int, fields: dict) -> None:
+        """
+        Updates only the given columns of one series.
+
+        :param int series_id: The series ID
+        :param dict fields: New values by column; names are checked against EventSeries
+        """
+        self._update_fields(
+            SERIES_TABLE, EventSeries, fields, "series_id = %s", (series_id,), series_id
+        )
+
+    def update_event_fields(self, series_id: int, event_id: int, fields: dict) -> None:
+        """
+        Updates only the given columns of one event, if it belongs to the series.
+
+        :param int series_id: The ID of the event's series
+        :param int event_id: The event ID
+        :param dict fields: New values by column; names are checked against Event
+        """
+        self._update_fields(
+            EVENT_TABLE,
+            Event,
+            fields,
+            "event_id = %s AND series_id = %s",
+            (event_id, series_id),
+            series_id,
         )
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+
+    def _update_fields(
+        self,
+        table: str,
+        model: type[BaseModel],
+        fields: dict,
+        where: str,
+        where_params: tuple,
+        series_id: int,
+    ) -> None:
+        columns = project(model, list(fields))
+        assignments = " , ".join(f"`{column}` = %s" for column in columns)
+        query = f"""-- sql
+            UPDATE {table}
+            SET {assignments}, row_version = row_version + 1, updated_at = %s
+            WHERE {where}
+            """
+        values = [
+            str(v) if isinstance(v, HttpUrl) else v
+            for v in (fields[column] for column in columns)
+        ]
+        self.execute(
+            query,
+            (*values, datetime.now(), *where_params),
+            self.tables,
+            [Change("events", series_id)],
+        )
+
+
+def _batches(items: Sequence, size: int) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield list(items[start : start + size])
@@ -1,20 +1,23 @@
+from datetime import datetime
+from typing import Sequence
+
 from app.constants import GROUP_TABLE
-from app.db.base_queries import BaseQueries
+from app.db.base_queries import BaseQueries, Change
+from app.db.rows import Row
+from app.models.group import Group
 
 
 class GroupQueries(BaseQueries):
     def __init__(self) -> None:
         super().__init__()
         self.table = GROUP_TABLE
+        self.model = Group
 
-    def select_one_by_id(self) -> dict:
+    def select_one_by_id(self, columns: Sequence[str] | None = None) -> Row:
         query = f"""-- sql
-            SELECT * FROM {self.table}
+            SELECT {self.select_columns(columns)} FROM {self.table}
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query)
-        data: dict = cursor.fetchone()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
+        data = self.select_row(query)
 
         if not data:
             raise Exception("error retrieving group")
@@ -27,22 +30,22 @@ class GroupQueries(BaseQueries):
         )
 
     def update_group_bio(self, bio: str) -> None:
-        cursor, conn = self.get_cursor_and_conn()
         query = f"""-- sql
-            UPDATE {self.table} SET bio = %s WHERE id = 1
+            UPDATE {self.table}
+            SET bio = %s, row_version = row_version + 1, updated_at = %s
+            WHERE id = 1
             """  # only one row in the table
-        cursor.execute(query, (bio,))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(query, (bio, datetime.now()), changes=[Change("group", 1)])
 
     def update_livestream(self, livestream_id: str) -> None:
-        cursor, conn = self.get_cursor_and_conn()
         query = f"""-- sql
-            UPDATE {self.table} SET livestream_id = %s WHERE id = 1
+            UPDATE {self.table}
+            SET livestream_id = %s, row_version = row_version + 1, updated_at = %s
+            WHERE id = 1
             """
-        cursor.execute(query, (livestream_id,))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(
+            query, (livestream_id, datetime.now()), changes=[Change("group", 1)]
+        )
 
     def delete_livestream(self) -> None:
         self.update_livestream(livestream_id="")
@@ -0,0 +1,216 @@
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from mysql.connector.connection import MySQLConnection
+
+from app.constants import (
+    CHANGE_LOG_TABLE,
+    EVENT_TABLE,
+    GROUP_TABLE,
+    MIGRATIONS_TABLE,
+    MUSICIAN_TABLE,
+    SERIES_TABLE,
+    SNAPSHOT_TABLE,
+    USER_TABLE,
+)
+from app.db.conn import connect_db
+
+
+# tables whose rows carry row_version and updated_at
+TRACKED_TABLES = (SERIES_TABLE, EVENT_TABLE, MUSICIAN_TABLE, GROUP_TABLE)
+
+
+class Migration(NamedTuple):
+    """
+    A versioned schema change. Statements must be safe to re-run against a live database
+    (e.g. `IF NOT EXISTS`), since schemas created by the seed script may already include them.
+    """
+
+    version: int
+    name: str
+    apply: list[str]
+    rollback: list[str]
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="lookup indexes",
+        apply=[
+            f"CREATE INDEX IF NOT EXISTS users_sub ON {USER_TABLE} (sub)",
+            f"CREATE INDEX IF NOT EXISTS users_email ON {USER_TABLE} (email)",
+            f"CREATE INDEX IF NOT EXISTS events_time ON {EVENT_TABLE} (`time`)",
+            f"CREATE INDEX IF NOT EXISTS events_series_time ON {EVENT_TABLE} (series_id, `time`)",
+        ],
+        rollback=[
+            f"DROP INDEX IF EXISTS events_series_time ON {EVENT_TABLE}",
+            f"DROP INDEX IF EXISTS events_time ON {EVENT_TABLE}",
+            f"DROP INDEX IF EXISTS users_email ON {USER_TABLE}",
+            f"DROP INDEX IF EXISTS users_sub ON {USER_TABLE}",
+        ],
+    ),
+    Migration(
+        version=2,
+        name="snapshots",
+        apply=[
+            f"""-- sql
+            CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+                name VARCHAR(64) NOT NULL,
+                body LONGTEXT NOT NULL,
+                created_at DATETIME NOT NULL,
+                PRIMARY KEY (name)
+            )
+            """,
+        ],
+        rollback=[f"DROP TABLE IF EXISTS {SNAPSHOT_TABLE}"],
+    ),
+    Migration(
+        version=3,
+        name="change tracking",
+        apply=[
+            *(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}"
+                for table in TRACKED_TABLES
+                for column in (
+                    "row_version INT NOT NULL DEFAULT 1",
+                    "updated_at DATETIME NULL",
+                )
+            ),
+            f"""-- sql
+            CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+                version INT NOT NULL AUTO_INCREMENT,
+                entity VARCHAR(32) NOT NULL,
+                entity_id INT NOT NULL,
+                op VARCHAR(8) NOT NULL,
+                changed_at DATETIME NOT NULL,
+                PRIMARY KEY (version)
+            )
+            """,
+        ],
+        rollback=[
+            f"DROP TABLE IF EXISTS {CHANGE_LOG_TABLE}",
+            *(
+                f"ALTER TABLE {table} DROP COLUMN IF EXISTS {column}"
+                for table in TRACKED_TABLES
+                for column in ("updated_at", "row_version")
+            ),
+        ],
+    ),
+    Migration(
+        version=4,
+        name="snapshot versions",
+        apply=[
+            f"ALTER TABLE {SNAPSHOT_TABLE} ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 0"
+        ],
+        rollback=[f"ALTER TABLE {SNAPSHOT_TABLE} DROP COLUMN IF EXISTS version"],
+    ),
+]
+
+
+class MigrationRunner:
+    """
+    Applies and rolls back schema migrations, recording applied versions in the migrations table.
+    Never drops or rewrites table data, so it can be run against the live database.
+    """
+
+    def __init__(
+        self,
+        migrations: list[Migration] = MIGRATIONS,
+        connect_db: Callable[[], MySQLConnection] = connect_db,
+    ) -> None:
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.connect_db = connect_db
+
+    def applied_versions(self) -> set[int]:
+        """
+        Returns the versions recorded as applied, creating the migrations table if needed.
+
+        :return set[int]: The applied versions
+        """
+        conn = self.connect_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""-- sql
+            CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                version INT NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL,
+                PRIMARY KEY (version)
+            )
+            """
+        )
+        cursor.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")
+        versions = {row[0] for row in cursor.fetchall()}  # type: ignore
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return versions
+
+    def status(self) -> list[tuple[Migration, bool]]:
+        """
+        Lists every known migration alongside whether it has been applied.
+
+        :return list[tuple[Migration, bool]]: (migration, applied) pairs in version order
+        """
+        applied = self.applied_versions()
+        return [(m, m.version in applied) for m in self.migrations]
+
+    def apply(self, target: int | None = None) -> list[Migration]:
+        """
+        Applies pending migrations in version order, up to and including `target`.
+
+        :param int | None target: The last version to apply, defaults to the newest
+        :return list[Migration]: The migrations that were applied
+        """
+        applied = self.applied_versions()
+        pending = [
+            m
+            for m in self.migrations
+            if m.version not in applied and (target is None or m.version <= target)
+        ]
+        for migration in pending:
+            self._run(
+                migration.apply,
+                f"INSERT INTO {MIGRATIONS_TABLE} (version, name, applied_at) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, datetime.now()),
+            )
+        return pending
+
+    def rollback(self, target: int | None = None) -> list[Migration]:
+        """
+        Rolls back applied migrations in reverse version order, down to (but excluding) `target`.
+
+        :param int | None target: The version to roll back to, defaults to rolling back only the newest
+        :return list[Migration]: The migrations that were rolled back
+        """
+        versions = self.applied_versions()
+        applied = [m for m in self.migrations if m.version in versions]
+        if target is None:
+            to_roll_back = applied[-1:]
+        else:
+            to_roll_back = [m for m in applied if m.version > target]
+        for migration in reversed(to_roll_back):
+            self._run(
+                migration.rollback,
+                f"DELETE FROM {MIGRATIONS_TABLE} WHERE version = %s",
+                (migration.version,),
+            )
+        return to_roll_back[::-1]
+
+    def _run(self, statements: list[str], record: str, params: tuple) -> None:
+        """
+        Runs a migration's statements and then records the outcome.
+        DDL commits implicitly in MariaDB, which is why every statement must be re-runnable.
+
+        :param list[str] statements: The schema statements to execute
+        :param str record: The statement updating the migrations table
+        :param tuple params: Parameters for the record statement
+        """
+        conn = self.connect_db()
+        cursor = conn.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(record, params)
+        conn.commit()
+        cursor.close()
+        conn.close()
@@ -1,8 +1,9 @@
+from datetime import datetime
+
 from icecream import ic
 
 from app.constants import MUSICIAN_TABLE
-from app.db.base_queries import BaseQueries
-from app.db.conn import connect_db
+from app.db.base_queries import BaseQueries, Change
 from app.models.musician import Musician
 
 
@@ -10,6 +11,7 @@ class MusicianQueries(BaseQueries):
     def __init__(self) -> None:
         super().__init__()
         self.table = MUSICIAN_TABLE
+        self.model = Musician
 
     def update_bio(self, musician: Musician, bio: str) -> None:
         """Updates a musician's biography in the database.
@@ -18,15 +20,16 @@ class MusicianQueries(BaseQueries):
             musician (Musician): The musician object to update
             bio (str): The new biography for the musician
         """
-        db = connect_db()
-        cursor = db.cursor()
         query = f"""-- sql
-            UPDATE {self.table} SET bio = %s WHERE id = %s
+            UPDATE {self.table}
+            SET bio = %s, row_version = row_version + 1, updated_at = %s
+            WHERE id = %s
             """
-        cursor.execute(query, (bio, musician.id))
-        db.commit()
-        cursor.close()
-        db.close()
+        self.execute(
+            query,
+            (bio, datetime.now(), musician.id),
+            changes=[Change("musicians", musician.id)],
+        )
 
     def update_headshot(self, musician: Musician, headshot_id: str) -> None:
         """Updates a musician's headshot ID in the database.
@@ -36,12 +39,13 @@ class MusicianQueries(BaseQueries):
             musician (Musician): The musician object to update
             headshot_id (str): The public ID of the new headshot (as determined by Cloudinary)
         """
-        db = connect_db()
-        cursor = db.cursor()
         query = f"""-- sql
-            UPDATE {self.table} SET headshot_id = %s WHERE id = %s
+            UPDATE {self.table}
+            SET headshot_id = %s, row_version = row_version + 1, updated_at = %s
+            WHERE id = %s
             """
-        cursor.execute(query, (headshot_id, musician.id))
-        db.commit()
-        cursor.close()
-        db.close()
+        self.execute(
+            query,
+            (headshot_id, datetime.now(), musician.id),
+            changes=[Change("musicians", musician.id)],
+        )
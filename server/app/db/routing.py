@@ -0,0 +1,49 @@
+from contextvars import ContextVar
+from time import time
+
+
+class RoutingState:
+    """
+    Per-request state used to route reads between the primary and read replicas.
+    Shared by reference, so writes recorded in worker threads are visible to the request.
+    """
+
+    __slots__ = ("primary_until", "wrote")
+
+    def __init__(self, primary_until: float = 0.0) -> None:
+        self.primary_until = primary_until
+        self.wrote = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("db_routing_state", default=None)
+
+
+def begin_request(primary_until: float = 0.0) -> RoutingState:
+    """
+    Starts routing state for the current request.
+
+    :param float primary_until: Unix time until which reads must go to the primary,
+        e.g. because this client wrote recently
+    :return RoutingState: The state for the request
+    """
+    state = RoutingState(primary_until)
+    _state.set(state)
+    return state
+
+
+def record_write() -> None:
+    """
+    Marks the current request as having written, so its remaining reads see its own writes.
+    """
+    if (state := _state.get()) is not None:
+        state.wrote = True
+
+
+def read_from_primary() -> bool:
+    """
+    Whether reads in the current context must go to the primary rather than a replica.
+
+    :return bool: True after a write in this request, or within a client's sticky window
+    """
+    state = _state.get()
+    return state is not None and (state.wrote or state.primary_until > time())
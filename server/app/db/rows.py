@@ -0,0 +1,26 @@
+from typing import Any, Sequence
+
+# a row keyed by column name, built directly from the cursor's tuple
+Row = dict[str, Any]
+
+
+class RowMapper:
+    """
+    The column names of a query, compiled once from the cursor description and reused for every row it returns.
+
+    Rows are built with `dict(zip(columns, values))`, which runs in C and allocates only the dict
+    itself, and are passed to models with `Model.model_validate(row)` rather than `Model(**row)`,
+    so no second kwargs dict is built per row.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Sequence[str]) -> None:
+        self.columns: tuple[str, ...] = tuple(columns)
+
+    def __call__(self, values: Sequence[Any]) -> Row:
+        return dict(zip(self.columns, values))
+
+    def map_all(self, rows: Sequence[Sequence[Any]]) -> list[Row]:
+        columns = self.columns
+        return [dict(zip(columns, values)) for values in rows]
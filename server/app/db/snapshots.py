@@ -0,0 +1,94 @@
+from app.constants import CHANGE_LOG_TABLE, SNAPSHOT_TABLE
+from app.db.base_queries import BaseQueries
+from app.db.conn import IntegrityError
+from app.db.rows import Row
+from app.models.snapshot import Snapshot
+
+
+class SnapshotQueries(BaseQueries):
+    """
+    Stores materialized, pre-serialized response bodies keyed by name.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.table = SNAPSHOT_TABLE
+        self.model = Snapshot
+
+    def select_one_by_name(self, name: str) -> Row | None:
+        """
+        Select one snapshot by its primary key
+
+        :param str name: the snapshot name
+        :return Row | None: the snapshot, or None if it has never been built
+        """
+        query = f"""-- sql
+            SELECT {self.select_columns()} FROM {self.table} WHERE name = %s
+            """
+        return self.select_row(query, (name,))
+
+    def select_data_version(self) -> int:
+        """
+        Selects the version of the latest change to the data snapshots are built from.
+        Must be read before that data, so a snapshot is never labelled newer than its body.
+
+        :return int: The latest change log version, or 0 if nothing has changed yet
+        """
+        query = f"""-- sql
+            SELECT MAX(version) AS version FROM {CHANGE_LOG_TABLE}
+            """
+        row = self.select_row(query, tables=(CHANGE_LOG_TABLE,))
+        return (row["version"] if row is not None else None) or 0
+
+    def replace(self, snapshot: Snapshot) -> bool:
+        """
+        Stores a snapshot unless the stored one was built from newer data, so a slow rebuild
+        which started before a write cannot overwrite the rebuild which followed it.
+
+        Snapshots are also rebuilt by public reads, so storing one does not pin the client's
+        later reads to the primary.
+
+        :param Snapshot snapshot: the snapshot to store
+        :return bool: Whether the snapshot was stored
+        """
+        update = f"""-- sql
+            UPDATE {self.table} SET body = %s, created_at = %s, version = %s
+            WHERE name = %s AND version <= %s
+            """
+        update_params = (
+            snapshot.body,
+            snapshot.created_at,
+            snapshot.version,
+            snapshot.name,
+            snapshot.version,
+        )
+        insert = f"""-- sql
+            INSERT INTO {self.table} (name, body, created_at, version) VALUES (%s, %s, %s, %s)
+            """
+        cursor, conn = self.get_cursor_and_conn(sticky=False)
+        try:
+            cursor.execute(update, update_params)
+            if not (stored := cursor.rowcount > 0):
+                try:
+                    cursor.execute(
+                        insert,
+                        (
+                            snapshot.name,
+                            snapshot.body,
+                            snapshot.created_at,
+                            snapshot.version,
+                        ),
+                    )
+                    stored = True
+                except IntegrityError:
+                    # stored concurrently, or already newer
+                    cursor.execute(update, update_params)
+                    stored = cursor.rowcount > 0
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.close_cursor_and_conn(cursor, conn)
+            self.query_cache.bump((self.table,))
+        return stored
@@ -0,0 +1,174 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Sequence
+
+# one shared connection per (thread, database path)
+_local = threading.local()
+
+# MariaDB's conditional column changes, which SQLite lacks
+CONDITIONAL_COLUMN = re.compile(
+    r"\s*ALTER\s+TABLE\s+(\w+)\s+(ADD|DROP)\s+COLUMN\s+IF\s+(?:NOT\s+)?EXISTS\s+(\w+)",
+    re.I,
+)
+
+
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ")
+
+
+def _convert_datetime(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
+
+@lru_cache(maxsize=512)
+def translate(query: str) -> str:
+    """
+    Rewrites the MySQL/MariaDB dialect used by the query classes, seed script and migrations
+    into SQLite. Only the handful of constructs the app actually uses are handled.
+
+    :param str query: A query written for mysql.connector
+    :return str: The equivalent SQLite query
+    """
+    query = query.replace("%s", "?")
+    # INTEGER PRIMARY KEY columns alias the rowid, which auto-increments
+    query = re.sub(
+        r"\bINT\s+NOT\s+NULL\s+AUTO_INCREMENT\b", "INTEGER NOT NULL", query, flags=re.I
+    )
+    # SQLite index names are schema-wide, so DROP INDEX takes no table
+    query = re.sub(
+        r"(DROP\s+INDEX\s+(?:IF\s+EXISTS\s+)?\w+)\s+ON\s+\w+", r"\1", query, flags=re.I
+    )
+    # MariaDB's _ci collations compare text case-insensitively, so unique names must too
+    query = re.sub(
+        r"\b(VARCHAR\(\d+\)(?:\s+NOT\s+NULL)?\s+UNIQUE)\b",
+        r"\1 COLLATE NOCASE",
+        query,
+        flags=re.I,
+    )
+    # SQLite cannot make column changes conditional; SQLiteCursor checks the columns first
+    query = re.sub(
+        r"\b(ADD|DROP)\s+COLUMN\s+IF\s+(NOT\s+)?EXISTS\b",
+        r"\1 COLUMN",
+        query,
+        flags=re.I,
+    )
+    return query
+
+
+class SQLiteCursor:
+    """
+    A DB-API cursor which accepts the same `%s`-style queries as mysql.connector.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor) -> None:
+        self._cursor = cursor
+
+    def execute(self, query: str, params: Sequence[Any] = ()) -> None:
+        if (match := CONDITIONAL_COLUMN.match(query)) is not None:
+            table, change, column = match.groups()
+            self._cursor.execute(f"PRAGMA table_info({table})")
+            exists = column in {row[1] for row in self._cursor.fetchall()}
+            if exists == (change.upper() == "ADD"):
+                return
+        self._cursor.execute(translate(query), tuple(params))
+
+    def executemany(self, query: str, rows: Sequence[Sequence[Any]]) -> None:
+        self._cursor.executemany(translate(query), rows)
+
+    def fetchone(self) -> tuple | None:
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int) -> list[tuple]:
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self) -> list[tuple]:
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    Wraps a SQLite connection with the subset of the mysql.connector connection interface
+    used by the query classes. For the calling thread's shared connection, `close` only
+    releases the wrapper; the underlying connection stays open for reuse by the thread.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, owned: bool = False) -> None:
+        """
+        :param sqlite3.Connection conn: The connection
+        :param bool owned: Whether the wrapper is its only user, and closes it, defaults to False
+        """
+        self._conn = conn
+        self._owned = owned
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        if self._owned:
+            self._conn.close()
+
+
+def _open(path: str, check_same_thread: bool) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=check_same_thread,
+        timeout=10,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def connect_sqlite(path: str, dedicated: bool = False) -> SQLiteConnection:
+    """
+    Returns the calling thread's connection to a SQLite database, opening it on first use.
+    Connections run in WAL mode so readers on other threads are not blocked by a writer.
+
+    :param str path: Path to the database file (created if missing)
+    :param bool dedicated: Whether to open a new connection which is closed with the wrapper,
+        for streamed results which may be resumed on other worker threads, defaults to False
+    :return SQLiteConnection: A connection usable by the query classes
+    """
+    if dedicated:
+        # only the stream uses it, one step at a time, though not always from the same thread
+        return SQLiteConnection(_open(path, check_same_thread=False), owned=True)
+    connections: dict[str, sqlite3.Connection] = _local.__dict__.setdefault(
+        "connections", {}
+    )
+    if (conn := connections.get(path)) is None:
+        conn = _open(path, check_same_thread=True)
+        connections[path] = conn
+    return SQLiteConnection(conn)
@@ -1,5 +1,7 @@
 from app.constants import USER_TABLE
 from app.db.base_queries import BaseQueries
+from app.db.rows import Row
+from app.models.user import User
 
 
 class UserQueries(BaseQueries):
@@ -10,40 +12,31 @@ class UserQueries(BaseQueries):
     def __init__(self) -> None:
         super().__init__()
         self.table = USER_TABLE
+        self.model = User
 
-    def select_one_by_email(self, email: str) -> dict | None:
+    def select_one_by_email(self, email: str) -> Row | None:
         """
         Select one user by their email address
 
         :param str email: user email
-        :return dict | None: a dictionary of found data, or None if no user found
+        :return Row | None: a row of found data, or None if no user found
         """
         query = f"""-- sql
-            SELECT * FROM {USER_TABLE} WHERE email = %s
+            SELECT {self.select_columns()} FROM {USER_TABLE} WHERE email = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (email,))
-        data: dict = cursor.fetchone()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
+        return self.select_row(query, (email,))
 
-        return data
-
-    def select_one_by_sub(self, sub: str) -> dict | None:
+    def select_one_by_sub(self, sub: str) -> Row | None:
         """
         Select one user by their unique sub identifier
 
         :param str sub: user sub
-        :return dict | None: a dict of user data
+        :return Row | None: a row of user data
         """
         query = f"""-- sql
-            SELECT * FROM {USER_TABLE} WHERE sub = %s
+            SELECT {self.select_columns()} FROM {USER_TABLE} WHERE sub = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (sub,))
-        data: dict = cursor.fetchone()  # type: ignore
-        self.close_cursor_and_conn(cursor, conn)
-
-        return data
+        return self.select_row(query, (sub,))
 
     def update_sub(self, email: str, sub: str) -> None:
         """
@@ -55,7 +48,4 @@ class UserQueries(BaseQueries):
         query = f"""-- sql
             UPDATE {USER_TABLE} SET sub = %s WHERE email = %s
             """
-        cursor, conn = self.get_cursor_and_conn()
-        cursor.execute(query, (sub, email))
-        conn.commit()
-        self.close_cursor_and_conn(cursor, conn)
+        self.execute(query, (sub, email))
@@ -1,13 +1,24 @@
-from asyncio import gather
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.controllers.controller import MainController
+from app.controllers.fieldsets import parse_include, split_csv
+from app.metrics import registry
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
 from app.models.tgd import TheGrapefruitsDuo
+from app.routers.batch import router as batch_router
+from app.routers.changes import router as changes_router
 from app.routers.contact import router as contact_router
 from app.routers.events import router as event_router
 from app.routers.group import router as group_router
+from app.routers.live import router as live_router
 from app.routers.musicians import router as musician_router
 from app.routers.users import router as user_router
 from app.scripts.version import get_version
@@ -22,6 +33,9 @@ app.include_router(group_router)
 app.include_router(contact_router)
 app.include_router(event_router)
 app.include_router(user_router)
+app.include_router(changes_router)
+app.include_router(live_router)
+app.include_router(batch_router)
 
 controller = MainController()
 
@@ -32,6 +46,8 @@ origins = [
     "https://tgd.lucasjensen.me",
 ]
 
+# innermost, so the encode phase ends when the app sends the response
+app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -39,18 +55,30 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(CompressionMiddleware)
+# outermost, so request timings include compression
+app.add_middleware(MetricsMiddleware)
 
 
-@app.get("/", tags=["root"])
-async def root() -> TheGrapefruitsDuo:
-    musicians, events, group = await gather(
-        controller.get_musicians(),
-        controller.get_events(),
-        controller.get_group(),
-    )
-    return TheGrapefruitsDuo(
-        version=get_version(),
-        group=group,
-        musicians=musicians,
-        events=events,
-    )
+@app.get("/", tags=["root"], response_model=TheGrapefruitsDuo)
+async def root(include: Optional[str] = None, fields: Optional[str] = None) -> Response:
+    """Returns the group, musicians and all event series.
+
+    `include` (e.g. `events,group`) limits the response to some sections, which skips querying the others.
+    `fields` selects only some fields of each section, qualified by section, e.g.
+    `musicians.name,events.name,events.events.time`; key fields are always returned.
+    """
+    if include is None and fields is None:
+        # served pre-serialized from the snapshot materialized at write time
+        return Response(
+            content=await controller.get_root(), media_type="application/json"
+        )
+    root = await controller.get_root_fields(parse_include(include), split_csv(fields))
+    return JSONResponse(jsonable_encoder(root))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Returns this worker's metrics in the Prometheus text format."""
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
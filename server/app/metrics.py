@@ -0,0 +1,411 @@
+import inspect
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
+
+from app import server_timing
+
+# seconds; from a cached lookup to a slow external call
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[str, ...]
+
+
+class Metric:
+    """
+    Base class of the metric types. Values are kept per combination of label values.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = Lock()
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def _sample(self, name: str, values: Labels, value: float, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        labels = f"{{{','.join(pairs)}}}" if pairs else ""
+        return f"{name}{labels} {_number(value)}"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            yield self._sample(self.name, values, value)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, *values: str, value: float) -> None:
+        with self._lock:
+            self._values[values] = value
+
+    def dec(self, *values: str, amount: float = 1.0) -> None:
+        self.inc(*values, amount=-amount)
+
+
+class Collected(Metric):
+    """
+    A metric whose values are read from elsewhere (e.g. counters an object already keeps) when rendered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labels: Labels,
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.type = type
+        self.collect = collect
+
+    def _samples(self) -> Iterator[str]:
+        for values, value in self.collect():
+            yield self._sample(self.name, values, value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # per label values: a count per bucket (the last is +Inf), and the sum
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if (series := self._values.get(values)) is None:
+                series = self._values[values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, *values: str) -> "Timer":
+        """
+        :return Timer: A context manager observing the duration of its block
+        """
+        return Timer(self, values)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                yield self._sample(
+                    f"{self.name}_bucket", values, cumulative, f'le="{le}"'
+                )
+            yield self._sample(f"{self.name}_sum", values, total)
+            yield self._sample(f"{self.name}_count", values, cumulative)
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, values: Labels) -> None:
+        self.histogram = histogram
+        self.values = values
+
+    def __enter__(self) -> "Timer":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(perf_counter() - self.start, *self.values)
+
+
+class Registry:
+    """
+    Holds every metric of the process and renders them in the Prometheus text exposition format.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Labels = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Labels = ()) -> Histogram:
+        return self.register(Histogram(name, help, labels))
+
+    def collected(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labels: Labels,
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+    ) -> Collected:
+        return self.register(Collected(name, help, type, labels, collect))
+
+    def render(self) -> str:
+        return "".join(
+            f"{line}\n" for metric in self.metrics.values() for line in metric.render()
+        )
+
+
+registry = Registry()
+
+HTTP_SECONDS = registry.histogram(
+    "tgd_http_request_duration_seconds",
+    "Time to serve a request, by route template",
+    ("method", "route", "status"),
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "tgd_db_query_duration_seconds",
+    "Time spent in each query method, including fetching its rows",
+    ("query",),
+)
+DB_CONNECTIONS_OPEN = registry.gauge(
+    "tgd_db_connections_open", "Database connections currently open"
+)
+DB_CONNECTIONS_OPENED = registry.counter(
+    "tgd_db_connections_opened_total", "Database connections opened", ("mode",)
+)
+CONTROLLER_SECONDS = registry.histogram(
+    "tgd_controller_duration_seconds",
+    "Time spent in each MainController method",
+    ("method",),
+)
+AUTH_SECONDS = registry.histogram(
+    "tgd_auth_duration_seconds", "Time to verify an OAuth token"
+)
+EXTERNAL_SECONDS = registry.histogram(
+    "tgd_external_call_duration_seconds",
+    "Time spent calling external services",
+    ("service", "call"),
+)
+EXTERNAL_ERRORS = registry.counter(
+    "tgd_external_call_errors_total",
+    "External service calls which raised",
+    ("service", "call"),
+)
+
+
+def timed(histogram: Histogram, *values: str, phase: str | None = None) -> Callable:
+    """
+    Decorates a function (sync, async, or returning a generator) to observe its duration.
+    Generators are timed until they are exhausted or closed.
+
+    :param Histogram histogram: The histogram to observe
+    :param str values: The label values of every observation
+    :param str | None phase: The Server-Timing phase the calls belong to, if any
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        return _wrap(fn, lambda _: (histogram, values), phase)
+
+    return decorator
+
+
+def external(service: str, call: str) -> Callable:
+    """
+    Decorates a blocking call to an external service to observe its duration and count its failures.
+
+    :param str service: The service, e.g. `cloudinary`
+    :param str call: The operation, e.g. `upload`
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with EXTERNAL_SECONDS.time(service, call):
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    EXTERNAL_ERRORS.inc(service, call)
+                    raise
+
+        return wrapper
+
+    return decorator
+
+
+def timed_methods(
+    cls: type,
+    histogram: Histogram,
+    names: Iterable[str] | None = None,
+    phase: str | None = None,
+) -> type:
+    """
+    Wraps the public methods a class defines (or the given ones) to observe their durations,
+    labelled `Class.method` by the class of the instance they are called on.
+
+    :param type cls: The class to instrument
+    :param Histogram histogram: The histogram to observe, with a single label
+    :param Iterable[str] | None names: The methods to wrap, defaults to every public function the class defines
+    :param str | None phase: The Server-Timing phase the calls belong to, if any
+    :return type: The class, instrumented in place
+    """
+    if names is None:
+        names = [
+            name
+            for name, attr in vars(cls).items()
+            if not name.startswith("_") and inspect.isfunction(attr)
+        ]
+    for name in names:
+        fn = vars(cls)[name]
+        setattr(cls, name, _wrap(fn, _method_labels(histogram, name), phase))
+    return cls
+
+
+def _method_labels(histogram: Histogram, name: str) -> Callable:
+    labels: dict[type, tuple[Histogram, Labels]] = {}
+
+    def labels_for(args: tuple) -> tuple[Histogram, Labels]:
+        cls = type(args[0])
+        if (found := labels.get(cls)) is None:
+            found = labels[cls] = (histogram, (f"{cls.__name__}.{name}",))
+        return found
+
+    return labels_for
+
+
+def _wrap(
+    fn: Callable,
+    labels_for: Callable[[tuple], tuple[Histogram, Labels]],
+    phase: str | None = None,
+):
+    if inspect.iscoroutinefunction(fn):
+
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            phases = _enter(phase)
+            start = perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram, values = labels_for(args)
+                histogram.observe(perf_counter() - start, *values)
+                if phases is not None:
+                    phases.leave(phase)  # type: ignore
+
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        phases = _enter(phase)
+        start = perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            histogram, values = labels_for(args)
+            histogram.observe(perf_counter() - start, *values)
+            if phases is not None:
+                phases.leave(phase)  # type: ignore
+            raise
+        if inspect.isgenerator(result):
+            if phases is not None:
+                phases.leave(phase)  # type: ignore
+            return _timed_generator(
+                result, perf_counter() - start, *labels_for(args), phases, phase
+            )
+        histogram, values = labels_for(args)
+        histogram.observe(perf_counter() - start, *values)
+        if phases is not None:
+            phases.leave(phase)  # type: ignore
+        return result
+
+    return wrapper
+
+
+def _enter(phase: str | None) -> server_timing.Phases | None:
+    # only a context variable lookup unless the request is recording its phases
+    if phase is None or (phases := server_timing.current()) is None:
+        return None
+    phases.enter(phase)
+    return phases
+
+
+def _timed_generator(
+    generator,
+    elapsed: float,
+    histogram: Histogram,
+    values: Labels,
+    phases: server_timing.Phases | None,
+    phase: str | None,
+):
+    # only the time spent producing each item counts, not the caller's work between items
+    try:
+        while True:
+            if phases is not None:
+                phases.enter(phase)  # type: ignore
+            start = perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += perf_counter() - start
+                if phases is not None:
+                    phases.leave(phase)  # type: ignore
+            yield item
+    finally:
+        generator.close()
+        histogram.observe(elapsed, *values)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(value)
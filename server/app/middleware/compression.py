@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from hashlib import sha256
+from os import getenv
+from threading import Lock
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.compression import brotli_bytes, gzip_bytes
+from app.metrics import registry
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson")
+
+CACHE_LOOKUPS = registry.counter(
+    "tgd_compression_cache_lookups_total",
+    "Compressed body cache lookups, by result",
+    ("result",),
+)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    Picks the best supported encoding from an Accept-Encoding header, preferring brotli.
+    A coding refused with q=0 is never picked, even if `*` is accepted.
+
+    :param str accept_encoding: The request's Accept-Encoding header
+    :return str | None: "br", "gzip", or None to send the body uncompressed
+    """
+    accepted, refused = set(), set()
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else refused).add(coding.strip().lower())
+    wildcard = "*" in accepted
+    for coding in ("br", "gzip"):
+        if coding in accepted or (wildcard and coding not in refused):
+            return coding
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, as negotiated with the client.
+
+    Compressed bodies of GET responses are cached by the digest of the uncompressed body,
+    so an unchanged response (e.g. the GET / snapshot) is compressed once per data version
+    rather than once per request. Streamed responses are passed through uncompressed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int | None = None,
+        gzip_level: int | None = None,
+        brotli_quality: int | None = None,
+        cache_size: int | None = None,
+    ) -> None:
+        """
+        :param ASGIApp app: The app to wrap
+        :param int | None min_size: Bodies smaller than this many bytes are sent uncompressed, defaults to COMPRESSION_MIN_SIZE or 500
+        :param int | None gzip_level: gzip level 1-9, defaults to GZIP_LEVEL or 6
+        :param int | None brotli_quality: brotli quality 0-11, defaults to BROTLI_QUALITY or 6
+        :param int | None cache_size: The number of compressed bodies kept, defaults to COMPRESSION_CACHE_SIZE or 128
+        """
+        self.app = app
+        self.min_size = _setting(min_size, "COMPRESSION_MIN_SIZE", 500)
+        self.gzip_level = _setting(gzip_level, "GZIP_LEVEL", 6)
+        self.brotli_quality = _setting(brotli_quality, "BROTLI_QUALITY", 6)
+        self.cache_size = _setting(cache_size, "COMPRESSION_CACHE_SIZE", 128)
+        self._cache: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+        self._lock = Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        cacheable = scope["method"] in ("GET", "HEAD")
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # held until the body shows whether it can be compressed
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start)
+            if message.get("more_body", False) or not self._compressible(
+                start["status"], headers, body
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            # the body would be compressed for another client, so caches must key on the header
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None:
+                await send(start)
+                await send(message)
+                return
+            compressed = self._compress(encoding, body, cacheable)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        return (
+            status == 200
+            and "content-encoding" not in headers
+            and len(body) >= self.min_size
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def _compress(self, encoding: str, body: bytes, cacheable: bool) -> bytes:
+        """
+        Compresses a body, reusing the cached result for an identical body.
+
+        :param str encoding: "br" or "gzip"
+        :param bytes body: The uncompressed body
+        :param bool cacheable: Whether to look up and store the result in the cache
+        :return bytes: The compressed body
+        """
+        if not cacheable or self.cache_size <= 0:
+            return self._encode(encoding, body)
+        key = (encoding, sha256(body).digest())
+        with self._lock:
+            if (compressed := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                CACHE_LOOKUPS.inc("hit")
+                return compressed
+        CACHE_LOOKUPS.inc("miss")
+        compressed = self._encode(encoding, body)
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def _encode(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli_bytes(body, self.brotli_quality)
+        return gzip_bytes(body, self.gzip_level)
+
+
+def _setting(value: int | None, env: str, default: int) -> int:
+    return value if value is not None else int(getenv(env, str(default)))
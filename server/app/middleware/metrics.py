@@ -0,0 +1,45 @@
+from time import perf_counter
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import HTTP_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Observes the time to serve each request, labelled by the route template
+    (e.g. `/events/{id}`) rather than the path, so the number of series stays bounded.
+
+    Server-sent event streams stay open until the client leaves, so they are not observed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                streaming = content_type.startswith("text/event-stream")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            if not streaming:
+                # set by the router once a route matches
+                route = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_SECONDS.observe(
+                    perf_counter() - start, scope["method"], route, str(status)
+                )
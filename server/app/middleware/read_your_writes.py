@@ -0,0 +1,65 @@
+from math import isfinite
+from os import getenv
+from time import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db import routing
+
+STICKY_COOKIE = "tgd_primary_until"
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keeps a client's reads on the primary database for a short window after it writes,
+    so an admin session sees its own changes before they reach the read replicas.
+
+    The window is carried in a cookie set on any response whose request wrote to the database.
+    The cookie is not signed, so it is never trusted for longer than the window itself.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float | None = None) -> None:
+        self.app = app
+        self.sticky_seconds = (
+            sticky_seconds
+            if sticky_seconds is not None
+            else float(getenv("DB_STICKY_SECONDS", "10"))
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = routing.begin_request(self.primary_until(scope))
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.wrote:
+                until = time() + self.sticky_seconds
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until:.3f}; Max-Age={int(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; Secure; SameSite=None",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    def primary_until(self, scope: Scope) -> float:
+        """
+        Reads the client's sticky window from its cookie.
+
+        :param Scope scope: The request scope
+        :return float: Unix time until which reads go to the primary, at most `sticky_seconds` from now;
+            0 if the cookie is missing or not a number
+        """
+        try:
+            until = float(HTTPConnection(scope).cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return 0.0
+        if not isfinite(until):
+            return 0.0
+        return min(until, time() + self.sticky_seconds)
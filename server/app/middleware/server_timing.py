@@ -0,0 +1,42 @@
+from time import perf_counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import server_timing
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header breaking each response down into phases: `auth` (token verification),
+    `db` (query methods), `build` (the rest of the controller call, e.g. constructing models)
+    and `encode` (from the controller returning to the response being sent, i.e. serialization).
+
+    Disabled unless SERVER_TIMING is set, in which case requests are passed through untouched
+    and the timed functions skip recording.
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool | None = None) -> None:
+        """
+        :param ASGIApp app: The app to wrap
+        :param bool | None enabled: Whether to add the header, defaults to SERVER_TIMING
+        """
+        self.app = app
+        self.enabled = enabled if enabled is not None else server_timing.SERVER_TIMING
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases = server_timing.begin()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if (built := phases.ended("build")) is not None:
+                    phases.durations["encode"] = perf_counter() - built
+                if header := phases.header():
+                    MutableHeaders(scope=message).append("server-timing", header)
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,59 @@
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from app.constants import MAX_BATCH_OPERATIONS
+from app.models.event import EventSeries
+from app.models.group import Group
+from app.models.musician import Musician
+
+
+class UpdateMusicianBio(BaseModel):
+    op: Literal["update_musician_bio"]
+    musician_id: int
+    bio: str
+
+
+class UpdateGroupBio(BaseModel):
+    op: Literal["update_group_bio"]
+    bio: str
+
+
+class UpdateLivestream(BaseModel):
+    op: Literal["update_livestream"]
+    livestream_id: str
+
+
+class UpdateSeries(BaseModel):
+    op: Literal["update_series"]
+    series: EventSeries
+
+
+class DeleteSeries(BaseModel):
+    op: Literal["delete_series"]
+    series_id: int
+
+
+Operation = Annotated[
+    Union[
+        UpdateMusicianBio, UpdateGroupBio, UpdateLivestream, UpdateSeries, DeleteSeries
+    ],
+    Field(discriminator="op"),
+]
+
+
+class Batch(BaseModel):
+    """
+    Admin writes applied together, in order, in one transaction.
+    """
+
+    operations: list[Operation] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class OperationResult(BaseModel):
+    """
+    The object an operation wrote, as its single endpoint would return it (None for deletes).
+    """
+
+    op: str
+    result: Optional[Union[Musician, Group, EventSeries]] = None
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from app.models.event import EventSeries
+from app.models.group import Group
+from app.models.musician import Musician
+
+# the TheGrapefruitsDuo section an entity belongs to; changes to an event are logged against its series
+Entity = Literal["group", "musicians", "events"]
+
+
+class ChangeEntry(BaseModel):
+    """
+    One row of the change log. Versions increase monotonically across all entities.
+    """
+
+    version: int
+    entity: Entity
+    entity_id: int
+    op: Literal["upsert", "delete"]
+    changed_at: datetime
+
+
+class Tombstone(BaseModel):
+    """
+    Marks an entity deleted since the client's version.
+    """
+
+    entity: Entity
+    id: int
+    version: int
+
+
+class Changes(BaseModel):
+    """
+    Everything that changed since a client's version. Upserted entities are returned whole.
+    When `full` is true the client's version was unknown, every entity is returned,
+    and the client should replace its copy instead of merging.
+    """
+
+    version: int
+    full: bool = False
+    group: Optional[Group] = None
+    musicians: list[Musician] = []
+    events: list[EventSeries] = []
+    deleted: list[Tombstone] = []
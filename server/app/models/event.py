@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 
 from fastapi import UploadFile
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, ConfigDict, HttpUrl, field_validator
 
 
 class Poster(BaseModel):
@@ -50,3 +50,46 @@ class EventSeries(NewEventSeries):
     series_id: int
     events: list[Event]
     poster_id: Optional[str] = None
+
+
+class EventPatch(BaseModel):
+    """
+    A JSON Merge Patch (RFC 7396) of one existing event: only supplied fields are changed,
+    and null removes an optional URL.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    event_id: int
+    location: Optional[str] = None
+    time: Optional[datetime] = None
+    map_url: Optional[HttpUrl] = None
+    ticket_url: Optional[HttpUrl] = None
+
+    @field_validator("location", "time")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
+
+
+class SeriesPatch(BaseModel):
+    """
+    A JSON Merge Patch (RFC 7396) of an EventSeries: only supplied fields are changed.
+    Events are matched by `event_id`; events not listed are left as they are.
+    The poster is changed through its own endpoint.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    name: Optional[str] = None
+    description: Optional[str] = None
+    events: Optional[list[EventPatch]] = None
+
+    @field_validator("name", "description", "events")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
@@ -0,0 +1,26 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+# what a bulk import does with a series whose name already exists
+OnConflict = Literal["error", "skip", "upsert"]
+
+
+class RowError(BaseModel):
+    """
+    A problem with one row of a bulk import: the 1-based position in a JSON array,
+    or the line number in a CSV file.
+    """
+
+    row: int
+    detail: str
+
+
+class ImportResult(BaseModel):
+    """
+    The outcome of a bulk import, which is applied entirely or not at all.
+    """
+
+    created: list[int] = []
+    updated: list[int] = []
+    skipped: list[str] = []
@@ -0,0 +1,10 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class Snapshot(BaseModel):
+    name: str
+    body: str  # serialized response body
+    created_at: datetime
+    version: int = 0  # the change log version the body was built from
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.admin import oauth2_http
+from app.models.batch import Batch, OperationResult
+from app.routers import controller
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+)
+
+
+@router.post("/", status_code=status.HTTP_200_OK)
+async def batch(
+    batch: Batch, token: HTTPAuthorizationCredentials = Depends(oauth2_http)
+) -> list[OperationResult]:
+    """Applies several admin writes at once: `update_musician_bio`, `update_group_bio`,
+    `update_livestream`, `update_series` and `delete_series`, each selected by its `op` field.
+    Operations run in order in one transaction, so either all of them are applied or, if one fails,
+    none is; the error names the index of the failing operation. Requires authentication.
+    """
+    return await controller.batch(batch, token)
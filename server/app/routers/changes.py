@@ -0,0 +1,19 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, status
+
+from app.models.changes import Changes
+from app.routers import controller
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+)
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_changes(since: Optional[int] = Query(default=None, ge=0)) -> Changes:
+    """Returns everything changed after version `since`, with tombstones for deleted entities.
+    Send back the returned `version` on the next request. Without `since`, or when it is unknown,
+    every entity is returned and `full` is true."""
+    return await controller.get_changes(since)
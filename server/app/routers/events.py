@@ -1,9 +1,29 @@
-from fastapi import APIRouter, Depends, File, UploadFile
+from datetime import datetime
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
 from icecream import ic
 
 from app.admin import oauth2_http
-from app.models.event import EventSeries, NewEventSeries
+from app.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.controllers.fieldsets import series_fields, split_csv
+from app.controllers.pagination import decode_cursor, encode_cursor
+from app.models.event import EventSeries, NewEventSeries, SeriesPatch
+from app.models.imports import ImportResult, OnConflict
 from app.routers import controller
 
 router = APIRouter(
@@ -14,8 +34,85 @@ router = APIRouter(
 
 
 @router.get("/")
-async def get_events() -> list[EventSeries]:
-    return await controller.get_events()
+async def get_events(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    events_limit: Optional[int] = Query(default=None, ge=1),
+    start: Optional[datetime] = Query(default=None, alias="from"),
+    end: Optional[datetime] = Query(default=None, alias="to"),
+    fields: Optional[str] = None,
+) -> list[EventSeries]:
+    """Returns all series with their events, ordered by series ID.
+
+    Passing `limit` and/or `after` switches to keyset pagination: `after` is the opaque cursor
+    from the previous page's `Link: <...>; rel="next"` header. `events_limit` caps the number of
+    events returned per series (earliest first). `from` (inclusive) and `to` (exclusive) limit
+    events to a time window and drop series with no events inside it.
+    Without any of these, every series is returned.
+
+    `fields` selects only some fields of every series, e.g. `name,poster_id` (no events are queried),
+    `name,events` (all event fields) or `name,events.time`; `series_id` and `event_id` are always returned.
+    It cannot be combined with pagination or filters.
+    """
+    paged = any(p is not None for p in (after, limit, events_limit, start, end))
+    if fields is not None:
+        if paged:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="'fields' cannot be combined with pagination or filters",
+            )
+        series = await controller.get_events(*series_fields(split_csv(fields)))
+        return JSONResponse(jsonable_encoder(series))  # type: ignore
+    if not paged:
+        return await controller.get_events()
+    if limit is None and after is not None:
+        limit = DEFAULT_PAGE_SIZE
+    after_id = decode_cursor(after) if after is not None else None
+    page, next_after = await controller.get_events_page(
+        after_id, limit, events_limit, start, end
+    )
+    if next_after is not None:
+        next_url = request.url.include_query_params(
+            after=encode_cursor(next_after), limit=limit
+        )
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return page
+
+
+@router.get("/upcoming")
+async def get_upcoming_events() -> list[EventSeries]:
+    """Returns only series with future events (and only those events), soonest first."""
+    return await controller.get_upcoming_events()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_events() -> StreamingResponse:
+    """Streams every series with its events as NDJSON, one series per line, ordered by series ID.
+    The first line is sent as soon as it is read, and the export is never held in memory.
+    """
+    return StreamingResponse(
+        controller.export_events(), media_type="application/x-ndjson"
+    )
+
+
+@router.get("/calendar.ics", response_class=Response)
+async def get_calendar(
+    if_none_match: Optional[str] = Header(default=None),
+    if_modified_since: Optional[str] = Header(default=None),
+) -> Response:
+    """An iCalendar feed of upcoming events (from the start of today), for calendar subscriptions.
+    Supports conditional requests with ETag and Last-Modified."""
+    calendar = await controller.get_calendar()
+    headers = controller.calendar_headers(calendar)
+    if controller.calendar_not_modified(headers, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=calendar.body,
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
 
 
 @router.get("/{id}")
@@ -31,6 +128,26 @@ async def create_series(
     return await controller.create_event(series, token)
 
 
+@router.post("/import")
+async def import_series(
+    request: Request,
+    on_conflict: OnConflict = "error",
+    token: HTTPAuthorizationCredentials = Depends(oauth2_http),
+) -> ImportResult:
+    """Creates many series at once from a JSON array of series (`application/json`) or a CSV file
+    (`text/csv`) with the columns name, description, location, time, map_url and ticket_url,
+    one event per line. Nothing is written unless every row is valid; invalid rows are reported
+    with their position. `on_conflict` decides what happens to series whose name already exists:
+    `error` (rejects the import), `skip`, or `upsert` (replaces the description and events).
+    Requires authentication."""
+    return await controller.import_series(
+        request.headers.get("content-type", ""),
+        await request.body(),
+        on_conflict,
+        token,
+    )
+
+
 @router.delete("/{id}")
 async def delete_event(
     id: int, token: HTTPAuthorizationCredentials = Depends(oauth2_http)
@@ -54,3 +171,15 @@ async def update_event(
     token: HTTPAuthorizationCredentials = Depends(oauth2_http),
 ) -> EventSeries:
     return await controller.update_series(id, event, token)
+
+
+@router.patch("/{id}")
+async def patch_event(
+    id: int,
+    patch: SeriesPatch,
+    token: HTTPAuthorizationCredentials = Depends(oauth2_http),
+) -> EventSeries:
+    """Changes only the supplied fields (JSON Merge Patch): `name`, `description`, and events
+    listed by `event_id` with only the fields to change (null removes `map_url` or `ticket_url`).
+    Events which are not listed are kept. Requires authentication."""
+    return await controller.patch_series(id, patch, token)
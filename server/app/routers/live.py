@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, status
+from fastapi.responses import StreamingResponse
+
+from app.controllers import broadcaster
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+)
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def live(
+    last_event_id: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """A server-sent event stream of data changes, named after the section which changed
+    (`group`, `musicians` or `events`) with the changed entity's `id` and `op`; `group` events
+    also carry the `livestream_id`. A `resync` event means notifications were missed and the
+    client should reload, e.g. from GET /changes. Reconnecting clients which send Last-Event-ID
+    are first sent what they missed."""
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+    sub = broadcaster.subscribe(last_id)
+    return StreamingResponse(
+        broadcaster.stream(sub),
+        media_type="text/event-stream",
+        # stops NGINX from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,13 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, UploadFile, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials
 from icecream import ic
 
 from app.admin import oauth2_http
+from app.controllers.fieldsets import split_csv
 from app.models.musician import Musician
 from app.routers import controller
 
@@ -14,8 +19,12 @@ router = APIRouter(
 
 
 @router.get("/", status_code=status.HTTP_200_OK)
-async def get_musicians() -> list[Musician]:
-    return await controller.get_musicians()
+async def get_musicians(fields: Optional[str] = None) -> list[Musician]:
+    """Returns all musicians. `fields` (e.g. `name,headshot_id`) selects only some fields; `id` is always returned."""
+    if fields is None:
+        return await controller.get_musicians()
+    musicians = await controller.get_musicians(split_csv(fields))
+    return JSONResponse(jsonable_encoder(musicians))  # type: ignore
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
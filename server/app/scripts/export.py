@@ -0,0 +1,29 @@
+import os
+from argparse import ArgumentParser
+
+from dotenv import load_dotenv
+
+from app.controllers import exporter, snapshot_controller
+
+
+def main() -> None:
+    load_dotenv()
+    parser = ArgumentParser(
+        prog="export",
+        description="Render the public API to precompressed JSON files for a static host.",
+    )
+    parser.add_argument(
+        "--out",
+        default=os.getenv("EXPORT_DIR") or "export",
+        help="the directory to write to, defaults to EXPORT_DIR or ./export",
+    )
+    args = parser.parse_args()
+
+    # the database may have been edited outside the API since the snapshot was built
+    snapshot_controller.build()
+    manifest = exporter.export(args.out)
+    print(f"Exported {len(manifest['routes'])} routes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from argparse import ArgumentParser
+
+from dotenv import load_dotenv
+
+from app.db.migrations import MigrationRunner
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="migrate",
+        description="Manage schema migrations without dropping any data.",
+    )
+    parser.add_argument(
+        "command", choices=["apply", "rollback", "status"], nargs="?", default="status"
+    )
+    parser.add_argument(
+        "--to",
+        type=int,
+        default=None,
+        help="apply: the last version to apply. rollback: the version to roll back to.",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    runner = MigrationRunner()
+
+    if args.command == "status":
+        for migration, applied in runner.status():
+            mark = "x" if applied else " "
+            print(f"[{mark}] {migration.version}: {migration.name}")
+        return
+
+    if args.command == "apply":
+        done = runner.apply(args.to)
+        verb = "Applied"
+    else:
+        done = runner.rollback(args.to)
+        verb = "Rolled back"
+
+    if not done:
+        print("Nothing to do")
+    for migration in done:
+        print(f"{verb} {migration.version}: {migration.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,26 @@
+from argparse import ArgumentParser
 from datetime import datetime
 
 from dotenv import load_dotenv
 
 from app.constants import (
+    CHANGE_LOG_TABLE,
     EVENT_TABLE,
     GROUP_TABLE,
+    MIGRATIONS_TABLE,
     MUSICIAN_TABLE,
     SERIES_TABLE,
+    SNAPSHOT_TABLE,
     USER_TABLE,
 )
+from app.controllers import calendar_controller, snapshot_controller
 from app.db.conn import connect_db
+from app.db.migrations import MigrationRunner
 from app.models.event import Event, EventSeries
 from app.models.group import Group
 from app.models.musician import NewMusician
 from app.models.user import User
+from app.scripts.synthetic import Scale, insert_synthetic
 
 margarite: NewMusician = NewMusician(
     name="Margarite Waddell",
@@ -83,7 +90,7 @@ series1 = EventSeries(
 )
 
 
-def seed():
+def seed(scale: Scale | None = None, random_seed: int = 0):
     confirmation = input(
         "Are you sure you want to seed the database? Data will be lost. [Y/n]: "
     )
@@ -91,10 +98,18 @@ def seed():
         print("Exiting without changes")
         return
     print("Seeding database")
+    populate(scale, random_seed)
+
+
+def populate(scale: Scale | None = None, random_seed: int = 0):
     add_musicians()
     add_users()
     add_group()
     add_events()
+    add_migrations()
+    if scale is not None:
+        add_synthetic(scale, random_seed)
+    add_snapshot()
 
 
 def add_group():
@@ -112,6 +127,8 @@ def add_group():
             id INT NOT NULL AUTO_INCREMENT,
             name VARCHAR(255) NOT NULL,
             bio TEXT NOT NULL,
+            livestream_id VARCHAR(255) NOT NULL DEFAULT '',
+            livestream_program_cld_id VARCHAR(255),
             PRIMARY KEY (id)
         );
         """
@@ -267,9 +284,67 @@ def add_events():
     cursor.close()
 
 
+def add_migrations():
+    print("Applying migrations")
+    # the tables were just recreated without any migration applied, so every migration must run again;
+    # tables created by migrations describe the old data and are recreated too
+    db = connect_db()
+    cursor = db.cursor()
+    for table in (MIGRATIONS_TABLE, SNAPSHOT_TABLE, CHANGE_LOG_TABLE):
+        cursor.execute(f"DROP TABLE IF EXISTS {table};")
+    db.commit()
+    cursor.close()
+    for migration in MigrationRunner().apply():
+        print(f"  {migration.version}: {migration.name}")
+
+
+def add_snapshot():
+    print("Materializing snapshots")
+    snapshot_controller.build()
+    calendar_controller.build()
+
+
+def add_synthetic(scale: Scale, random_seed: int):
+    print(f"Adding synthetic data {scale} with seed {random_seed}")
+    db = connect_db()
+    for table, count in insert_synthetic(db, scale, random_seed).items():
+        print(f"  {table}: {count} rows")
+    db.close()
+
+
 def main():
+    parser = ArgumentParser(prog="seed", description="Recreate and seed the database.")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=None,
+        help="also generate N series (with events), N/10 users and N/100 musicians for load testing",
+    )
+    parser.add_argument("--series", type=int, help="override the number of series")
+    parser.add_argument("--users", type=int, help="override the number of users")
+    parser.add_argument(
+        "--musicians", type=int, help="override the number of musicians"
+    )
+    parser.add_argument(
+        "--random-seed",
+        type=int,
+        default=0,
+        help="seed for the generator; the same seed always produces the same data",
+    )
+    args = parser.parse_args()
+
+    scale = None
+    if args.scale is not None:
+        scale = Scale.from_factor(args.scale)
+        overrides = {
+            field: getattr(args, field)
+            for field in Scale._fields
+            if getattr(args, field) is not None
+        }
+        scale = scale._replace(**overrides)
+
     load_dotenv()
-    seed()
+    seed(scale, args.random_seed)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+from random import Random
+from typing import Iterator, NamedTuple
+
+from mysql.connector.connection import MySQLConnection
+
+from app.constants import EVENT_TABLE, MUSICIAN_TABLE, SERIES_TABLE, USER_TABLE
+
+# rows sent per multi-row INSERT; keeps each statement well under max_allowed_packet
+INSERT_BATCH_SIZE = 1000
+
+COMPOSERS = [
+    "Danzi",
+    "Gomez",
+    "Gounod",
+    "Grant",
+    "Rusnak",
+    "Still",
+    "Adams",
+    "Bartok",
+    "Strauss",
+    "Schumann",
+    "Saint-Saëns",
+    "Dukas",
+    "Poulenc",
+    "Beethoven",
+    "Hindemith",
+]
+TITLES = ["Presents", "in Recital", "Live", "Plays", "Premieres", "Salon Series"]
+VENUES = [
+    "First Presbyterian Church",
+    "Unitarian Fellowship Hall",
+    "Community Arts Center",
+    "Public Library Auditorium",
+    "Old Town Theater",
+    "University Recital Hall",
+    "Winery Tasting Room",
+]
+CITIES = [
+    "Eugene",
+    "Portland",
+    "Medford",
+    "Newport",
+    "Corvallis",
+    "Salem",
+    "Ashland",
+    "Bend",
+    "Seattle",
+    "Olympia",
+]
+WORDS = (
+    "horn piano duo chamber music premiere recital symphony orchestra season program "
+    "commission composer concerto sonata student masterclass festival performance ensemble "
+    "northwest oregon washington conservatory repertoire contemporary classical tour"
+).split()
+# most series have a handful of dates, a few have long runs
+EVENTS_PER_SERIES = [0, 1, 2, 3, 4, 5, 8, 12]
+EVENTS_PER_SERIES_WEIGHTS = [2, 10, 20, 25, 18, 12, 8, 5]
+
+
+class Scale(NamedTuple):
+    """
+    Row volumes for one generated dataset.
+    """
+
+    series: int
+    users: int
+    musicians: int
+
+    @classmethod
+    def from_factor(cls, n: int) -> "Scale":
+        """
+        Derives table volumes from a single scale factor: n series (each with ~3.5 events on average),
+        one user per ten series and one musician per hundred series.
+
+        :param int n: The scale factor
+        :return Scale: The volumes
+        """
+        return cls(series=n, users=max(1, n // 10), musicians=max(1, n // 100))
+
+
+def _sentence(rng: Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text.capitalize() + "."
+
+
+def _paragraph(rng: Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 20)) for _ in range(sentences))
+
+
+def _batched(rows: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    batch: list[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def series_rows(
+    rng: Random, count: int, first_id: int
+) -> Iterator[tuple[int, str, str, str | None]]:
+    for series_id in range(first_id, first_id + count):
+        pieces = ", ".join(rng.sample(COMPOSERS, rng.randint(2, 5)))
+        name = f"The Grapefruits Duo {rng.choice(TITLES)} #{series_id}"
+        description = f"Pieces by {pieces}! {_paragraph(rng, rng.randint(0, 3))}"
+        poster_id = f"synthetic_poster_{series_id}" if rng.random() < 0.7 else None
+        yield series_id, name, description, poster_id
+
+
+def event_rows(
+    rng: Random, first_series_id: int, count: int, now: datetime
+) -> Iterator[tuple[int, str, datetime, str | None, str | None]]:
+    """
+    Events cluster in runs of a few weeks, spread from five years ago to two years ahead,
+    mostly on evenings and weekend afternoons.
+    """
+    for series_id in range(first_series_id, first_series_id + count):
+        n_events = rng.choices(EVENTS_PER_SERIES, EVENTS_PER_SERIES_WEIGHTS)[0]
+        start = now + timedelta(days=rng.randint(-5 * 365, 2 * 365))
+        for i in range(n_events):
+            day = start + timedelta(days=i * rng.randint(2, 10))
+            hour = rng.choice([14, 15, 16, 19, 19, 19, 20])
+            time = day.replace(hour=hour, minute=0, second=0, microsecond=0)
+            location = f"{rng.choice(VENUES)}, {rng.choice(CITIES)}"
+            ticket_url = (
+                f"https://tickets.example.com/events/{series_id}-{i}"
+                if rng.random() < 0.6
+                else None
+            )
+            map_url = (
+                f"https://maps.example.com/?q={series_id}-{i}"
+                if rng.random() < 0.5
+                else None
+            )
+            yield series_id, location, time, ticket_url, map_url
+
+
+def user_rows(rng: Random, count: int) -> Iterator[tuple[str, str, str | None]]:
+    for i in range(count):
+        name = f"{rng.choice(COMPOSERS)} Fan {i}"
+        email = f"user{i}@example.com"
+        sub = f"{rng.getrandbits(64):016x}" if rng.random() < 0.5 else None
+        yield name, email, sub
+
+
+def musician_rows(rng: Random, count: int) -> Iterator[tuple[str, str, str]]:
+    for i in range(count):
+        name = f"Synthetic Musician {i}"
+        bio = _paragraph(rng, rng.randint(5, 12))  # bios are the longest text we serve
+        yield name, bio, f"synthetic_headshot_{i}"
+
+
+def insert_synthetic(
+    db: MySQLConnection, scale: Scale, seed: int = 0
+) -> dict[str, int]:
+    """
+    Inserts a synthetic dataset for load and scale testing with batched multi-row INSERTs.
+    Generation is deterministic: the same scale and seed always produce the same rows,
+    so benchmark results are comparable across runs.
+    Series IDs are assigned explicitly after the current maximum so events can reference them
+    without reading IDs back.
+
+    :param MySQLConnection db: An open database connection
+    :param Scale scale: The number of rows to generate per table
+    :param int seed: The random seed; the same seed always yields the same data
+    :return dict[str, int]: The number of rows inserted per table
+    """
+    rng = Random(seed)
+    # fixed reference time so that "upcoming" vs "past" splits are reproducible too
+    now = datetime(2025, 1, 1) + timedelta(days=seed % 365)
+    cursor = db.cursor()
+    cursor.execute(f"SELECT COALESCE(MAX(series_id), 0) FROM {SERIES_TABLE}")
+    first_series_id = cursor.fetchone()[0] + 1
+
+    statements = [
+        (
+            SERIES_TABLE,
+            f"INSERT INTO {SERIES_TABLE} (series_id, name, description, poster_id) VALUES (%s, %s, %s, %s)",
+            series_rows(rng, scale.series, first_series_id),
+        ),
+        (
+            EVENT_TABLE,
+            f"INSERT INTO {EVENT_TABLE} (series_id, location, time, ticket_url, map_url) VALUES (%s, %s, %s, %s, %s)",
+            event_rows(rng, first_series_id, scale.series, now),
+        ),
+        (
+            USER_TABLE,
+            f"INSERT INTO {USER_TABLE} (name, email, sub) VALUES (%s, %s, %s)",
+            user_rows(rng, scale.users),
+        ),
+        (
+            MUSICIAN_TABLE,
+            f"INSERT INTO {MUSICIAN_TABLE} (name, bio, headshot_id) VALUES (%s, %s, %s)",
+            musician_rows(rng, scale.musicians),
+        ),
+    ]
+    counts: dict[str, int] = {}
+    for table, statement, rows in statements:
+        counts[table] = 0
+        for batch in _batched(rows, INSERT_BATCH_SIZE):
+            # executemany rewrites a simple INSERT into one multi-row statement per batch
+            cursor.executemany(statement, batch)
+            counts[table] += len(batch)
+        db.commit()
+    cursor.close()
+    return counts
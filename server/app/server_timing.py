@@ -0,0 +1,95 @@
+from contextvars import ContextVar
+from os import getenv
+from threading import Lock
+from time import perf_counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# off by default; when off no request records phases and the timed functions only check for one
+SERVER_TIMING = getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+# order of the phases in the header
+PHASES = ("auth", "db", "build", "encode")
+
+
+class Phases:
+    """
+    The time one request spent in each phase.
+
+    A phase's duration is the wall time during which at least one call of that phase was running,
+    so nested calls (a query method calling another) and concurrent ones (reads gathered by the
+    controller) are not counted twice.
+    """
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        # per running phase: the number of calls in it, and when the first started
+        self._running: dict[str, tuple[int, float]] = {}
+        self._ended: dict[str, float] = {}
+        # sync endpoints and queries run in worker threads, which share the request's Phases
+        self._lock = Lock()
+
+    def enter(self, phase: str) -> None:
+        with self._lock:
+            depth, start = self._running.get(phase, (0, 0.0))
+            self._running[phase] = (depth + 1, start if depth else perf_counter())
+
+    def leave(self, phase: str) -> None:
+        now = perf_counter()
+        with self._lock:
+            depth, start = self._running.pop(phase)
+            if depth > 1:
+                self._running[phase] = (depth - 1, start)
+                return
+            self.durations[phase] = self.durations.get(phase, 0.0) + now - start
+            self._ended[phase] = now
+
+    def ended(self, phase: str) -> float | None:
+        """
+        :param str phase: A phase
+        :return float | None: When the last call of the phase returned, if any did
+        """
+        return self._ended.get(phase)
+
+    def header(self) -> str:
+        """
+        Renders the Server-Timing header. `build` is reported without the time its controller
+        calls spent in `auth` and `db`, so the phases add up to the time spent in the app.
+
+        :return str: e.g. `auth;dur=40.1, db;dur=12.3, build;dur=3.2, encode;dur=0.8`
+        """
+        durations = dict(self.durations)
+        if "build" in durations:
+            durations["build"] = max(
+                0.0,
+                durations["build"]
+                - durations.get("auth", 0.0)
+                - durations.get("db", 0.0),
+            )
+        return ", ".join(
+            f"{phase};dur={durations[phase] * 1000:.1f}"
+            for phase in PHASES
+            if phase in durations
+        )
+
+
+_phases: ContextVar[Phases | None] = ContextVar("server_timing", default=None)
+
+
+def begin() -> Phases:
+    """
+    Starts recording the phases of the current request.
+
+    :return Phases: The request's phases, filled in by the timed functions it calls
+    """
+    phases = Phases()
+    _phases.set(phases)
+    return phases
+
+
+def current() -> Phases | None:
+    """
+    :return Phases | None: The phases of the current request, or None if it is not being recorded
+    """
+    return _phases.get()
@@ -0,0 +1,13 @@
+import pytest
+
+from app.scripts import seed
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Seeds a fresh SQLite database through the regular seed script."""
+    path = tmp_path / "tgd.sqlite3"
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DB_SQLITE_PATH", str(path))
+    seed.populate()
+    return path
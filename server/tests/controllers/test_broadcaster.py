@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.controllers.broadcaster import Broadcaster
+
+
+async def frames(stream, n: int) -> list[bytes]:
+    return [await anext(stream) for _ in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_fan_out():
+    """Tests that a published message reaches every open stream, preceded by the retry interval."""
+    broadcaster = Broadcaster(heartbeat=1)
+    streams = [broadcaster.stream(broadcaster.subscribe()) for _ in range(3)]
+    for stream in streams:
+        assert (await anext(stream)).startswith(b"retry: ")
+    message = broadcaster.publish("group", {"livestream_id": "abc"})
+    for stream in streams:
+        assert await anext(stream) == message.encode()
+        await stream.aclose()
+    assert broadcaster.subscribers == set()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat():
+    """Tests that idle streams are kept alive with comments."""
+    broadcaster = Broadcaster(heartbeat=0.01)
+    stream = broadcaster.stream(broadcaster.subscribe())
+    assert (await frames(stream, 2))[1] == b": ping\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_replay_and_resync():
+    """Tests that reconnecting clients get what they missed, or a resync when it is no longer kept."""
+    broadcaster = Broadcaster(replay_size=2)
+    first, second, third = (
+        broadcaster.publish("events", {"id": i, "op": "upsert"}) for i in range(3)
+    )
+    stream = broadcaster.stream(broadcaster.subscribe(second.id))
+    assert (await frames(stream, 2))[1] == third.encode()
+    await stream.aclose()
+
+    stream = broadcaster.stream(broadcaster.subscribe(first.id - 1))
+    assert b"event: resync" in (await frames(stream, 2))[1]
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_and_limit():
+    """Tests that an overflowing stream is told to resync, and that streams are capped."""
+    broadcaster = Broadcaster(queue_size=2, max_subscribers=1)
+    stream = broadcaster.stream(broadcaster.subscribe())
+    for i in range(3):
+        broadcaster.publish("musicians", {"id": i, "op": "upsert"})
+    assert b"event: resync" in (await frames(stream, 2))[1]
+    with pytest.raises(HTTPException) as e:
+        broadcaster.subscribe()
+    assert e.value.status_code == 503
+    await stream.aclose()
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.controllers import calendar_controller, event_controller
+from app.controllers.calendar import CalendarController, fold
+from app.main import app
+from app.models.event import Event, EventSeries, NewEvent, NewEventSeries
+
+mock_event_controller = MagicMock()
+mock_queries = MagicMock()
+mock_queries.select_data_version.return_value = 1
+cc = CalendarController(mock_event_controller, snapshot_queries=mock_queries)
+
+series = EventSeries(
+    series_id=1,
+    name="Spring Tour, 2024",
+    description="Duos; old and new",
+    events=[
+        Event(
+            event_id=7,
+            location="Corvallis",
+            time=datetime(2024, 4, 1, 19, 30),
+            ticket_url="https://example.com/tickets",  # type: ignore
+        )
+    ],
+)
+
+
+def test_render():
+    """Tests that every event becomes an escaped VEVENT with CRLF line breaks."""
+    body = cc.render([series], datetime(2024, 1, 1))
+    assert body.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+    assert body.endswith("END:VCALENDAR\r\n")
+    assert "UID:event-7@thegrapefruitsduo.com\r\n" in body
+    assert "DTSTART:20240401T193000\r\n" in body
+    assert "SUMMARY:Spring Tour\\, 2024\r\n" in body
+    assert (
+        "DESCRIPTION:Duos\\; old and new\\nTickets: https://example.com/tickets" in body
+    )
+
+
+def test_fold():
+    """Tests that long lines are folded at 75 octets without splitting characters."""
+    lines = list(fold("DESCRIPTION:" + "é" * 80))
+    assert len(lines) == 3
+    assert all(len(line.encode()) <= 75 for line in lines)
+    assert all(line.startswith(" ") for line in lines[1:])
+    assert (
+        "".join(line[1:] for line in lines[1:]).count("é") + lines[0].count("é") == 80
+    )
+
+
+def test_stored_feed_is_reused():
+    """Tests that a stored feed is served without rendering, and validated by ETag and date."""
+    mock_event_controller.get_upcoming_series = MagicMock(return_value=[series])
+    built = cc.build()
+    mock_queries.select_one_by_name.return_value = built.model_dump()
+    mock_event_controller.get_upcoming_series.reset_mock()
+
+    snapshot = cc.get_calendar()
+    mock_event_controller.get_upcoming_series.assert_not_called()
+    headers = cc.headers(snapshot)
+    assert headers["ETag"].startswith('W/"')
+    assert cc.not_modified(headers, headers["ETag"], None)
+    assert cc.not_modified(headers, headers["ETag"].removeprefix("W/"), None)
+    assert not cc.not_modified(headers, '"stale"', headers["Last-Modified"])
+    assert cc.not_modified(headers, None, headers["Last-Modified"])
+    assert not cc.not_modified(headers, None, "Mon, 01 Jan 2001 00:00:00 GMT")
+
+
+def test_calendar_feed(sqlite_db):
+    """Tests that GET /events/calendar.ics lists only upcoming events and answers revalidation with 304."""
+    created = event_controller.create_series(
+        NewEventSeries(
+            name="Next Season",
+            description="Soon",
+            events=[
+                NewEvent(location="Hall", time=datetime.now() + timedelta(days=30))
+            ],
+        )
+    )
+    calendar_controller.build()
+    client = TestClient(app)
+    response = client.get("/events/calendar.ics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    # the seeded events are in the past
+    assert response.text.count("BEGIN:VEVENT") == 1
+    assert f"UID:event-{created.events[0].event_id}@" in response.text
+    etag = response.headers["etag"]
+    assert (
+        client.get("/events/calendar.ics", headers={"If-None-Match": etag}).status_code
+        == 304
+    )
+
+
+def test_feed_rendered_again_each_day():
+    """Tests that a feed rendered on an earlier day is rendered again, so past events drop out."""
+    mock_event_controller.get_upcoming_series = MagicMock(return_value=[series])
+    stale = cc.build().model_copy(update={"created_at": datetime(2024, 1, 1)})
+    mock_queries.select_one_by_name.return_value = stale.model_dump()
+    mock_event_controller.get_upcoming_series.reset_mock()
+
+    cc.get_calendar()
+    since = mock_event_controller.get_upcoming_series.call_args.args[0]
+    assert since.date() == datetime.now().date() and since.hour == 0
@@ -0,0 +1,113 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from fastapi import HTTPException
+
+from app.controllers import change_controller
+from app.controllers.changes import ChangeController
+from app.db.events import EventQueries
+from app.db.musicians import MusicianQueries
+from app.models.event import EventSeries, NewEvent, NewEventSeries
+from app.models.group import Group
+from app.models.musician import Musician
+
+mock_queries = MagicMock()
+mock_musician_controller = MagicMock()
+mock_event_controller = MagicMock()
+mock_group_controller = MagicMock()
+
+ec = ChangeController(
+    mock_musician_controller,
+    mock_event_controller,
+    mock_group_controller,
+    change_queries=mock_queries,
+)
+
+
+def change(version: int, entity: str, entity_id: int, op: str = "upsert") -> dict:
+    return {
+        "version": version,
+        "entity": entity,
+        "entity_id": entity_id,
+        "op": op,
+        "changed_at": datetime(2024, 1, 1),
+    }
+
+
+def test_full_resync():
+    """Tests that an unknown or missing version returns every entity."""
+    mock_queries.select_latest_version = MagicMock(return_value=5)
+    mock_musician_controller.get_musicians = MagicMock(return_value=[])
+    mock_event_controller.get_all_series = MagicMock(return_value=[])
+    mock_group_controller.get_group = MagicMock(
+        return_value=Group(id=1, name="Test Group", bio="Test Bio")
+    )
+    for since in (None, 0, 6):
+        changes = ec.get_changes(since)
+        assert changes.full and changes.version == 5
+    assert mock_musician_controller.get_musicians.call_count == 3
+
+
+def test_delta():
+    """Tests that only changed entities are loaded, and deletes become tombstones."""
+    mock_queries.select_latest_version = MagicMock(return_value=9)
+    mock_queries.select_since = MagicMock(
+        return_value=[change(7, "events", 3, "delete"), change(8, "events", 4)]
+    )
+    mock_event_controller.get_one_series_by_id = MagicMock(
+        side_effect=HTTPException(status_code=404)
+    )
+    mock_musician_controller.get_musicians = MagicMock()
+
+    changes = ec.get_changes(6)
+    assert not changes.full and changes.version == 9
+    mock_queries.select_since.assert_called_once_with(6, 9)
+    # series 4 was deleted after version 9 was read
+    assert [(t.id, t.version) for t in changes.deleted] == [(3, 7), (4, 8)]
+    mock_musician_controller.get_musicians.assert_not_called()
+
+
+def test_change_log(sqlite_db):
+    """Tests that writes are logged in their transaction and only the latest change per entity is returned."""
+    musician = Musician.model_validate(MusicianQueries().select_one_by_id(1))
+    MusicianQueries().update_bio(musician, "Logged bio")
+    before = change_controller.get_changes(None)
+    assert before.full and before.group is not None and before.version == 1
+
+    queries = EventQueries()
+    series_id = queries.insert_one_series(
+        NewEventSeries(name="Synced", description="Delta", events=[])
+    )
+    queries.insert_one_event(
+        NewEvent(location="Online", time=datetime(2032, 1, 1, 19)), series_id
+    )
+    MusicianQueries().update_bio(musician, "Updated bio")
+
+    changes = change_controller.get_changes(before.version)
+    assert not changes.full and changes.version == before.version + 3
+    assert [s.series_id for s in changes.events] == [series_id]
+    assert changes.events[0].events[0].location == "Online"
+    assert [m.bio for m in changes.musicians] == ["Updated bio"]
+    assert changes.group is None and changes.deleted == []
+
+    queries.delete_one_series(
+        EventSeries(series_id=series_id, name="", description="", events=[])
+    )
+    changes = change_controller.get_changes(changes.version)
+    assert changes.events == [] and [t.id for t in changes.deleted] == [series_id]
+    assert change_controller.get_changes(changes.version).deleted == []
+
+
+def test_changes_read_on_one_connection():
+    """Tests that the version and entities are read together, and polls with nothing new skip that read."""
+    mock_queries.consistent_read.reset_mock()
+    mock_queries.select_latest_version = MagicMock(return_value=5)
+    mock_queries.select_since = MagicMock(return_value=[])
+    changes = ec.get_changes(5)
+    assert changes.version == 5 and not changes.full
+    mock_queries.consistent_read.assert_not_called()
+    mock_queries.select_since.assert_not_called()
+
+    ec.get_changes(4)
+    mock_queries.consistent_read.assert_called_once_with()
+    mock_queries.select_since.assert_called_once_with(4, 5)
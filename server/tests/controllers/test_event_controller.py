@@ -1,11 +1,16 @@
 from datetime import datetime
 from unittest.mock import MagicMock
 
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
 from pydantic import HttpUrl
 import pytest
 
+from app.controllers import event_controller
 from app.controllers.events import EventController
-from app.models.event import Event, EventSeries
+from app.controllers.pagination import decode_cursor, encode_cursor
+from app.main import app
+from app.models.event import Event, EventSeries, NewEvent, NewEventSeries, SeriesPatch
 
 mock_queries = MagicMock()
 ec = EventController(event_queries=mock_queries)
@@ -266,3 +271,208 @@ def test_one_series_with_events():
     assert len(events) == 3
     for event in events:
         assert isinstance(event, Event)
+
+
+def test_all_series_keyed_by_id():
+    """Tests that series are grouped by ID in row order rather than by name."""
+
+    def ordered_rows():
+        yield {
+            "series_id": 1,
+            "name": "Same",
+            "description": "A",
+            "event_id": 1,
+            "location": medford,
+            "time": "2024-05-31 19:00:00",
+        }
+        yield {
+            "series_id": 1,
+            "name": "Same",
+            "description": "A",
+            "event_id": 2,
+            "location": eugene_church,
+            "time": "2024-06-23 15:00:00",
+        }
+        yield {"series_id": 2, "name": "Same", "description": "B"}
+
+    mock_queries.select_all = ordered_rows
+    result = ec.get_all_series()
+    assert [s.series_id for s in result] == [1, 2]
+    assert [e.event_id for e in result[0].events] == [1, 2]
+    assert result[1].events == []
+
+
+def test_iter_all_series_is_lazy():
+    """Tests that series are yielded before the remaining rows are read."""
+    consumed = []
+
+    def ordered_rows():
+        for series_id in (1, 2, 3):
+            consumed.append(series_id)
+            yield {"series_id": series_id, "name": f"S{series_id}", "description": "D"}
+
+    mock_queries.select_all = ordered_rows
+    stream = ec.iter_all_series()
+    first = next(stream)
+    assert first.series_id == 1
+    assert consumed == [1, 2]
+
+
+def test_export_series():
+    """Tests that series are exported one per line, bypassing the query cache."""
+    rows = [
+        {"series_id": 1, "name": "S1", "description": "D"},
+        {"series_id": 2, "name": "S2", "description": "D"},
+    ]
+    mock_queries.select_all = MagicMock(return_value=iter(rows))
+    lines = list(ec.export_series())
+    assert [EventSeries.model_validate_json(line).series_id for line in lines] == [1, 2]
+    assert all(line.endswith(b"\n") for line in lines)
+    mock_queries.select_all.assert_called_once_with(cached=False)
+
+
+def test_series_page_with_next_cursor():
+    """Tests that a full page reports where the next page starts."""
+
+    def page_rows(after, limit, events_limit, start, end):
+        assert (after, limit, events_limit) == (None, 3, 1)
+        for series_id in (1, 2, 3):
+            yield {"series_id": series_id, "name": f"S{series_id}", "description": "D"}
+
+    mock_queries.select_page = page_rows
+    page, next_after = ec.get_series_page(limit=2, events_limit=1)
+    assert [s.series_id for s in page] == [1, 2]
+    assert next_after == 2
+
+
+def test_series_last_page():
+    """Tests that the last page has no next cursor."""
+
+    def page_rows(after, limit, events_limit, start, end):
+        yield {"series_id": 5, "name": "S5", "description": "D"}
+
+    mock_queries.select_page = page_rows
+    page, next_after = ec.get_series_page(after=4, limit=2)
+    assert [s.series_id for s in page] == [5]
+    assert next_after is None
+
+
+def test_pagination_cursor_round_trip():
+    """Tests that cursors are opaque, round trip, and reject garbage."""
+    cursor = encode_cursor(42)
+    assert "42" not in cursor
+    assert decode_cursor(cursor) == 42
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("not-a-cursor")
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_series_page_rejects_empty_window():
+    """Tests that a time window ending before it starts is a client error."""
+    with pytest.raises(HTTPException) as e:
+        ec.get_series_page(start=datetime(2024, 6, 1), end=datetime(2024, 5, 1))
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_upcoming_series_in_query_order():
+    """Tests that upcoming series keep the chronological order of the query."""
+
+    def upcoming_rows(now):
+        assert isinstance(now, datetime)
+        yield {
+            "series_id": 7,
+            "name": "Soon",
+            "description": "D",
+            "event_id": 9,
+            "location": medford,
+            "time": "2030-01-01 19:00:00",
+        }
+        yield {
+            "series_id": 3,
+            "name": "Later",
+            "description": "D",
+            "event_id": 4,
+            "location": medford,
+            "time": "2030-02-01 19:00:00",
+        }
+
+    mock_queries.select_upcoming = upcoming_rows
+    result = ec.get_upcoming_series()
+    assert [s.series_id for s in result] == [7, 3]
+
+
+def test_create_series_without_reread():
+    """Tests that a created series is built from the input and generated IDs, with events ordered by time."""
+    mock_queries.insert_one_series = MagicMock(return_value=5)
+    mock_queries.insert_one_event = MagicMock(side_effect=[10, 11])
+    mock_queries.select_one_by_id = MagicMock()
+    series = ec.create_series(
+        NewEventSeries(
+            name="New",
+            description="D",
+            events=[
+                NewEvent(location=medford, time=datetime(2031, 2, 1)),
+                NewEvent(location=eugene_church, time=datetime(2031, 1, 1)),
+            ],
+        )
+    )
+    assert series.series_id == 5 and series.poster_id is None
+    assert [(e.event_id, e.location) for e in series.events] == [
+        (11, eugene_church),
+        (10, medford),
+    ]
+    mock_queries.select_one_by_id.assert_not_called()
+
+
+def test_export_events(sqlite_db):
+    """Tests that GET /events/export streams one series per line, and is not shadowed by /events/{id}."""
+    with TestClient(app).stream("GET", "/events/export") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = list(response.iter_lines())
+    ids = [EventSeries.model_validate_json(line).series_id for line in lines]
+    assert ids and ids == sorted(ids)
+
+
+def test_patch_series(sqlite_db):
+    """Tests that a patch changes only supplied fields, and is undone if an event is not found."""
+    created = event_controller.create_series(
+        NewEventSeries(
+            name="Patchable",
+            description="Before",
+            events=[
+                NewEvent(
+                    location="Hall",
+                    time=datetime(2034, 1, 1, 19),
+                    map_url="https://example.com/map",  # type: ignore
+                )
+            ],
+        )
+    )
+    event_id = created.events[0].event_id
+    patched = event_controller.patch_series(
+        created.series_id,
+        SeriesPatch.model_validate(
+            {
+                "description": "After",
+                "events": [{"event_id": event_id, "location": "Lawn", "map_url": None}],
+            }
+        ),
+    )
+    assert (patched.name, patched.description) == ("Patchable", "After")
+    event = patched.events[0]
+    assert (event.location, event.time, event.map_url) == (
+        "Lawn",
+        datetime(2034, 1, 1, 19),
+        None,
+    )
+
+    with pytest.raises(HTTPException) as e:
+        event_controller.patch_series(
+            created.series_id,
+            SeriesPatch.model_validate(
+                {"name": "Renamed", "events": [{"event_id": 9999, "location": "X"}]}
+            ),
+        )
+    assert e.value.status_code == 404
+    assert event_controller.get_one_series_by_id(created.series_id).name == "Patchable"
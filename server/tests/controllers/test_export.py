@@ -0,0 +1,35 @@
+import gzip
+import hashlib
+
+import brotli
+
+from app.controllers import exporter
+from app.db.events import EventQueries
+from app.models.event import EventSeries, NewEventSeries
+
+
+def test_static_export(sqlite_db, tmp_path):
+    """Tests that every public route is exported with gzip and brotli copies and removed when it disappears."""
+    manifest = exporter.export(tmp_path)
+    routes = manifest["routes"]
+    assert {"/", "/group/", "/musicians/", "/musicians/1", "/events/"} <= routes.keys()
+    musician = routes["/musicians/1"]
+    assert musician["file"] == "musicians/1/index.json"
+    body = (tmp_path / musician["file"]).read_bytes()
+    assert (
+        gzip.decompress((tmp_path / "musicians/1/index.json.gz").read_bytes()) == body
+    )
+    assert (
+        brotli.decompress((tmp_path / "musicians/1/index.json.br").read_bytes()) == body
+    )
+    assert hashlib.sha256(body).hexdigest() == musician["sha256"]
+
+    series_id = EventQueries().insert_one_series(
+        NewEventSeries(name="Exported", description="Gone soon", events=[])
+    )
+    assert f"/events/{series_id}" in exporter.export(tmp_path)["routes"]
+    EventQueries().delete_one_series(
+        EventSeries(series_id=series_id, name="", description="", events=[])
+    )
+    assert f"/events/{series_id}" not in exporter.export(tmp_path)["routes"]
+    assert not (tmp_path / "events" / str(series_id)).joinpath("index.json").exists()
@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.controllers.events import EventController
+from app.controllers.fieldsets import (
+    columns_for,
+    group_fields,
+    parse_include,
+    series_fields,
+    split_csv,
+)
+from app.controllers.musicians import MusicianController
+from app.models.musician import Musician
+
+
+def test_parse_fields():
+    """Tests splitting and grouping of comma-separated, dotted field names."""
+    assert split_csv(None) is None
+    assert split_csv(" name, ,bio ") == ("name", "bio")
+    assert group_fields(("name", "events.time", "events.events.location")) == {
+        "": ("name",),
+        "events": ("time", "events.location"),
+    }
+
+
+def test_parse_include():
+    """Tests that sections are returned in a fixed order and unknown ones are rejected."""
+    assert parse_include(None) == ("group", "musicians", "events")
+    assert parse_include("events,group") == ("group", "events")
+    with pytest.raises(HTTPException) as e:
+        parse_include("events,bios")
+    assert e.value.status_code == 400
+
+
+def test_series_fields():
+    """Tests that events are loaded fully, partially, or not at all."""
+    assert series_fields(None) == (None, None)
+    assert series_fields(("name", "events")) == (("name",), None)
+    assert series_fields(("name", "events.time")) == (("name",), ("time",))
+    assert series_fields(("name",)) == (("name",), ())
+
+
+def test_columns_for():
+    """Tests that the key column is always selected and unknown fields are a 400."""
+    assert columns_for(Musician, None, "id") is None
+    assert columns_for(Musician, ("name",), "id") == ("name", "id")
+    with pytest.raises(HTTPException) as e:
+        columns_for(Musician, ("password",), "id")
+    assert e.value.status_code == 400
+
+
+def test_sparse_musicians_query_only_selected_columns():
+    """Tests that only the requested columns are passed to the query."""
+    queries = MagicMock()
+    queries.select_all.return_value = [{"name": "John Doe", "id": 1}]
+    musicians = MusicianController(queries).get_sparse_musicians(("name",))
+    queries.select_all.assert_called_once_with(("name", "id"))
+    assert musicians == [{"name": "John Doe", "id": 1}]
+
+
+def test_sparse_series_without_events():
+    """Tests that series fields without event fields skip loading events."""
+    queries = MagicMock()
+    queries.select_all.return_value = iter(
+        [{"series_id": 1, "name": "S1"}, {"series_id": 2, "name": "S2"}]
+    )
+    series = EventController(queries).get_sparse_series(("name",), ())
+    queries.select_all.assert_called_once_with(("name", "series_id"), ())
+    assert series == [{"name": "S1", "series_id": 1}, {"name": "S2", "series_id": 2}]
+
+
+def test_sparse_series_with_event_fields():
+    """Tests that events are grouped under their series with only the selected fields."""
+    queries = MagicMock()
+    queries.select_all.return_value = iter(
+        [
+            {"series_id": 1, "name": "S1", "location": "A", "event_id": 1},
+            {"series_id": 1, "name": "S1", "location": "B", "event_id": 2},
+            {"series_id": 2, "name": "S2", "location": None, "event_id": None},
+        ]
+    )
+    series = EventController(queries).get_sparse_series(("name",), ("location",))
+    assert series == [
+        {
+            "name": "S1",
+            "series_id": 1,
+            "events": [
+                {"location": "A", "event_id": 1},
+                {"location": "B", "event_id": 2},
+            ],
+        },
+        {"name": "S2", "series_id": 2, "events": []},
+    ]
@@ -56,4 +56,16 @@ def test_update_group_bio():
 
     group = gc.update_group_bio(new_bio)
     MagicMock.assert_called_once_with(mock_queries.update_group_bio, new_bio)
-    assert isinstance(group, Group)
+    assert isinstance(group, Group) and group.bio == new_bio
+
+
+def test_update_group_without_rereading():
+    """Tests that consecutive updates build the returned group from the one passed in, without reading it again."""
+    mock_queries.update_livestream = MagicMock()
+    mock_queries.select_one_by_id.reset_mock()
+    mock_queries.select_one_by_id.return_value = valid_group_data
+
+    group = gc.update_livestream("abc123")
+    group = gc.update_group_bio("Newer Bio", group)
+    mock_queries.select_one_by_id.assert_called_once()
+    assert (group.livestream_id, group.bio) == ("abc123", "Newer Bio")
@@ -0,0 +1,90 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.controllers import event_controller
+from app.controllers.imports import parse_csv, parse_import, parse_json
+from app.models.event import NewEvent
+
+CSV = """name,description,location,time,map_url,ticket_url
+Spring,First half,Corvallis,2031-04-01T19:30:00,,https://example.com/t
+Spring,ignored,Eugene,2031-04-02T19:30:00,,
+Summer,No events yet,,,,
+"""
+
+
+def test_parse_csv_groups_lines_by_series():
+    """Tests that lines with the same name form one series, described by its first line."""
+    rows, errors = parse_csv(CSV)
+    assert errors == []
+    assert [(row, s.name, s.description) for row, s in rows] == [
+        (2, "Spring", "First half"),
+        (4, "Summer", "No events yet"),
+    ]
+    assert [e.location for e in rows[0][1].events] == ["Corvallis", "Eugene"]
+    assert rows[1][1].events == []
+
+
+def test_parse_csv_reports_lines():
+    """Tests that every invalid line is reported by its line number."""
+    _, errors = parse_csv(
+        "name,description,location,time\n,x,,\nA,d,Here,not a time\nA,d,,2031-01-01\n"
+    )
+    assert [e.row for e in errors] == [2, 3, 4]
+
+
+def test_parse_json_reports_rows():
+    """Tests that invalid and duplicate series are reported by their position."""
+    body = json.dumps(
+        [
+            {"name": "A", "description": "d", "events": []},
+            {"name": "B", "events": []},
+            {"name": "a", "description": "d", "events": []},
+        ]
+    ).encode()
+    rows, errors = parse_json(body)
+    assert [s.name for _, s in rows] == ["A"]
+    assert [e.row for e in errors] == [2, 3]
+
+
+def test_parse_import_rejects_everything_on_any_error():
+    """Tests that an import with any invalid row fails as a whole, and unknown types are refused."""
+    with pytest.raises(HTTPException) as e:
+        parse_import("text/csv; charset=utf-8", b"name,description\n,x\n")
+    assert e.value.status_code == 422
+    assert e.value.detail == [{"row": 2, "detail": "Missing series name"}]
+    with pytest.raises(HTTPException) as e:
+        parse_import("application/xml", b"<series/>")
+    assert e.value.status_code == 415
+
+
+def test_import_series(sqlite_db):
+    """Tests bulk imports, and each way of handling existing names."""
+    rows, _ = parse_csv(
+        "name,description,location,time\n"
+        "Imported A,First,Hall,2033-01-01T19:00:00\n"
+        "Imported A,,Church,2033-01-02T19:00:00\n"
+        "Imported B,Second,,\n"
+    )
+    created = event_controller.import_series(rows).created
+    assert len(created) == 2
+    a = event_controller.get_one_series_by_id(created[0])
+    assert [e.location for e in a.events] == ["Hall", "Church"]
+
+    with pytest.raises(HTTPException) as e:
+        event_controller.import_series(rows)
+    assert e.value.status_code == 409 and len(e.value.detail) == 2
+
+    assert event_controller.import_series(rows, "skip").skipped == [
+        "Imported A",
+        "Imported B",
+    ]
+    rows[1][1].description = "Changed"
+    rows[1][1].events = [
+        NewEvent(location="Stage", time=datetime(2033, 2, 1, 19))  # type: ignore
+    ]
+    assert event_controller.import_series(rows, "upsert").updated == created
+    b = event_controller.get_one_series_by_id(created[1])
+    assert b.description == "Changed" and [e.location for e in b.events] == ["Stage"]
@@ -1,8 +1,13 @@
+import asyncio
+import threading
 from unittest.mock import MagicMock
 
 import pytest
+from fastapi import HTTPException
 
+from app.controllers import group_controller
 from app.controllers.controller import MainController
+from app.models.batch import Batch
 from app.models.event import EventSeries, NewEventSeries
 from app.models.group import Group
 from app.models.musician import Musician
@@ -12,6 +17,10 @@ mock_musician_controller = MagicMock()
 mock_group_controller = MagicMock()
 mock_event_controller = MagicMock()
 mock_oauth_token = MagicMock()
+mock_snapshot_controller = MagicMock()
+mock_broadcaster = MagicMock()
+mock_calendar_controller = MagicMock()
+mock_exporter = MagicMock(path=None)
 
 mock_oauth_token.email_and_sub = MagicMock(return_value=("email", "sub"))
 
@@ -23,6 +32,10 @@ controller = MainController(
     group_controller=mock_group_controller,
     event_controller=mock_event_controller,
     oauth_token=mock_oauth_token,  # type: ignore
+    snapshot_controller=mock_snapshot_controller,
+    broadcaster=mock_broadcaster,
+    calendar_controller=mock_calendar_controller,
+    exporter=mock_exporter,
 )
 
 
@@ -90,6 +103,8 @@ async def test_create_event():
     MagicMock.assert_called_with(mock_oauth_token.email_and_sub, mock_token)
     MagicMock.assert_called(mock_user_controller.get_user_by_sub)
     MagicMock.assert_called(mock_event_controller.create_series)
+    MagicMock.assert_called(mock_snapshot_controller.build)
+    MagicMock.assert_called(mock_calendar_controller.build)
 
 
 @pytest.mark.asyncio
@@ -164,3 +179,140 @@ async def test_update_group_bio():
     MagicMock.assert_called_with(mock_oauth_token.email_and_sub, mock_token)
     MagicMock.assert_called(mock_user_controller.get_user_by_sub)
     MagicMock.assert_called(mock_group_controller.update_group_bio)
+
+
+@pytest.mark.asyncio
+async def test_get_root():
+    """Tests that the root body is served from the snapshot controller."""
+    mock_snapshot_controller.get_root.return_value = b"{}"
+    assert await controller.get_root() == b"{}"
+
+
+@pytest.mark.asyncio
+async def test_failed_snapshot_does_not_fail_write():
+    """Tests that a write succeeds even if rebuilding the snapshot fails."""
+    mock_snapshot_controller.build.side_effect = Exception("db down")
+    await controller.delete_series(1, mock_token)
+    MagicMock.assert_called(mock_snapshot_controller.log_error)
+    mock_snapshot_controller.build.side_effect = None
+
+
+@pytest.mark.asyncio
+async def test_update_livestream_is_broadcast():
+    """Tests that a livestream change is pushed to open streams after the write."""
+    mock_group_controller.update_livestream.return_value = Group(
+        id=1, name="The Grapefruits Duo", bio="bio", livestream_id="abc123"
+    )
+    await controller.update_livestream("abc123", mock_token)
+    mock_broadcaster.publish.assert_called_with(
+        "group", {"id": 1, "op": "upsert", "livestream_id": "abc123"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_group_write_skips_calendar_and_unset_export():
+    """Tests that the calendar is only rebuilt when events change, and nothing is exported without EXPORT_DIR."""
+    mock_calendar_controller.build.reset_mock()
+    mock_group_controller.update_livestream.return_value = Group(
+        id=1, name="The Grapefruits Duo", bio="bio", livestream_id="abc123"
+    )
+    await controller.update_livestream("abc123", mock_token)
+    mock_calendar_controller.build.assert_not_called()
+    mock_exporter.export.assert_not_called()
+
+
+def test_calendar_headers_and_validation():
+    """Tests that the calendar's validators are evaluated by the calendar controller."""
+    mock_calendar_controller.headers.return_value = {"ETag": 'W/"abc"'}
+    mock_calendar_controller.not_modified.return_value = True
+    calendar = MagicMock()
+    headers = controller.calendar_headers(calendar)
+    mock_calendar_controller.headers.assert_called_with(calendar)
+    assert controller.calendar_not_modified(headers, '"abc"', None)
+    mock_calendar_controller.not_modified.assert_called_with(headers, '"abc"', None)
+
+
+@pytest.mark.asyncio
+async def test_exports_run_in_background_and_coalesce():
+    """Tests that writes are published without waiting for the export, and exports never overlap."""
+    release = threading.Event()
+    exporter = MagicMock(path="export")
+    exporter.export.side_effect = lambda: release.wait(1)
+    broadcaster = MagicMock()
+    controller = MainController(
+        snapshot_controller=MagicMock(),
+        calendar_controller=MagicMock(),
+        exporter=exporter,
+        broadcaster=broadcaster,
+    )
+    for i in range(3):
+        await controller._after_write("musicians", {"id": i, "op": "upsert"})
+    assert broadcaster.publish.call_count == 3
+    release.set()
+    await controller._export
+    # the first export, then one for the writes which landed while it ran
+    assert exporter.export.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_authenticates_once():
+    """Tests that a batch authenticates once and rebuilds derived data once for all operations."""
+    mock_user_controller.get_user_by_sub.reset_mock()
+    mock_snapshot_controller.build.reset_mock()
+    mock_snapshot_controller.build.side_effect = None
+    mock_group_controller.update_livestream.return_value = Group(
+        id=1, name="The Grapefruits Duo", bio="bio", livestream_id="abc123"
+    )
+    batch = Batch.model_validate(
+        {
+            "operations": [
+                {"op": "update_livestream", "livestream_id": "abc123"},
+                {"op": "delete_series", "series_id": 2},
+            ]
+        }
+    )
+    results = await controller.batch(batch, mock_token)
+    assert [r.op for r in results] == ["update_livestream", "delete_series"]
+    assert results[1].result is None
+    mock_user_controller.get_user_by_sub.assert_called_once()
+    mock_snapshot_controller.build.assert_called_once()
+    mock_event_controller.delete_series.assert_called_with(2)
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_failing_operation():
+    """Tests that a failing operation is reported by its index."""
+    mock_event_controller.delete_series.side_effect = HTTPException(
+        status_code=404, detail="Event not found"
+    )
+    batch = Batch.model_validate(
+        {"operations": [{"op": "delete_series", "series_id": 9}]}
+    )
+    with pytest.raises(HTTPException) as e:
+        await controller.batch(batch, mock_token)
+    mock_event_controller.delete_series.side_effect = None
+    assert e.value.status_code == 404
+    assert e.value.detail["operation"] == 0
+
+
+def test_batch_is_atomic(sqlite_db):
+    """Tests that a batch with a failing operation applies none of its operations."""
+    oauth_token = MagicMock()
+    oauth_token.email_and_sub.return_value = ("lucas.p.jensen10@gmail.com", "sub")
+    user_controller = MagicMock()
+    controller = MainController(
+        oauth_token=oauth_token, user_controller=user_controller
+    )
+    bio = group_controller.get_group().bio
+    batch = Batch.model_validate(
+        {
+            "operations": [
+                {"op": "update_group_bio", "bio": "Never committed"},
+                {"op": "delete_series", "series_id": 9999},
+            ]
+        }
+    )
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(controller.batch(batch, MagicMock()))
+    assert e.value.status_code == 404 and e.value.detail["operation"] == 1
+    assert group_controller.get_group().bio == bio
@@ -108,3 +108,20 @@ def test_musician_not_found():
     assert isinstance(e.value, HTTPException)
     assert e.value.status_code == status.HTTP_404_NOT_FOUND
     assert e.value.detail == "Musician not found"
+
+
+def test_update_bio_without_reread():
+    """Tests that an updated musician is built from the write instead of read back."""
+    mock_queries.select_one_by_id = MagicMock(side_effect=mock_select_one_by_id)
+    musician = mc.update_musician(1, "A new bio")
+    assert musician.bio == "A new bio" and musician.headshot_id == "headshot123"
+    mock_queries.update_bio.assert_called_once()
+    mock_queries.select_one_by_id.assert_called_once_with(1)
+    mock_queries.select_one_by_id = mock_select_one_by_id
+
+
+def test_update_headshot_without_reread():
+    """Tests that the new headshot ID is returned without reading the musician again."""
+    musician = Musician(**sample_data[0])
+    updated = mc._update_musician_headshot(musician, "newheadshot")
+    assert updated.headshot_id == "newheadshot" and updated.bio == musician.bio
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.controllers.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_are_coalesced():
+    """Tests that concurrent calls with the same key share one execution."""
+    flights = SingleFlight()
+    release = threading.Event()
+    fn = MagicMock(side_effect=lambda: release.wait(1) and ["musician"])
+
+    callers = [
+        asyncio.create_task(flights.do(("get_musicians",), fn)) for _ in range(5)
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert results == [["musician"]] * 5
+    fn.assert_called_once()
+    assert flights.stats()["get_musicians"] == {
+        "leaders": 1,
+        "coalesced": 4,
+        "timeouts": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    """Tests that calls with different arguments are not coalesced, and nothing is kept after landing."""
+    flights = SingleFlight()
+    fn = MagicMock(side_effect=lambda id: id)
+    assert await asyncio.gather(
+        flights.do(("get_musician", 1), fn, 1), flights.do(("get_musician", 2), fn, 2)
+    ) == [1, 2]
+    await flights.do(("get_musician", 1), fn, 1)
+    assert fn.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    """Tests that every coalesced caller receives the leader's exception."""
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.05)
+        raise HTTPException(status_code=404, detail="not found")
+
+    results = await asyncio.gather(
+        flights.do(("get_event", 1), fail),
+        flights.do(("get_event", 1), fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, HTTPException) and r.status_code == 404 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_timeout():
+    """Tests that waiters give up on a slow flight with a 504 while its leader finishes, and the next caller starts a new one."""
+    flights = SingleFlight(timeout=0.01)
+    release = threading.Event()
+    fn = MagicMock(side_effect=lambda: release.wait(1))
+
+    leader = asyncio.ensure_future(flights.do(("get_group",), fn))
+    await asyncio.sleep(0)
+    with pytest.raises(HTTPException) as e:
+        await flights.do(("get_group",), fn)
+    assert e.value.status_code == 504
+    release.set()
+    assert await leader is True
+    assert await flights.do(("get_group",), fn) is True
+    assert fn.call_count == 2
+    assert flights.timeouts["get_group"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_timeout_by_default():
+    """Tests that without a timeout a slow flight is awaited by every caller."""
+    flights = SingleFlight(timeout=0)
+    fn = MagicMock(side_effect=lambda: time.sleep(0.05) or "group")
+    results = await asyncio.gather(*(flights.do(("get_group",), fn) for _ in range(3)))
+    assert results == ["group"] * 3
+    fn.assert_called_once()
@@ -0,0 +1,21 @@
+import json
+from unittest.mock import MagicMock
+
+from app.controllers import event_controller, group_controller, musicians_controller
+from app.controllers.snapshot import SnapshotController
+
+
+def test_snapshot_roundtrip(sqlite_db, tmp_path):
+    """Tests that a built snapshot is served from the file, then the table, without rebuilding."""
+    path = tmp_path / "root.json"
+    snapshots = SnapshotController(
+        musicians_controller, event_controller, group_controller, path=str(path)
+    )
+    body = snapshots.build()
+    assert json.loads(path.read_bytes())["group"]["name"] == "The Grapefruits Duo"
+
+    snapshots.build = MagicMock()  # type: ignore
+    assert snapshots.get_root() == body
+    path.unlink()
+    assert snapshots.get_root() == body
+    snapshots.build.assert_not_called()
@@ -0,0 +1,119 @@
+from time import time
+from unittest.mock import MagicMock, patch
+
+from app.db import conn, routing
+from app.db.base_queries import BaseQueries
+from app.db.cache import QueryCache
+from app.models.musician import Musician
+
+columns = ("id", "name", "bio", "headshot_id")
+values = (1, "John Doe", "A musician", "headshot123")
+
+
+def make_queries(cache: QueryCache) -> tuple[BaseQueries, MagicMock]:
+    queries = BaseQueries()
+    queries.table = "cached_musicians"
+    queries.model = Musician
+    queries.query_cache = cache
+    cursor = MagicMock()
+    cursor.description = [(c,) for c in columns]
+    cursor.fetchone.return_value = values
+    cursor.fetchall.return_value = [values]
+    cursor.fetchmany.side_effect = lambda size: []
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    queries.connect_db = MagicMock(return_value=conn)
+    return queries, cursor
+
+
+def test_cache_hit_and_miss():
+    """Tests that a cached value is returned for the same query, params and table versions."""
+    cache = QueryCache(max_entries=10)
+    key = cache.key("SELECT 1", (1,), ["t"])
+    assert cache.get(key) == (False, None)
+    cache.put(key, "rows")
+    assert cache.get(cache.key("SELECT 1", (1,), ["t"])) == (True, "rows")
+    assert cache.get(cache.key("SELECT 1", (2,), ["t"]))[0] is False
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_bump_invalidates_readers_of_table():
+    """Tests that bumping a table hides results which read it, and only those."""
+    cache = QueryCache(max_entries=10)
+    both = cache.key("q1", (), ["a", "b"])
+    only_b = cache.key("q2", (), ["b"])
+    cache.put(both, 1)
+    cache.put(only_b, 2)
+    cache.bump(["a"])
+    assert cache.get(cache.key("q1", (), ["a", "b"]))[0] is False
+    assert cache.get(cache.key("q2", (), ["b"])) == (True, 2)
+
+
+def test_lru_eviction_and_ttl():
+    """Tests that the least recently used entry is evicted and entries expire after the TTL."""
+    cache = QueryCache(max_entries=2, ttl=5)
+    with patch("app.db.cache.monotonic", return_value=100.0):
+        for q in ("q1", "q2"):
+            cache.put(cache.key(q, (), ["t"]), q)
+        cache.get(cache.key("q1", (), ["t"]))
+        cache.put(cache.key("q3", (), ["t"]), "q3")
+        assert cache.get(cache.key("q2", (), ["t"]))[0] is False
+        assert cache.get(cache.key("q1", (), ["t"])) == (True, "q1")
+    with patch("app.db.cache.monotonic", return_value=106.0):
+        assert cache.get(cache.key("q1", (), ["t"]))[0] is False
+
+
+def test_queries_served_from_cache_until_write():
+    """Tests that BaseQueries reuses cached rows and re-queries after a write to the table."""
+    queries, cursor = make_queries(QueryCache(max_entries=10))
+    assert queries.select_one_by_id(1)["name"] == "John Doe"  # type: ignore
+    assert queries.select_one_by_id(1)["name"] == "John Doe"  # type: ignore
+    assert cursor.execute.call_count == 1
+
+    queries.execute("UPDATE cached_musicians SET bio = %s WHERE id = %s", ("new", 1))
+    queries.select_one_by_id(1)
+    assert cursor.execute.call_count == 3
+
+
+def test_queries_uncached_by_default():
+    """Tests that a disabled cache never serves results."""
+    queries, cursor = make_queries(QueryCache())
+    queries.select_all()
+    queries.select_all()
+    assert cursor.execute.call_count == 2
+
+
+def test_replica_reads_not_cached(monkeypatch):
+    """Tests that rows from a lagging replica are never cached or served to a client reading its own writes."""
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    monkeypatch.setenv("DB_REPLICA_URLS", "mysql://replica-1")
+    bios = {"primary": "old", "replica-1": "old"}
+
+    def connect_mysql(host: str = "primary") -> MagicMock:
+        cursor = MagicMock()
+        cursor.description = [(c,) for c in columns]
+        cursor.fetchone.return_value = (1, "John Doe", bios[host], "headshot123")
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn
+
+    monkeypatch.setattr(conn, "connect_mysql", connect_mysql)
+    queries = BaseQueries()
+    queries.table = "cached_musicians"
+    queries.model = Musician
+    queries.query_cache = QueryCache(max_entries=10)
+
+    routing.begin_request()
+    queries.execute("UPDATE cached_musicians SET bio = %s WHERE id = %s", ("new", 1))
+    bios["primary"] = "new"
+    routing.begin_request()
+    # the replica has not caught up yet, and its rows must not be cached under the new version
+    assert queries.select_one_by_id(1)["bio"] == "old"  # type: ignore
+
+    routing.begin_request(primary_until=time() + 60)
+    assert queries.select_one_by_id(1)["bio"] == "new"  # type: ignore
+
+    # the primary's rows were cached, and are served to other readers
+    routing.begin_request()
+    bios["primary"] = bios["replica-1"] = "newer, uncached"
+    assert queries.select_one_by_id(1)["bio"] == "new"  # type: ignore
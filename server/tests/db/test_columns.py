@@ -0,0 +1,55 @@
+import pytest
+
+from app.db.columns import model_columns, project, select_list
+from app.db.events import EventQueries
+from app.db.musicians import MusicianQueries
+from app.models.event import Event, EventSeries
+from app.models.group import Group
+from app.models.musician import Musician
+
+
+def test_model_columns():
+    """Tests that columns are derived from model fields, skipping nested collections."""
+    assert model_columns(Musician) == ("name", "bio", "headshot_id", "id")
+    assert model_columns(EventSeries) == (
+        "name",
+        "description",
+        "series_id",
+        "poster_id",
+    )
+    assert "events" not in model_columns(EventSeries)
+    assert model_columns(Event) == (
+        "location",
+        "time",
+        "map_url",
+        "ticket_url",
+        "event_id",
+    )
+    assert "livestream_id" in model_columns(Group)
+
+
+def test_project_keeps_model_order():
+    """Tests that a projection selects the requested columns in model field order."""
+    assert project(Musician, ["id", "name"]) == ("name", "id")
+
+
+def test_project_rejects_unknown_columns():
+    """Tests that projections cannot reference columns the model does not have."""
+    with pytest.raises(ValueError):
+        project(Musician, ["id", "password; DROP TABLE musicians"])
+
+
+def test_select_list():
+    """Tests rendering of explicit column lists."""
+    assert select_list(("id", "name")) == "`id` , `name`"
+    assert select_list(("time",), alias="e") == "e.`time`"
+
+
+def test_queries_select_explicit_columns():
+    """Tests that query classes no longer rely on SELECT *."""
+    columns = MusicianQueries().select_columns()
+    assert "*" not in columns
+    assert columns == "`name` , `bio` , `headshot_id` , `id`"
+    joined = EventQueries().select_columns()
+    assert joined.startswith("s.`name`")
+    assert "e.`event_id`" in joined
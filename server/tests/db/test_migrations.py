@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+from app.db.migrations import Migration, MigrationRunner
+
+migrations = [
+    Migration(version=2, name="second", apply=["APPLY 2"], rollback=["ROLLBACK 2"]),
+    Migration(version=1, name="first", apply=["APPLY 1"], rollback=["ROLLBACK 1"]),
+    Migration(version=3, name="third", apply=["APPLY 3"], rollback=["ROLLBACK 3"]),
+]
+
+
+def make_runner(applied: list[int]) -> tuple[MigrationRunner, list[str]]:
+    """Builds a runner over a fake connection which records executed statements."""
+    executed: list[str] = []
+    cursor = MagicMock()
+    cursor.execute = lambda statement, params=None: executed.append(statement)
+    cursor.fetchall.return_value = [(v,) for v in applied]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    return MigrationRunner(migrations, lambda: conn), executed
+
+
+def test_status():
+    """Tests that status lists migrations in version order with their applied state."""
+    runner, _ = make_runner(applied=[1])
+    assert [(m.version, applied) for m, applied in runner.status()] == [
+        (1, True),
+        (2, False),
+        (3, False),
+    ]
+
+
+def test_apply_pending_only():
+    """Tests that only pending migrations are applied, in order, up to the target."""
+    runner, executed = make_runner(applied=[1])
+    done = runner.apply(target=2)
+    assert [m.version for m in done] == [2]
+    assert "APPLY 1" not in executed
+    assert "APPLY 2" in executed
+    assert "APPLY 3" not in executed
+
+
+def test_rollback_newest_by_default():
+    """Tests that rollback undoes only the newest applied migration by default."""
+    runner, executed = make_runner(applied=[1, 2])
+    done = runner.rollback()
+    assert [m.version for m in done] == [2]
+    assert "ROLLBACK 2" in executed
+    assert "ROLLBACK 1" not in executed
+
+
+def test_rollback_to_target():
+    """Tests that rollback undoes migrations newest first down to the target."""
+    runner, executed = make_runner(applied=[1, 2, 3])
+    done = runner.rollback(target=1)
+    assert [m.version for m in done] == [3, 2]
+    rollbacks = [s for s in executed if s.startswith("ROLLBACK")]
+    assert rollbacks == ["ROLLBACK 3", "ROLLBACK 2"]
+
+
+def test_reapply_on_sqlite(sqlite_db):
+    """Tests that the conditional column changes of migrations can be re-run on SQLite."""
+    runner = MigrationRunner()
+    tracking = [m for m in runner.migrations if m.name == "change tracking"]
+    runner.migrations = tracking
+    # statements run again even though the columns already exist
+    runner._run(tracking[0].apply, "SELECT %s", (1,))
+    assert [m.version for m in runner.rollback()] == [tracking[0].version]
+    # and again once they have been dropped
+    runner._run(tracking[0].rollback, "SELECT %s", (1,))
+    assert [m.version for m in runner.apply()] == [tracking[0].version]
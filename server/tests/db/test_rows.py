@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+from app.db.base_queries import BaseQueries
+from app.db.rows import RowMapper
+from app.models.musician import Musician
+
+columns = ("id", "name", "bio", "headshot_id")
+values = (1, "John Doe", "A musician", "headshot123")
+
+
+def test_rows_are_built_from_columns():
+    """Tests that rows are plain dicts keyed by the mapper's columns."""
+    mapper = RowMapper(columns)
+    row = mapper(values)
+    assert row == dict(zip(columns, values))
+    assert mapper.map_all([values, (2, "Jane Doe", "Another", "abc")])[1]["id"] == 2
+
+
+def test_row_builds_model():
+    """Tests that a row can be validated directly into a model."""
+    musician = Musician.model_validate(RowMapper(columns)(values))
+    assert musician.id == 1
+    assert musician.headshot_id == "headshot123"
+
+
+def test_mapper_compiled_once_per_query():
+    """Tests that BaseQueries compiles a column index map once per query text."""
+    queries = BaseQueries()
+    cursor = MagicMock()
+    cursor.description = [(c,) for c in columns]
+    cursor.fetchall.return_value = [values]
+    query = "-- sql SELECT id, name, bio, headshot_id FROM test_rows_table"
+
+    rows = queries.fetch_all(cursor, query)
+    assert rows[0]["bio"] == "A musician"
+    mapper = queries.mapper_for(query, cursor)
+    queries.fetch_all(cursor, query)
+    assert queries.mapper_for(query, cursor) is mapper
+
+
+def test_stream_fetches_in_batches():
+    """Tests that BaseQueries.stream yields rows batch by batch and closes the connection."""
+    queries = BaseQueries()
+    queries.STREAM_BATCH_SIZE = 2
+    cursor = MagicMock()
+    cursor.description = [(c,) for c in columns]
+    cursor.fetchmany.side_effect = [[values, values], [values], []]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    queries.connect_db = MagicMock(return_value=conn)
+
+    stream = queries.stream("-- sql SELECT id, name, bio, headshot_id FROM streamed")
+    assert next(stream)["id"] == 1
+    conn.close.assert_not_called()
+    assert len(list(stream)) == 2
+    cursor.fetchmany.assert_called_with(2)
+    conn.close.assert_called_once()
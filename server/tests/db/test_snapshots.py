@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from app.db import routing
+from app.db.snapshots import SnapshotQueries
+from app.models.snapshot import Snapshot
+
+
+def snapshot(body: str, version: int) -> Snapshot:
+    return Snapshot(name="test", body=body, created_at=datetime.now(), version=version)
+
+
+def test_older_snapshot_not_stored(sqlite_db):
+    """Tests that a rebuild of older data cannot overwrite a newer snapshot."""
+    queries = SnapshotQueries()
+    assert queries.replace(snapshot("first", 1))
+    assert queries.replace(snapshot("second", 2))
+    assert not queries.replace(snapshot("stale", 1))
+    assert queries.select_one_by_name("test")["body"] == "second"  # type: ignore
+    # a rebuild of the same data, e.g. by a new app version, is stored
+    assert queries.replace(snapshot("upgraded", 2))
+    assert queries.select_one_by_name("test")["body"] == "upgraded"  # type: ignore
+
+
+def test_snapshot_write_is_not_sticky(sqlite_db):
+    """Tests that storing a snapshot (e.g. rebuilt by GET /) does not pin the client to the primary."""
+    routing.begin_request()
+    SnapshotQueries().replace(snapshot("body", 1))
+    assert not routing.read_from_primary()
+
+
+def test_data_version(sqlite_db):
+    assert SnapshotQueries().select_data_version() == 0
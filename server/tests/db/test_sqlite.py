@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from app.db.conn import IntegrityError
+from app.db.events import EventQueries
+from app.db.migrations import MigrationRunner
+from app.db.musicians import MusicianQueries
+from app.db.sqlite import translate
+from app.db.users import UserQueries
+from app.metrics import DB_CONNECTIONS_OPEN
+from app.models.event import NewEvent, NewEventSeries
+
+
+def test_translate():
+    """Tests rewriting of the MySQL dialect used by the app."""
+    assert translate("SELECT * FROM t WHERE id = %s") == "SELECT * FROM t WHERE id = ?"
+    assert "INTEGER NOT NULL" in translate("id INT NOT NULL AUTO_INCREMENT,")
+    assert translate("DROP INDEX IF EXISTS users_sub ON users") == (
+        "DROP INDEX IF EXISTS users_sub"
+    )
+    assert "UNIQUE COLLATE NOCASE" in translate("name VARCHAR(255) NOT NULL UNIQUE,")
+
+
+def test_select_seeded_data(sqlite_db):
+    """Tests that the query classes run unchanged against SQLite."""
+    musicians = MusicianQueries().select_all()
+    assert [m["name"] for m in musicians] == ["Margarite Waddell", "Coco Bender"]
+    user = UserQueries().select_one_by_email("lucas.p.jensen10@gmail.com")
+    assert user is not None and user["name"] == "Lucas Jensen"
+    rows = list(EventQueries().select_all())
+    assert len(rows) == 3
+    assert isinstance(rows[0]["time"], datetime)
+    assert [r["time"] for r in rows] == sorted(r["time"] for r in rows)
+
+
+def test_write_and_read_back(sqlite_db):
+    """Tests inserts, lastrowid and cascading deletes on SQLite."""
+    queries = EventQueries()
+    series = NewEventSeries(name="SQLite Series", description="Local", events=[])
+    series_id = queries.insert_one_series(series)
+    queries.insert_one_event(
+        NewEvent(location="Laptop", time=datetime(2031, 1, 1, 19)), series_id
+    )
+    rows = queries.select_one_by_id(series_id)
+    assert rows is not None and rows[0]["location"] == "Laptop"
+    upcoming = list(queries.select_upcoming(datetime(2030, 1, 1)))
+    assert [r["series_id"] for r in upcoming] == [series_id]
+
+
+def test_series_names_are_unique_ignoring_case(sqlite_db):
+    """Tests that series names compare case-insensitively, like MariaDB's _ci collation."""
+    queries = EventQueries()
+    queries.insert_one_series(NewEventSeries(name="Recital", description="", events=[]))
+    with pytest.raises(IntegrityError):
+        queries.insert_one_series(
+            NewEventSeries(name="RECITAL", description="", events=[])
+        )
+    assert "recital" in queries.select_ids_by_names(["reCITal"])
+
+
+def test_stream_resumes_on_another_thread(sqlite_db):
+    """Tests that a stream has its own connection, so it can be resumed on another worker thread."""
+    rows = EventQueries().select_all(cached=False)
+    first = next(rows)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        rest = pool.submit(list, rows).result()
+    assert len([first, *rest]) == 3
+
+
+def test_migrations_on_sqlite(sqlite_db):
+    """Tests that migrations can be rolled back and re-applied on SQLite."""
+    runner = MigrationRunner()
+    assert all(applied for _, applied in runner.status())
+    assert [m.version for m in runner.rollback(target=0)] == [4, 3, 2, 1]
+    assert [m.version for m in runner.apply()] == [1, 2, 3, 4]
+
+
+def test_select_all_series_without_events(sqlite_db):
+    """Tests that selecting no event columns skips the events table."""
+    rows = list(EventQueries().select_all(("series_id", "name"), ()))
+    assert rows and all(set(row.keys()) == {"series_id", "name"} for row in rows)
+
+
+def test_transaction_rolls_back(sqlite_db):
+    """Tests that writes inside a transaction are visible to it, and undone if it raises."""
+    queries = EventQueries()
+    with pytest.raises(RuntimeError):
+        with queries.transaction():
+            queries.insert_many_series(
+                [NewEventSeries(name="Rolled back", description="", events=[])]
+            )
+            assert "rolled back" in queries.select_ids_by_names(["Rolled back"])
+            raise RuntimeError
+    assert queries.select_ids_by_names(["Rolled back"]) == {}
+
+
+def open_connections() -> str:
+    """Returns the rendered open-connections gauge."""
+    return "\n".join(DB_CONNECTIONS_OPEN.render())
+
+
+def test_failed_select_closes_connection(sqlite_db):
+    """Tests that a SELECT which raises still closes its connection."""
+    queries = EventQueries()
+    before = open_connections()
+    with pytest.raises(Exception):
+        queries.select_rows("SELECT no_such_column FROM events")
+    with pytest.raises(Exception):
+        queries.select_row("SELECT no_such_column FROM events")
+    assert open_connections() == before
@@ -0,0 +1,92 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, negotiate
+
+BODY = "grapefruit " * 100
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, min_size=100)
+
+
+@app.get("/big")
+async def big() -> dict:
+    return {"bio": BODY}
+
+
+@app.get("/small")
+async def small() -> dict:
+    return {"bio": "short"}
+
+
+@app.get("/stream")
+async def stream() -> StreamingResponse:
+    return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+
+@app.get("/missing")
+async def missing() -> PlainTextResponse:
+    return PlainTextResponse(BODY, status_code=404)
+
+
+client = TestClient(app)
+
+
+def test_negotiate():
+    """Tests that brotli is preferred and q=0 codings are refused."""
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("*") == "br"
+    assert negotiate("gzip;q=0.5, br;q=0") == "gzip"
+    assert negotiate("*, br;q=0") == "gzip"
+    assert negotiate("*, br;q=0, gzip;q=0") is None
+    assert negotiate("identity") is None
+    assert negotiate("") is None
+
+
+def test_gzip_response():
+    """Tests that a large JSON body is gzipped with updated headers."""
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == {"bio": BODY}
+
+
+def test_brotli_response():
+    """Tests that brotli is used when the client accepts it."""
+    response = client.get("/big", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == {"bio": BODY}
+
+
+def test_uncompressed_responses():
+    """Tests that small, streamed and error bodies, and clients without gzip, get plain bodies."""
+    assert "content-encoding" not in client.get("/small").headers
+    for path in ("/stream", "/missing"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert BODY in response.text
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    # the body would be compressed for other clients
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_compressed_once_per_body(monkeypatch):
+    """Tests that identical GET bodies are compressed once and served from the cache."""
+    calls = []
+    original = compression.gzip_bytes
+    monkeypatch.setattr(
+        compression, "gzip_bytes", lambda *a: calls.append(1) or original(*a)
+    )
+    cached = FastAPI()
+    cached.add_middleware(CompressionMiddleware, min_size=0)
+    cached.get("/body")(lambda: {"bio": BODY + "cached"})
+    cached_client = TestClient(cached)
+    for _ in range(3):
+        response = cached_client.get("/body", headers={"Accept-Encoding": "gzip"})
+        assert response.json()["bio"].endswith("cached")
+    assert len(calls) == 1
@@ -0,0 +1,60 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.metrics import HTTP_SECONDS, registry
+from app.middleware.metrics import MetricsMiddleware
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get("/metrics-test/{id}")
+async def item(id: int) -> dict:
+    return {"id": id}
+
+
+@app.get("/metrics-test-live")
+async def live() -> StreamingResponse:
+    return StreamingResponse(iter(["data: {}\n\n"]), media_type="text/event-stream")
+
+
+client = TestClient(app)
+
+
+def samples() -> str:
+    return "\n".join(HTTP_SECONDS.render())
+
+
+def test_route_template():
+    """Tests that requests are labelled by route template, not by path."""
+    client.get("/metrics-test/1")
+    client.get("/metrics-test/2")
+    client.get("/metrics-test/nope")
+    text = samples()
+    assert (
+        'tgd_http_request_duration_seconds_count{method="GET",route="/metrics-test/{id}",status="200"} 2'
+        in text
+    )
+    assert 'route="/metrics-test/{id}",status="422"' in text
+    assert "/metrics-test/1" not in text
+
+
+def test_unmatched_and_streams():
+    """Tests that unknown paths share one label and event streams are not observed."""
+    client.get("/no/such/path")
+    client.get("/metrics-test-live")
+    text = samples()
+    assert 'route="unmatched",status="404"' in text
+    assert "/metrics-test-live" not in text
+
+
+def test_metrics_endpoint():
+    from app.main import app as main_app
+
+    response = TestClient(main_app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE tgd_db_query_duration_seconds histogram" in response.text
+    assert "tgd_query_cache_lookups_total" in response.text
+    assert registry.metrics["tgd_http_request_duration_seconds"] is HTTP_SECONDS
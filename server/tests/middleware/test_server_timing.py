@@ -0,0 +1,111 @@
+import contextvars
+import re
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import server_timing
+from app.metrics import Registry, timed, timed_methods
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.server_timing import Phases
+
+seconds = Registry().histogram("test_seconds", "Test durations", ("call",))
+
+
+class Queries:
+    def select(self) -> int:
+        time.sleep(0.01)
+        return self.count()
+
+    def count(self) -> int:
+        time.sleep(0.01)
+        return 1
+
+
+@timed(seconds, "auth", phase="auth")
+def verify() -> None:
+    time.sleep(0.01)
+
+
+class Controller:
+    async def get(self) -> dict:
+        verify()
+        return {"count": Queries().select()}
+
+
+timed_methods(Queries, seconds, phase="db")
+timed_methods(Controller, seconds, phase="build")
+
+
+def make_client(enabled: bool) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware, enabled=enabled)
+
+    @app.get("/")
+    async def root() -> dict:
+        return await Controller().get()
+
+    @app.get("/plain")
+    async def plain() -> dict:
+        return {"recording": server_timing.current() is not None}
+
+    return TestClient(app)
+
+
+def durations(header: str) -> dict[str, float]:
+    return {m[0]: float(m[1]) for m in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+
+def test_phases():
+    """Tests that nested calls count once and build excludes auth and db."""
+    response = make_client(True).get("/")
+    assert response.json() == {"count": 1}
+    phases = durations(response.headers["server-timing"])
+    assert list(phases) == ["auth", "db", "build", "encode"]
+    assert 10 <= phases["auth"] < 20
+    # select calls count, which must not be counted again
+    assert 20 <= phases["db"] < 30
+    assert phases["build"] < 10
+
+
+def test_disabled():
+    """Tests that nothing is recorded or added when disabled."""
+    client = make_client(False)
+    response = client.get("/")
+    assert "server-timing" not in response.headers
+    assert client.get("/plain").json() == {"recording": False}
+
+
+def test_overlapping_calls():
+    """Tests that concurrent calls of a phase add up to the time any of them ran."""
+    phases = Phases()
+    phases.enter("db")
+    phases.enter("db")
+    time.sleep(0.01)
+    phases.leave("db")
+    phases.leave("db")
+    assert 0.01 <= phases.durations["db"] < 0.02
+    assert phases.header().startswith("db;dur=")
+
+
+def test_generator_counts_only_producing_items():
+    """Tests that a query returning a generator is in `db` only while producing each row."""
+
+    class Streaming:
+        def rows(self):
+            for i in range(2):
+                time.sleep(0.01)
+                yield i
+
+    timed_methods(Streaming, seconds, phase="db")
+
+    def consume() -> Phases:
+        phases = server_timing.begin()
+        for _ in Streaming().rows():
+            time.sleep(0.02)  # e.g. building a model from the row
+        return phases
+
+    # in a copied context, so the recording does not leak into other tests
+    phases = contextvars.copy_context().run(consume)
+    assert 0.02 <= phases.durations["db"] < 0.03
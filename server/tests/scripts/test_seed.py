@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from app.db.conn import connect_db
+from app.db.events import EventQueries
+from app.db.migrations import MigrationRunner
+from app.models.event import NewEvent, NewEventSeries
+from app.scripts import seed
+
+
+def test_reseed_reapplies_migrations(sqlite_db):
+    """Tests that seeding an already seeded database re-applies every migration, so writes still work."""
+    seed.populate()
+    assert all(applied for _, applied in MigrationRunner().status())
+    cursor = connect_db().cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    indexes = {row[0] for row in cursor.fetchall()}
+    assert {"events_time", "events_series_time", "users_sub"} <= indexes
+
+    queries = EventQueries()
+    series = NewEventSeries(name="Reseeded", description="Again", events=[])
+    series_id = queries.insert_one_series(series)
+    queries.insert_one_event(
+        NewEvent(location="Eugene", time=datetime(2031, 1, 1, 19)), series_id
+    )
+    assert queries.select_one_by_id(series_id)[0]["location"] == "Eugene"  # type: ignore
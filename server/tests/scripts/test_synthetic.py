@@ -0,0 +1,53 @@
+from datetime import datetime
+from random import Random
+
+from app.scripts.synthetic import Scale, event_rows, insert_synthetic, series_rows
+
+
+def test_scale_from_factor():
+    """Tests the default table volumes derived from one scale factor."""
+    assert Scale.from_factor(1000) == Scale(series=1000, users=100, musicians=10)
+    assert Scale.from_factor(5) == Scale(series=5, users=1, musicians=1)
+
+
+def test_generation_is_deterministic():
+    """Tests that the same seed always produces the same rows."""
+    now = datetime(2025, 1, 1)
+    first = list(event_rows(Random(7), 1, 50, now))
+    second = list(event_rows(Random(7), 1, 50, now))
+    other = list(event_rows(Random(8), 1, 50, now))
+    assert first == second
+    assert first != other
+    assert list(series_rows(Random(7), 10, 1)) == list(series_rows(Random(7), 10, 1))
+
+
+def test_insert_synthetic_batches(monkeypatch):
+    """Tests that rows are inserted with batched executemany calls."""
+    monkeypatch.setattr("app.scripts.synthetic.INSERT_BATCH_SIZE", 10)
+    calls: list[tuple[str, int]] = []
+
+    class FakeCursor:
+        def execute(self, query, params=None):
+            pass
+
+        def fetchone(self):
+            return (3,)
+
+        def executemany(self, query, rows):
+            calls.append((query.split()[2], len(rows)))
+
+        def close(self):
+            pass
+
+    class FakeConnection:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            pass
+
+    counts = insert_synthetic(FakeConnection(), Scale(series=25, users=3, musicians=1))
+    assert counts["series"] == 25
+    assert [n for table, n in calls if table == "series"] == [10, 10, 5]
+    assert all(n <= 10 for _, n in calls)
+    assert counts["users"] == 3
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.metrics import Registry, timed, timed_methods
+
+registry = Registry()
+seconds = registry.histogram("test_seconds", "Test durations", ("call",))
+
+
+class Queries:
+    def select(self) -> int:
+        return 1
+
+    def stream(self):
+        yield from range(3)
+
+    async def fetch(self) -> int:
+        return 2
+
+    def _private(self) -> None: ...
+
+
+class MoreQueries(Queries):
+    pass
+
+
+timed_methods(Queries, seconds)
+
+
+def count(sample: str) -> float:
+    """Returns the value of one sample of the rendered registry."""
+    for line in registry.render().splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_render():
+    """Tests the text exposition of each metric type."""
+    r = Registry()
+    r.counter("requests_total", "Requests", ("path",)).inc('/"quoted"')
+    r.gauge("open", "Open things").inc()
+    h = r.histogram("latency_seconds", "Latency")
+    h.observe(0.003)
+    h.observe(20)
+    r.collected("hits_total", "Hits", "counter", (), lambda: [((), 7)])
+    text = r.render()
+    assert "# TYPE requests_total counter\n" in text
+    assert 'requests_total{path="/\\"quoted\\""} 1\n' in text
+    assert "open 1\n" in text
+    assert 'latency_seconds_bucket{le="0.0025"} 0\n' in text
+    assert 'latency_seconds_bucket{le="0.005"} 1\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2\n' in text
+    assert "latency_seconds_count 2\n" in text
+    assert "hits_total 7\n" in text
+
+
+def test_timed_methods():
+    """Tests that methods are labelled by the instance's class and private methods are not timed."""
+    assert Queries().select() == 1
+    assert MoreQueries().select() == 1
+    assert asyncio.run(Queries().fetch()) == 2
+    Queries()._private()
+    assert count('test_seconds_count{call="Queries.select"}') >= 1
+    assert count('test_seconds_count{call="MoreQueries.select"}') >= 1
+    assert count('test_seconds_count{call="Queries.fetch"}') >= 1
+    assert "_private" not in registry.render()
+
+
+def test_timed_generator():
+    """Tests that a generator is observed once it is exhausted, not when it is created."""
+    before = count('test_seconds_count{call="Queries.stream"}')
+    rows = Queries().stream()
+    assert count('test_seconds_count{call="Queries.stream"}') == before
+    assert list(rows) == [0, 1, 2]
+    assert count('test_seconds_count{call="Queries.stream"}') == before + 1
+
+
+def test_timed_observes_errors():
+    @timed(seconds, "failing")
+    def failing() -> None:
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        failing()
+    assert count('test_seconds_count{call="failing"}') == 1